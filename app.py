@@ -1,31 +1,78 @@
 """Main entry point: Pump/Dump first; OI fetched only when alert triggers."""
 from __future__ import annotations
 import asyncio
+import html
 import json
 import time
 import logging
 import os
+import secrets
+from functools import partial
+from typing import TYPE_CHECKING, Awaitable, Callable
 
 import httpx
 import websockets
-from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
-from aiogram.client.default import DefaultBotProperties
-from aiogram.filters import Command
-from aiogram.types import Message
 
 from config import load_config, Config
 import notifier
 import bybit_api
 import short_agent
-from risk import calc_short_score
+import snapshot
+from evaluator import Decision, TieredEvaluator
+from market_state import MoveMerger, SymbolIndex, Trigger
+from fastpath import FrameStats, SymbolUniverse, get_json_decoder, shard_of
+from exchanges import SYMBOLS, BinanceAdapter, BybitLinearAdapter, BybitSpotAdapter, ExchangeAdapter, TickBatch
+from startup import StartupTimer
+from ticker_state import TICKERS
+from candles import CANDLES
+from orderbook import BOOKS
+from tradeflow import FLOWS
+from detectors import DetectorPipeline
+from regime import RegimeSet, market_move, market_share
+from timerwheel import WHEEL
+from loops import LoopHealth
+from webhook import WebhookServer
+from subscriptions import DIRECTIONS, SUBSCRIPTIONS
+from feedhealth import WATCHDOG
+from tickstore import TICKS, format_history, parse_range
+from eventlog import EVENTS, install_queue_logging
+import state
+from memory import DICT_SLOT, FLOAT, MEMORY, SYMBOL, TUPLE2, Structure, evict_by_rank, flat_dict_bytes
+
+if TYPE_CHECKING:  # aiogram est importé dans main(), en parallèle du warm-up
+    from aiogram import Bot, Dispatcher
+    from aiogram.types import Message
 
 # ---- Logging ----
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
 # ---- Price buffers & cooldown ----
-price_data: dict[str, list[tuple[float, float]]] = {}
+# fenêtres par exchange derrière un index symbole unifié
+price_data = SymbolIndex()
+moves = MoveMerger()
 last_alert_time: dict[str, float] = {}
+binance_stats = FrameStats()
+# adaptateurs actifs par venue (statistiques de frames dans /status)
+adapters: dict[str, ExchangeAdapter] = {}
+startup = StartupTimer()
+_background: set[asyncio.Task] = set()
+# détecteurs streaming, un pipeline par exchange
+pipelines: dict[str, DetectorPipeline] = {}
+# régime de marché (rendements transversaux), un jeu de moteurs par exchange (un par timeframe)
+regimes: dict[str, RegimeSet] = {}
+market_suppressed: dict[str, int] = {}
+# carnets / flux tenus par ce processus (False: coordinateur shardé, les workers les tiennent)
+local_books = True
+# évaluation des alertes par paliers (élagage avant enrichissement REST)
+evaluator = TieredEvaluator()
+# lignes supplémentaires de /status (ex: état des shards)
+status_extras: list[Callable[[], str]] = []
+SUBSCRIPTIONS_RELOAD_SEC = 10.0
+FEED_CHECK_SEC = 1.0
+FEED_ALERT_CHECK_SEC = 5.0
+TICKSTORE_MAINTAIN_SEC = 3600.0
+# santé de la boucle asyncio (retard de planification, blocage)
+loop_health = LoopHealth("loop")
 
 # ---- Optional Coinglass capture ----
 def capture_page_if_enabled(url: str, symbol: str, cfg: Config) -> str | None:
@@ -73,12 +120,38 @@ async def handle_alert(
     variation: float,
     direction: str,  # "up" | "down"
     exchange: str,   # "Binance" | "Bybit"
+    spread: float | None = None,
+    window_sec: int | None = None,
+    risk_score: float | None = None,
+    market_pct: float | None = None,
+    excess_pct: float | None = None,
+    book_imbalance: float | None = None,
+    flow_imbalance: float | None = None,
+    volume: tuple[float, float, float, float, float, float] | None = None,
 ):
     now = time.time()
-    # cooldown par symbole
-    if symbol in last_alert_time and now - last_alert_time[symbol] < cfg.cooldown_sec:
+    if not SUBSCRIPTIONS.users:
+        # index non configuré (appel direct): tous les utilisateurs autorisés, réglages par défaut
+        SUBSCRIPTIONS.configure(cfg.threshold_percent, cfg.authorized_users)
+    # destinataires: index symbole -> abonnés, filtrés par direction, seuil et cooldown
+    subs = SUBSCRIPTIONS.candidates(
+        symbol, direction, variation, tf_threshold(cfg, window_sec), now, cfg.cooldown_sec
+    )
+    if not subs:
         return
+    # cooldown posé avant l'évaluation: pas de nouvel enrichissement d'un symbole élagué
+    for sub in subs:
+        SUBSCRIPTIONS.mark_sent(sub.user_id, symbol, now, cfg.cooldown_sec)
     last_alert_time[symbol] = now
+    arm_cooldown(symbol, now, cfg.cooldown_sec)
+    min_scores = {sub.user_id: evaluator.gate if sub.min_score is None else sub.min_score for sub in subs}
+    downranked = cfg.regime_filter == "downrank" and market_move(
+        direction, market_pct, excess_pct, cfg.regime_min_excess_pct
+    )
+    if downranked:
+        # mouvement de marché: score minimal relevé de la part du mouvement expliquée par le marché
+        share = market_share(direction, variation, market_pct)
+        min_scores = {uid: ms + (1.0 - ms) * share for uid, ms in min_scores.items()}
 
     # URLs utilitaires
     if exchange.lower() == "binance":
@@ -89,224 +162,417 @@ async def handle_alert(
         coinglass_url = "https://www.coinglass.com"
     exchange_url = f"https://www.bybit.com/trade/usdt/{symbol}"
 
-    # ---- Récupère OI ~1h vs dernier
-    try:
-        oi_1h, oi_last, oi_delta_pct = await bybit_api.get_oi_1h_change(http, symbol)
+    # ---- Évaluation par paliers: entrées locales, borne haute, puis REST utile
+    tick = price_data.last_tick(symbol, exchange)
+    decision = await evaluator.evaluate(
+        http, symbol, direction,
+        require_oi_confirm=cfg.require_oi_confirm,
+        confirm_oi_pct=cfg.confirm_oi_pct,
+        last_price=tick[1] if tick else None,
+        gate=min(min_scores.values()),
+        book_imbalance=book_imbalance,
+        flow_imbalance=flow_imbalance,
+    )
+    if not decision.passed:
+        logging.debug("%s alert ignored: %s", symbol, decision.reason)
+        record_decision(symbol, exchange, direction, variation, window_sec, decision, min_scores, [])
+        return
+    if not decision.complete and any(ms >= decision.score for ms in min_scores.values()):
+        # score partiel insuffisant pour les abonnés les plus exigeants: entrées restantes
+        await evaluator.fill(http, decision, last_price=tick[1] if tick else None)
+    recipients = [uid for uid, ms in min_scores.items() if decision.score > ms]
+    record_decision(symbol, exchange, direction, variation, window_sec, decision, min_scores, recipients)
+
+    if decision.oi is not None:
+        oi_1h, oi_last, oi_delta_pct = decision.oi
         if oi_delta_pct > 0:
             oi_trend = f"OI ↑ (+{oi_delta_pct:.2f}%)"
         elif oi_delta_pct < 0:
             oi_trend = f"OI ↓ ({oi_delta_pct:.2f}%)"
         else:
             oi_trend = "OI ≈ (0.00%)"
-    except Exception as e:
-        oi_1h = oi_last = oi_delta_pct = 0.0
-        oi_trend = f"OI: erreur ({e})"
-
-    try:
-        (vol_1h, vol_last, vol_dpct,
-         not_1h, not_last, not_dpct) = await bybit_api.get_volume_1h_change(http, symbol)
+    else:
+        oi_trend = "OI: n/a"
 
-        if vol_dpct > 0:
-            vol_trend = f"Vol ↑ (+{vol_dpct:.2f}%)"
-        elif vol_dpct < 0:
-            vol_trend = f"Vol ↓ ({vol_dpct:.2f}%)"
-        else:
-            vol_trend = "Vol ≈ (0.00%)"
+    # ---- Volume / notionnel ≈1h: bougies locales, klines REST pendant le warm-up
+    if volume is None and recipients:
+        try:
+            volume = await bybit_api.get_volume_1h_change(http, symbol)
+        except Exception as e:
+            logging.warning("volume fetch failed for %s: %s", symbol, e)
+    if volume is not None:
+        vol_dpct, not_dpct = volume[2], volume[5]
+        volume_str = f"Volume 1h: <b>{vol_dpct:+.0f}%</b>, notionnel <b>{not_dpct:+.0f}%</b>\n"
+    else:
+        volume_str = ""
 
-        # Notionnel en USDT (turnover)
-        if not_dpct > 0:
-            not_trend = f"Notionnel ↑ (+{not_dpct:.2f}%)"
-        elif not_dpct < 0:
-            not_trend = f"Notionnel ↓ ({not_dpct:.2f}%)"
-        else:
-            not_trend = "Notionnel ≈ (0.00%)"
-    except Exception as e:
-        vol_1h = vol_last = vol_dpct = 0.0
-        not_1h = not_last = not_dpct = 0.0
-        vol_trend = f"Vol: erreur ({e})"
-        not_trend = ""
-    
     # ---- Funding rate (actuel)
-    raw_funding = 0.0
-    try:
-        raw_funding = await bybit_api.get_current_funding_rate(http, symbol)
+    if decision.funding is not None:
         # Bybit renvoie une fraction (ex: 0.0034 => 0.34%)
-        funding_pct = raw_funding * 100.0
+        funding_pct = decision.funding * 100.0
         funding_bp = funding_pct * 100.0              # basis points (optionnel)
         funding_str = f"{funding_pct:+.2f}% ({funding_bp:+.0f} bp)"
-    except Exception as e:
+    else:
         funding_str = "n/a"
-        logging.warning("funding fetch failed for %s: %s", symbol, e)
-
 
     # ---- Position dans l'historique (1D all-time scan)
-    ratio = 0.0
-    try:
-        pmin, pmax, plast, ts_min, ts_max = await bybit_api.get_alltime_range(http, symbol)
-        ratio, label = bybit_api.historical_position_label(plast, pmin, pmax)
-        # ratio en %
-        pos_pct = ratio * 100.0
-    except Exception as e:
-        pmin = pmax = plast = 0.0
-        pos_pct = 0.0
-        label = "inconnu"
-        logging.warning("all-time range failed for %s: %s", symbol, e)
-
-    # ---- Liquidations (≈1h)
-    try:
-        long_liq, short_liq = await bybit_api.get_liquidation_stats(http, symbol)
-        liq_total = long_liq + short_liq
-        short_liq_ratio = short_liq / liq_total if liq_total else 0.0
-    except Exception as e:
-        long_liq = short_liq = 0.0
-        short_liq_ratio = 0.0
-        logging.warning("liquidation fetch failed for %s: %s", symbol, e)
-    
-    
-
-    # ---- (Optionnel) Filtrer selon OI
-    if cfg.require_oi_confirm:
-        if (direction == "up" and oi_delta_pct <= +cfg.confirm_oi_pct) or \
-           (direction == "down" and oi_delta_pct >= -cfg.confirm_oi_pct):
-            logging.info("%s alert ignored: OI not confirming (%+.2f%%)", symbol, oi_delta_pct)
-            return
+    if decision.position is not None:
+        pos_str = f"{decision.position * 100.0:.1f}% ({decision.label})"
+    else:
+        pos_str = "n/a"
 
-    short_score = calc_short_score(raw_funding, ratio, oi_delta_pct, short_liq_ratio)
+    # score partiel (entrées non récupérées comptées à 0): borne basse
+    short_score = decision.score
+    score_str = f"{short_score:.2f}" if decision.complete else f"≥ {short_score:.2f}"
+    if decision.stale:
+        # source lente ou en échec: dernière valeur bonne, avec son âge
+        ages = ", ".join(f"{name} {age / 60:.0f} min" for name, age in decision.stale.items())
+        stale_str = f"⏳ Entrées en cache: {ages}\n"
+    else:
+        stale_str = ""
 
-    if short_score <= 0.25:
-        logging.info(
-            "%s alert ignored: short score %.2f <= 0.25", symbol, short_score
+    # ---- Spread cross-venue (fenêtres locales, gratuit)
+    if spread is None:
+        spread = price_data.spread_pct(symbol, max_age=cfg.time_window_sec, now=now)
+    spread_str = f"Spread Binance/Bybit: <b>{spread:+.2f}%</b>\n" if spread is not None else ""
+    risk_str = f"Score risque: <b>{risk_score:.2f}</b>\n" if risk_score is not None else ""
+    book_spread = BOOKS.spread_pct(symbol, now)
+    if decision.book_imbalance is not None and book_spread is not None:
+        book_str = f"Carnet: imbalance <b>{decision.book_imbalance:+.2f}</b>, spread {book_spread:.3f}%\n"
+    else:
+        book_str = ""
+    if market_pct is not None and excess_pct is not None:
+        tag = "🌐 " if market_move(direction, market_pct, excess_pct, cfg.regime_min_excess_pct) else ""
+        note = ", déclassé" if downranked else ""
+        market_str = f"{tag}Marché: {market_pct:+.2f}% (excès {excess_pct:+.2f}%{note})\n"
+    else:
+        market_str = ""
+    flow = FLOWS.flow(symbol, now)
+    if flow is not None and flow.imbalance is not None:
+        flow_str = (
+            f"Flux {int(FLOWS.window_sec) // 60} min: CVD <b>{flow.cvd_notional:+,.0f}</b> USDT "
+            f"(achats {flow.buy_notional / (flow.buy_notional + flow.sell_notional) * 100:.0f}%)\n"
         )
-        return
+    else:
+        flow_str = ""
 
     emoji = "📈" if direction == "up" else "📉"
     message_type = "PUMP" if direction == "up" else "DUMP"
 
     caption = (
         f"{emoji} <b>{message_type}</b> détecté sur <b>{symbol}</b> ({exchange})\n"
-        f"Variation sur {cfg.time_window_sec // 60} min : <b>{variation:.2f}%</b>\n"
-        # f"{oi_trend} — 1h: <code>{oi_1h:.0f}</code> → now: <code>{oi_last:.0f}</code>\n"
-        # f"{vol_trend} — 5m: <code>{vol_1h:.0f}</code> → now: <code>{vol_last:.0f}</code>\n"
-        # f"{not_trend}\n"
-        f"Funding: <b>{funding_str}</b>  \nPosition historique: <b>{pos_pct:.1f}%</b> ({label})\n"
-        f"Score short: <b>{short_score:.2f}</b>\n"
+        f"Variation sur {(window_sec or cfg.time_window_sec) // 60} min : <b>{variation:.2f}%</b>\n"
+        # f"{oi_trend}\n"
+        f"Funding: <b>{funding_str}</b>  \nPosition historique: <b>{pos_str}</b>\n"
+        f"Score short: <b>{score_str}</b>\n"
+        f"{stale_str}"
+        f"{volume_str}"
+        f"{spread_str}"
+        f"{risk_str}"
+        f"{book_str}"
+        f"{flow_str}"
+        f"{market_str}"
         f"<a href=\"{coinglass_url}\">🔗 Coinglass</a> | "
         # f"<a href=\"{exchange_url}\">🔗 Bybit</a>"
     )
 
-    # envoi à tous les users autorisés
-    screenshot = capture_page_if_enabled(coinglass_url, symbol, cfg)
-    for uid in cfg.authorized_users:
+    # envoi aux abonnés dont le score minimal est atteint
+    screenshot = capture_page_if_enabled(coinglass_url, symbol, cfg) if recipients else None
+    for uid in recipients:
         if screenshot:
             await notifier.send_photo_with_caption(bot, uid, screenshot, caption, parse_mode="HTML")
         else:
             await notifier.send_text(bot, uid, caption, parse_mode="HTML")
 
-    logging.info("%s alert sent | Δ=%.2f%% | %s", symbol, variation, oi_trend)
+    logging.info(
+        "%s alert sent to %d/%d | Δ=%.2f%% | %s | fetched: %s | %s",
+        symbol, len(recipients), len(subs), variation, oi_trend,
+        ",".join(decision.fetched) or "none", evaluator.summary(),
+    )
+
 
-# ---- Binance WS (!ticker@arr) ----
-async def price_monitor_binance(cfg: Config, bot: Bot, http: httpx.AsyncClient):
-    uri = "wss://stream.binance.com:9443/ws/!ticker@arr"
+def record_decision(
+    symbol: str,
+    exchange: str,
+    direction: str,
+    variation: float,
+    window_sec: int | None,
+    decision: Decision,
+    min_scores: dict[int, float],
+    recipients: list[int],
+) -> None:
+    """Décision d'alerte (entrées, score, destinataires) dans le journal d'événements."""
+    EVENTS.emit(
+        "alert", symbol=symbol, exchange=exchange, direction=direction, variation=variation,
+        window_sec=window_sec, passed=decision.passed, reason=decision.reason,
+        score=decision.score, complete=decision.complete, inputs=decision.inputs(),
+        fetched=list(decision.fetched), stale=decision.stale, min_scores=min_scores,
+        recipients=recipients,
+    )
+
+
+def tf_threshold(cfg: Config, window_sec: int | None) -> float:
+    """Seuil global de la timeframe ayant déclenché."""
+    for tf in cfg.detection_timeframes():
+        if tf.window_sec == window_sec:
+            return tf.threshold_pct
+    return cfg.threshold_percent
+
+# ---- Fusion cross-exchange ----
+async def dispatch_trigger(cfg: Config, bot: Bot, http: httpx.AsyncClient, trig: Trigger):
+    """Un seul enrichissement par symbole et par mouvement, quel que soit l'exchange."""
+    if regime_suppresses(cfg, trig):
+        market_suppressed[trig.exchange] = market_suppressed.get(trig.exchange, 0) + 1
+        EVENTS.emit(
+            "trigger_suppressed", symbol=trig.symbol, exchange=trig.exchange,
+            variation=trig.variation, market_pct=trig.market_pct, excess_pct=trig.excess_pct,
+        )
+        return
+    if local_books:
+        touch_hot(trig)
+    prev = moves.moves.get(trig.symbol)
+    prev_variation = prev.variation if prev is not None else 0.0
+    move = moves.submit(trig, cfg.time_window_sec, cfg.cooldown_sec)
+    if move is None and escalates(cfg, trig, prev_variation):
+        # mouvement déjà alerté à un seuil serré, qui atteint maintenant d'autres seuils
+        move = moves.moves[trig.symbol]
+    if move is None:
+        EVENTS.emit(
+            "trigger_merged", symbol=trig.symbol, exchange=trig.exchange,
+            move=moves.moves[trig.symbol].label, variation=trig.variation,
+        )
+        return
+    await handle_alert(
+        cfg, bot, http, trig.symbol, trig.variation, trig.direction, trig.exchange,
+        trig.spread, trig.window_sec or None, trig.risk_score,
+        trig.market_pct, trig.excess_pct, trig.book_imbalance, trig.flow_imbalance, trig.volume,
+    )
+
+
+def regime_suppresses(cfg: Config, trig: Trigger) -> bool:
+    return cfg.regime_filter == "suppress" and market_move(
+        trig.direction, trig.market_pct, trig.excess_pct, cfg.regime_min_excess_pct
+    )
+
+
+def touch_hot(trig: Trigger) -> None:
+    """Carnet et flux Bybit demandés dès le premier déclenchement (disponibles pour les suivants).
+
+    En mode shardé, appelé par le worker propriétaire du symbole (seul à avoir
+    le WS Bybit), qui joint les imbalances et la variation de volume au déclenchement.
+    """
+    BOOKS.touch(trig.symbol, trig.ts)
+    FLOWS.touch(trig.symbol, trig.ts)
+    trig.book_imbalance = BOOKS.imbalance(trig.symbol, trig.ts)
+    trig.flow_imbalance = FLOWS.imbalance(trig.symbol, trig.ts)
+    trig.volume = CANDLES.volume_change(trig.symbol, trig.ts)
+
+
+def configure_books(cfg: Config, owned: Callable[[str], bool] | None = None) -> None:
+    """Watchlist des carnets (*owned*: symboles du shard) et délai d'inactivité."""
+    BOOKS.set_watchlist(s for s in cfg.orderbook_watchlist if owned is None or owned(s))
+    BOOKS.idle_sec = cfg.orderbook_idle_sec
+    FLOWS.idle_sec = cfg.orderbook_idle_sec
+
+
+def escalates(cfg: Config, trig: Trigger, prev_variation: float) -> bool:
+    """Le mouvement fusionné franchit-il le seuil d'abonnés qui ne l'avaient pas encore atteint?"""
+    if trig.variation <= prev_variation:
+        return False
+    base = tf_threshold(cfg, trig.window_sec or None)
+    for uid in SUBSCRIPTIONS.watchers(trig.symbol):
+        limit = base * SUBSCRIPTIONS.scale(SUBSCRIPTIONS.users[uid])
+        if prev_variation < limit <= trig.variation:
+            return True
+    return False
+
+
+Emit = Callable[[Trigger], Awaitable[None]]
+
+
+def pipeline_for(cfg: Config, exchange: str) -> DetectorPipeline:
+    pipe = pipelines.get(exchange)
+    if pipe is None:
+        pipe = pipelines[exchange] = DetectorPipeline.default(
+            cfg.time_window_sec, cfg.threshold_percent, cfg.confirm_oi_pct
+        )
+    return pipe
+
+
+def regime_for(cfg: Config, exchange: str) -> RegimeSet:
+    engines = regimes.get(exchange)
+    if engines is None:
+        engines = regimes[exchange] = RegimeSet(tf.window_sec for tf in cfg.detection_timeframes())
+    return engines
+
+
+async def regime_loop() -> None:
+    """Recalcule le régime de chaque exchange une fois par seconde (une passe NumPy)."""
     while True:
-        try:
-            async with websockets.connect(uri, ping_interval=20, ping_timeout=10) as websocket:
-                logging.info("✅ Connected to Binance WebSocket")
-                while True:
-                    msg = await websocket.recv()
-                    data = json.loads(msg)
-                    current_time = time.time()
-                    for ticker in data:
-                        symbol = ticker.get("s")
-                        if not symbol or not symbol.endswith("USDT"):
-                            continue
-                        try:
-                            price = float(ticker["c"])
-                        except Exception:
-                            continue
-
-                        buf = price_data.setdefault(symbol, [])
-                        buf.append((current_time, price))
-                        # prune by window
-                        cutoff = current_time - cfg.time_window_sec
-                        price_data[symbol] = [(t, p) for (t, p) in buf if t >= cutoff]
-
-                        prices = [p for (_, p) in price_data[symbol]]
-                        if len(prices) < 2:
-                            continue
-                        mn, mx = min(prices), max(prices)
-                        if mn <= 0:
-                            continue
-                        variation = (mx - mn) / mn * 100.0
-                        if variation >= cfg.threshold_percent:
-                            direction = "up" if prices[-1] > prices[0] else "down"
-                            await handle_alert(cfg, bot, http, symbol, variation, direction, "Binance")
-                            price_data[symbol] = []
-        except Exception as e:
-            logging.warning("[Binance WS error] %s", e)
-        logging.info("🔄 Reconnecting Binance WS in 5s…")
-        await asyncio.sleep(5)
+        await asyncio.sleep(1.0)
+        now = time.time()
+        for engines in regimes.values():
+            engines.step(now)
+
+
+def tag_regime(engines: RegimeSet, triggers: list[Trigger]) -> None:
+    """Note la composante marché et l'excès du symbole, sur l'horizon de la timeframe du déclenchement."""
+    for trig in triggers:
+        engine = engines.engine(trig.window_sec)
+        if engine.regime is None:
+            continue
+        trig.market_pct = engine.regime.market_pct
+        trig.excess_pct = engine.excess_pct(trig.symbol)
+
+
+def run_detectors(pipe: DetectorPipeline, symbol: str, ts: float, price: float, triggers: list[Trigger]) -> None:
+    """Alimente les détecteurs streaming et note le score de risque des déclenchements."""
+    for ev in pipe.on_price(symbol, ts, price):
+        logging.debug("%s %s event (%.2f)", ev.symbol, ev.detector, ev.value)
+    if triggers:
+        score = pipe.risk_score(symbol)
+        for trig in triggers:
+            trig.risk_score = score
+
+
+# ---- Cœur de détection (batchs normalisés de tous les adaptateurs) ----
+def on_oi(symbol: str, ts: float, oi: float) -> None:
+    """OI Bybit: sert aussi de proxy pour les pipelines des autres venues."""
+    for p in pipelines.values():
+        for ev in p.on_oi(symbol, ts, oi):
+            logging.debug("%s %s event (%.2f)", ev.symbol, ev.detector, ev.value)
 
-# ---- Bybit WS (v5/public/linear tickers.SYMBOL) ----
-async def price_monitor_bybit(cfg: Config, bot: Bot, http: httpx.AsyncClient):
-    uri = "wss://stream.bybit.com/v5/public/linear"
-    # récupère liste des symboles USDT perp
-    symbols = await bybit_api.fetch_usdt_perp_symbols(http)
-    args = [f"tickers.{s}" for s in symbols]
-    chunk_size = 100
 
+def detect_batch(cfg: Config, batch: TickBatch) -> list[Trigger]:
+    """Fenêtres, détecteurs streaming et régime pour un batch de ticks d'une venue."""
+    exchange = batch.exchange
+    pipe = pipeline_for(cfg, exchange)
+    regime = regime_for(cfg, exchange)
+    names = SYMBOLS.names
+    update = price_data.update
+    triggers: list[Trigger] = []
+    if TICKS.enabled:
+        TICKS.append_many(exchange, batch.symbols(), batch.ts, batch.prices)
+    for sid, ts, price in zip(batch.ids, batch.ts, batch.prices):
+        symbol = names[sid]
+        hits = update(exchange, symbol, ts, price)
+        run_detectors(pipe, symbol, ts, price, hits)
+        regime.update(symbol, price)
+        if hits:
+            tag_regime(regime, hits)
+            triggers += hits
+    # prix inchangés: ancre de fenêtre et dernier tick rafraîchis, sans détection
+    seed = price_data.seed
+    for sid, ts, price in zip(batch.held_ids, batch.held_ts, batch.held_prices):
+        seed(exchange, names[sid], ts, price)
+    return triggers
+
+
+async def run_feed(cfg: Config, adapter: ExchangeAdapter, emit: Emit) -> None:
+    """Connexion d'un adaptateur: watchdog, backoff, décodage, détection par batch, émission."""
+    loads = get_json_decoder(cfg.json_decoder)
+    health = WATCHDOG.feed(adapter.feed, adapter.feed, adapter.interval_hint)
+    adapters[adapter.name] = adapter
     while True:
         try:
-            async with websockets.connect(uri) as websocket:
-                logging.info("✅ Connected to Bybit WebSocket (%d symbols)", len(symbols))
-                # subscribe par chunks
-                for i in range(0, len(args), chunk_size):
-                    chunk = args[i:i+chunk_size]
-                    await websocket.send(json.dumps({"op": "subscribe", "args": chunk}))
-                    await asyncio.sleep(0.1)
-
+            async with websockets.connect(adapter.uri, close_timeout=1, **adapter.connect_kwargs) as websocket:
+                logging.info("✅ Connected to %s WebSocket (%s)", adapter.name, adapter.describe())
+                await adapter.on_connect(websocket)
+                startup.mark_live(adapter.feed)
+                health.on_connect(time.time(), websocket.close)
+                next_sync = 0.0
                 while True:
                     msg = await websocket.recv()
-                    data = json.loads(msg)
-                    topic = data.get("topic", "")
-                    if not topic.startswith("tickers."):
-                        continue
-                    symbol = topic.split(".", 1)[1]
-                    ticker_data = data.get("data", {})
-                    last_price = ticker_data.get("lastPrice")
-                    if last_price is None:
-                        continue
-                    try:
-                        price = float(last_price)
-                    except Exception:
+                    t0 = time.perf_counter_ns()
+                    now = time.time()
+                    health.on_message(now)
+                    if adapter.sync_sec and now >= next_sync:
+                        next_sync = now + adapter.sync_sec
+                        await adapter.sync(websocket, now)
+                    batch = adapter.parse(loads(msg), now)
+                    if batch is None:
                         continue
+                    triggers = detect_batch(cfg, batch) if len(batch) or batch.held_ids else []
+                    adapter.stats.record(batch.seen, batch.skipped, time.perf_counter_ns() - t0)
+                    # l'enrichissement n'entre pas dans le temps de traitement de la frame
+                    for trig in triggers:
+                        await emit(trig)
+        except Exception as e:
+            # erreurs en rafale (reconnexions): journal limité en débit, log console une fois par coupure
+            EVENTS.emit("ws_error", feed=adapter.feed, error=repr(e))
+            if health.connected:
+                logging.warning("[%s WS error] %s", adapter.name, e)
+        delay = health.on_disconnect(time.time())
+        logging.info("🔄 Reconnecting %s WS in %.1fs…", adapter.name, delay)
+        await asyncio.sleep(delay)
 
-                    current_time = time.time()
-                    buf = price_data.setdefault(symbol, [])
-                    buf.append((current_time, price))
-                    cutoff = current_time - cfg.time_window_sec
-                    price_data[symbol] = [(t, p) for (t, p) in buf if t >= cutoff]
 
-                    prices = [p for (_, p) in price_data[symbol]]
-                    if len(prices) < 2:
-                        continue
-                    mn, mx = min(prices), max(prices)
-                    if mn <= 0:
-                        continue
-                    variation = (mx - mn) / mn * 100.0
-                    if variation >= cfg.threshold_percent:
-                        direction = "up" if prices[-1] > prices[0] else "down"
-                        await handle_alert(cfg, bot, http, symbol, variation, direction, "Bybit")
-                        price_data[symbol] = []
+# ---- Binance WS (!ticker@arr) ----
+async def price_monitor_binance(
+    cfg: Config,
+    bot: Bot,
+    http: httpx.AsyncClient,
+    perps: list[str] | None = None,
+    emit: Emit | None = None,
+    shard: tuple[int, int] | None = None,
+):
+    """Flux Binance. Par défaut `!ticker@arr`; en mode shardé (*shard*) avec un
+    univers connu, abonnement `<symbol>@ticker` limité aux symboles du shard."""
+    emit = emit or partial(dispatch_trigger, cfg, bot, http)
+    if perps is None and cfg.binance_universe == "bybit":
+        try:
+            perps = await bybit_api.fetch_usdt_perp_symbols(http)
         except Exception as e:
-            logging.warning("[Bybit WS error] %s", e)
-        logging.info("🔄 Reconnecting Bybit WS in 5s…")
-        await asyncio.sleep(5)
+            logging.warning("Bybit perps unavailable for Binance universe: %s", e)
+    universe = SymbolUniverse.build(cfg.binance_universe, cfg.binance_watchlist, perps or [], shard)
+    # Bybit coupé: la watchlist Binance s'élargit aux perps Bybit
+    fallback = SymbolUniverse.build("bybit", cfg.binance_watchlist, perps or [], shard) \
+        if cfg.binance_universe == "watchlist" else None
+    per_symbol = shard is not None and universe.symbols is not None
+    await run_feed(cfg, BinanceAdapter(universe, fallback, per_symbol, stats=binance_stats), emit)
+
+# ---- Bybit WS (v5/public/linear tickers.SYMBOL) ----
+async def price_monitor_bybit(
+    cfg: Config,
+    bot: Bot,
+    http: httpx.AsyncClient,
+    symbols: list[str] | None = None,
+    emit: Emit | None = None,
+):
+    emit = emit or partial(dispatch_trigger, cfg, bot, http)
+    # récupère liste des symboles USDT perp (sauf si déjà fournie par le warm-up)
+    if symbols is None:
+        symbols = await bybit_api.fetch_usdt_perp_symbols(http)
+    await run_feed(cfg, BybitLinearAdapter(symbols, on_oi), emit)
+
+# ---- Bybit spot WS (v5/public/spot tickers.SYMBOL) ----
+async def price_monitor_bybit_spot(
+    cfg: Config,
+    bot: Bot,
+    http: httpx.AsyncClient,
+    perps: list[str] | None = None,
+    emit: Emit | None = None,
+    shard: tuple[int, int] | None = None,
+):
+    """Flux Bybit spot, limité aux paires ayant un perp linéaire: l'enrichissement
+    (OI, funding, carnets, flux) ne vaut que pour le linéaire."""
+    emit = emit or partial(dispatch_trigger, cfg, bot, http)
+    if not perps:
+        perps = await bybit_api.fetch_usdt_perp_symbols(http)
+    spot = await bybit_api.fetch_usdt_spot_symbols(http)
+    linear = set(perps)
+    symbols = [s for s in spot if s in linear]
+    if shard is not None:
+        symbols = [s for s in symbols if shard_of(s, shard[1]) == shard[0]]
+    await run_feed(cfg, BybitSpotAdapter(symbols), emit)
 
 # ---- Telegram commands ----
 def is_authorized(uid: int, cfg: Config) -> bool:
     return uid in cfg.authorized_users
 
 def register_commands(dp: Dispatcher, cfg: Config):
+    from aiogram.filters import Command
+
     @dp.message(Command("start"))
     async def cmd_start(message: Message):
         if not is_authorized(message.from_user.id, cfg):
@@ -316,7 +582,10 @@ def register_commands(dp: Dispatcher, cfg: Config):
             "🤖 Pump/Dump monitor prêt.\n"
             f"Seuil: {cfg.threshold_percent:.2f}%\n"
             f"Fenêtre: {cfg.time_window_sec // 60} min\n"
-            f"OI confirm: {cfg.require_oi_confirm} (±{cfg.confirm_oi_pct:.2f}%)"
+            + "".join(
+                f"+ {tf.window_sec // 60} min @ {tf.threshold_pct:.2f}%\n" for tf in cfg.extra_timeframes
+            )
+            + f"OI confirm: {cfg.require_oi_confirm} (±{cfg.confirm_oi_pct:.2f}%)"
         )
 
     @dp.message(Command("status"))
@@ -326,8 +595,36 @@ def register_commands(dp: Dispatcher, cfg: Config):
             return
         await message.answer(
             "📊 Statut:\n"
-            f"• tracked symbols: {len({k for k in price_data.keys() if price_data[k]})}\n"
+            f"• tracked symbols: {price_data.tracked_count()}\n"
             f"• cooldown: {cfg.cooldown_sec}s\n"
+            + "".join(f"• {name} frames: {a.stats.summary()}\n" for name, a in list(adapters.items()))
+            + f"• startup: {startup.report()}\n"
+            f"• alerts: {evaluator.summary()}\n"
+            f"• enrichment: {evaluator.sources.summary()}\n"
+            f"• order books: {BOOKS.summary()}\n"
+            f"• trade flow: {FLOWS.summary()}\n"
+            f"• timers: {WHEEL.summary()}\n"
+            f"• subscriptions: {SUBSCRIPTIONS.summary()}\n"
+            f"• tick store: {TICKS.summary()}\n"
+            f"• events: {EVENTS.summary()}\n"
+            f"• memory: {MEMORY.summary()}\n"
+            f"• loop: {loop_health.summary()}\n"
+            f"• feeds: {WATCHDOG.summary()}\n"
+            + "".join(
+                f"• regime {ex}: {engine.summary()}, {market_suppressed.get(ex, 0)} market moves suppressed\n"
+                for ex, engine in regimes.items()
+            )
+            + "".join(f"• detectors {ex}: {p.cost_report()}\n" for ex, p in pipelines.items())
+            + "".join(extra() for extra in status_extras)
+        )
+
+    @dp.message(Command("memory"))
+    async def cmd_memory(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        await message.answer(
+            f"🧠 Mémoire: {MEMORY.summary()}\n<pre>{MEMORY.table()}</pre>", parse_mode="HTML"
         )
 
     @dp.message(Command("short"))
@@ -337,32 +634,552 @@ def register_commands(dp: Dispatcher, cfg: Config):
             return
         parts = message.text.split()
         if len(parts) < 2:
-            await message.answer("Usage: /short SYMBOL")
+            names = ", ".join(sorted(cfg.short_watchlists)) or "aucune"
+            await message.answer(f"Usage: /short SYMBOL [SYMBOL...] | WATCHLIST\nWatchlists: {names}")
             return
-        symbol = parts[1].upper()
+        symbols = short_agent.parse_symbols(parts[1:], cfg.short_watchlists)
+        if len(symbols) > cfg.short_max_symbols:
+            await message.answer(f"Trop de symboles ({len(symbols)} > {cfg.short_max_symbols}).")
+            return
+        start = time.perf_counter()
         timeout = httpx.Timeout(10.0)
         async with httpx.AsyncClient(timeout=timeout) as client:
-            score = await short_agent.evaluate_short_symbol(client, symbol)
-        await message.answer(f"Score short {symbol}: {score:.2f}")
+            # même évaluateur que les alertes: plages historiques en cache partagées
+            results = await short_agent.evaluate_many(
+                client, symbols, evaluator, cfg.short_concurrency, cfg.short_timeout_sec,
+            )
+        if len(results) == 1 and results[0].decision is not None and results[0].decision.complete:
+            await message.answer(f"Score short {symbols[0]}: {results[0].score:.2f}")
+            return
+        table = short_agent.format_table(results, time.perf_counter() - start)
+        await message.answer(f"<pre>{html.escape(table)}</pre>", parse_mode="HTML")
 
-# ---- main ----
-async def main():
-    cfg = load_config()
-    bot = Bot(
+    # ---- abonnements par utilisateur ----
+    async def _sub_reply(message: Message, uid: int, note: str = "") -> None:
+        await message.answer(f"{note}🔔 Abonnement:\n{SUBSCRIPTIONS.describe(uid)}")
+
+    @dp.message(Command("subs"))
+    async def cmd_subs(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        await _sub_reply(message, message.from_user.id)
+
+    @dp.message(Command("watch"))
+    async def cmd_watch(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        if len(parts) < 2:
+            await message.answer("Usage: /watch SYMBOL [SYMBOL...] | WATCHLIST")
+            return
+        symbols = short_agent.parse_symbols(parts[1:], cfg.short_watchlists)
+        SUBSCRIPTIONS.watch(message.from_user.id, symbols)
+        await _sub_reply(message, message.from_user.id)
+
+    @dp.message(Command("unwatch"))
+    async def cmd_unwatch(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        if len(parts) < 2:
+            await message.answer("Usage: /unwatch SYMBOL [SYMBOL...] | all")
+            return
+        if parts[1].lower() == "all":
+            SUBSCRIPTIONS.unwatch(message.from_user.id)
+        else:
+            SUBSCRIPTIONS.unwatch(message.from_user.id, short_agent.parse_symbols(parts[1:], cfg.short_watchlists))
+        await _sub_reply(message, message.from_user.id)
+
+    @dp.message(Command("threshold"))
+    async def cmd_threshold(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        try:
+            pct = None if parts[1].lower() == "off" else float(parts[1].rstrip("%"))
+        except (IndexError, ValueError):
+            await message.answer("Usage: /threshold PCT | off")
+            return
+        if pct is not None and pct <= 0:
+            await message.answer("Le seuil doit être positif.")
+            return
+        sub = SUBSCRIPTIONS.set_threshold(message.from_user.id, pct)
+        note = ""
+        if pct is not None and pct < cfg.threshold_percent and not sub.symbols:
+            note = "ℹ️ Seuil plus bas que le seuil global: appliqué uniquement aux symboles suivis (/watch).\n"
+        await _sub_reply(message, message.from_user.id, note)
+
+    @dp.message(Command("direction"))
+    async def cmd_direction(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        if len(parts) < 2 or parts[1].lower() not in DIRECTIONS:
+            await message.answer(f"Usage: /direction {' | '.join(DIRECTIONS)}")
+            return
+        SUBSCRIPTIONS.set_direction(message.from_user.id, parts[1].lower())
+        await _sub_reply(message, message.from_user.id)
+
+    @dp.message(Command("minscore"))
+    async def cmd_minscore(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        try:
+            score = None if parts[1].lower() == "off" else float(parts[1])
+        except (IndexError, ValueError):
+            await message.answer("Usage: /minscore 0..1 | off")
+            return
+        if score is not None and not 0.0 <= score <= 1.0:
+            await message.answer("Le score minimal doit être entre 0 et 1.")
+            return
+        SUBSCRIPTIONS.set_min_score(message.from_user.id, score)
+        await _sub_reply(message, message.from_user.id)
+
+    @dp.message(Command("history"))
+    async def cmd_history(message: Message):
+        if not is_authorized(message.from_user.id, cfg):
+            await message.answer("🚫 Accès refusé.")
+            return
+        parts = message.text.split()
+        try:
+            symbol = parts[1].upper()
+            label = parts[2].lower() if len(parts) > 2 else "1h"
+            span = parse_range(label)
+        except (IndexError, ValueError):
+            await message.answer("Usage: /history SYMBOL [30m|2h|1d]")
+            return
+        if not TICKS.enabled:
+            await message.answer("Historique désactivé (TICKSTORE_PATH).")
+            return
+        end = time.time()
+        exchanges = TICKS.exchanges_for(symbol)
+        if not exchanges:
+            await message.answer(f"Aucun historique pour {symbol}.")
+            return
+        # lecture mmap hors de la boucle du bot
+        texts = []
+        for exchange in exchanges:
+            candles = await asyncio.to_thread(TICKS.candles, exchange, symbol, end - span, end)
+            texts.append(format_history(exchange, symbol, label, candles))
+        await message.answer(f"<pre>{html.escape(chr(10).join(texts))}</pre>", parse_mode="HTML")
+
+# ---- Warm-up ----
+def _import_telegram() -> None:
+    """Import d'aiogram (lourd: pydantic), lancé dans un thread."""
+    import aiogram  # noqa: F401
+    import aiogram.client.default  # noqa: F401
+    import aiogram.enums  # noqa: F401
+    import aiogram.filters  # noqa: F401
+
+
+async def _timed(name: str, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        startup.record(name, time.perf_counter() - start)
+
+
+async def warm_up(cfg: Config, http: httpx.AsyncClient) -> list[str]:
+    """Instruments, snapshot marché et abonnements liquidations en parallèle.
+
+    Retourne la liste des perps USDT. Les abonnements liquidations continuent
+    en tâche de fond pour ne pas retarder l'ouverture des feeds.
+    """
+    async def instruments() -> list[str]:
+        try:
+            return await bybit_api.fetch_usdt_perp_symbols(http)
+        except Exception as e:
+            logging.warning("instruments fetch failed: %s", e)
+            return []
+
+    async def snapshot() -> dict:
+        try:
+            tickers = await bybit_api.fetch_linear_tickers(http)
+        except Exception as e:
+            logging.warning("market snapshot failed: %s", e)
+            return {}
+        now = time.time()
+        for sym, row in tickers.items():
+            try:
+                price = float(row.get("lastPrice"))
+            except (TypeError, ValueError):
+                continue
+            price_data.seed("Bybit", sym, now, price)
+        return tickers
+
+    snap_task = asyncio.create_task(_timed("snapshot", snapshot()))
+
+    async def liquidations() -> None:
+        try:
+            await asyncio.to_thread(bybit_api.start_liquidation_ws)
+            tickers = await snap_task
+            await asyncio.to_thread(bybit_api.warm_subscribe_liquidations, list(tickers))
+        except Exception as e:
+            logging.warning("liquidation warm-up failed: %s", e)
+
+    if cfg.warm_liquidations:
+        task = asyncio.create_task(_timed("liquidations", liquidations()))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+    symbols, tickers = await asyncio.gather(_timed("instruments", instruments()), snap_task)
+    return symbols or list(tickers)
+
+
+# ---- Housekeeping (timer wheel) ----
+def arm_cooldown(symbol: str, ts: float, cooldown_sec: float) -> None:
+    """Cooldown écoulé = entrée retirée de last_alert_time."""
+    alerts = last_alert_time
+    WHEEL.schedule_at(ts + cooldown_sec, partial(alerts.pop, symbol, None), key=("cooldown", symbol))
+
+
+def watch_idle(symbol: str) -> None:
+    """Nouveau symbole: vérification d'inactivité à l'horizon de la plus longue fenêtre."""
+    WHEEL.schedule(price_data.max_window, partial(_evict_if_idle, symbol), key=("idle", symbol))
+
+
+def _evict_if_idle(symbol: str) -> None:
+    last = price_data.last_seen(symbol)
+    idle_after = price_data.max_window
+    if last is not None and time.time() - last < idle_after:
+        # tick reçu entre-temps: nouvelle échéance, aucun coût par tick
+        WHEEL.schedule_at(last + idle_after, partial(_evict_if_idle, symbol), key=("idle", symbol))
+        return
+    _drop_symbol(symbol)
+    logging.debug("%s evicted (idle > %ds)", symbol, idle_after)
+
+
+def arm_housekeeping(cfg: Config) -> None:
+    """Échéances des états restaurés (cooldowns, liquidations); les fenêtres passent par watch_idle."""
+    for symbol, ts in list(last_alert_time.items()):
+        arm_cooldown(symbol, ts, cfg.cooldown_sec)
+    bybit_api._liq_cache.arm()
+    MEMORY.budget = cfg.memory_budget_mb * 1024 * 1024
+    memory_check()
+    memory_log()
+
+
+# ---- Memory accounting ----
+MEMORY_CHECK_SEC = 10.0
+MEMORY_LOG_SEC = 300.0
+
+
+def _drop_symbol(symbol: str) -> None:
+    price_data.evict(symbol)
+    for pipe in pipelines.values():
+        pipe.forget(symbol)
+    for adapter in adapters.values():
+        adapter.forget(symbol)
+    WHEEL.cancel(("idle", symbol))
+
+
+def _evict_windows(nbytes: int) -> int:
+    """Symboles les moins actifs d'abord."""
+    ranked = sorted(price_data.symbols, key=lambda s: price_data.last_seen(s) or 0.0)
+    return evict_by_rank(ranked, price_data.nbytes, _drop_symbol, nbytes)
+
+
+def _evict_candles(nbytes: int) -> int:
+    ranked = sorted(CANDLES.series, key=CANDLES.last_update)
+    return evict_by_rank(ranked, CANDLES.nbytes, CANDLES.evict, nbytes)
+
+
+def _history_entries() -> int:
+    return sum(len(dq) for h in (state.OI_HISTORY, state.FUNDING_HISTORY) for dq in h.values())
+
+
+def register_memory() -> None:
+    """Structures suivies; priorité croissante = réduite en premier sous contrainte de budget."""
+    liq = bybit_api._liq_cache
+    for s in (
+        Structure("candles", lambda: len(CANDLES.series), CANDLES.nbytes, _evict_candles, "least-active", 10),
+        Structure("windows", lambda: len(price_data.symbols), price_data.nbytes, _evict_windows, "least-active", 20),
+        Structure("liquidations", liq.entries, liq.nbytes, liq.evict_oldest, "oldest", 30),
+        # comptées seulement: bornées par ailleurs (TTL, inactivité) ou nécessaires au flux;
+        # un cooldown évincé renverrait une alerte en double
+        Structure(
+            "cooldowns", lambda: len(last_alert_time), lambda: len(last_alert_time) * (DICT_SLOT + SYMBOL + FLOAT),
+        ),
+        Structure("liq_subscribed", lambda: len(bybit_api._subscribed), lambda: len(bybit_api._subscribed) * (SYMBOL + 40)),
+        Structure(
+            "tickers", lambda: len(TICKERS.tickers),
+            lambda: sum(flat_dict_bytes(t) for t in list(TICKERS.tickers.values())),
+        ),
+        Structure("oi_funding_hist", _history_entries, lambda: _history_entries() * (TUPLE2 + 2 * FLOAT + 8)),
+        Structure("order_books", BOOKS.levels, BOOKS.nbytes),
+        Structure("trade_flow", lambda: len(FLOWS.flows), FLOWS.nbytes),
+        Structure("regime", lambda: sum(len(e) for e in regimes.values()),
+                  lambda: sum(e.nbytes() for e in regimes.values())),
+        Structure("timers", lambda: len(WHEEL), lambda: len(WHEEL) * 200),
+        Structure("subscriptions", lambda: len(SUBSCRIPTIONS.users), SUBSCRIPTIONS.nbytes),
+        Structure("tick_store", lambda: len(TICKS.series), TICKS.nbytes),
+        Structure("event_queue", EVENTS.queue.qsize, EVENTS.nbytes),
+        Structure("enrich_cache", lambda: sum(len(s.cache) for s in evaluator.sources.sources.values()),
+                  evaluator.sources.nbytes),
+    ):
+        MEMORY.register(s)
+
+
+def memory_check() -> None:
+    """Application du budget, ré-armée via la roue."""
+    MEMORY.enforce()
+    WHEEL.schedule(MEMORY_CHECK_SEC, memory_check, key=("memory", "check"))
+
+
+def memory_log() -> None:
+    logging.info("memory: %s", json.dumps(MEMORY.metrics()))
+    WHEEL.schedule(MEMORY_LOG_SEC, memory_log, key=("memory", "log"))
+
+
+register_memory()
+
+
+async def housekeeping_loop() -> None:
+    while True:
+        await asyncio.sleep(WHEEL.tick_sec)
+        WHEEL.advance()
+
+
+# ---- Snapshot / warm restart ----
+def save_snapshot(cfg: Config) -> None:
+    try:
+        size = snapshot.save(cfg.snapshot_path, price_data, last_alert_time, bybit_api._liq_cache)
+        logging.debug("snapshot saved (%d bytes)", size)
+    except Exception as e:
+        logging.warning("snapshot save failed: %s", e)
+
+
+async def snapshot_loop(cfg: Config) -> None:
+    while True:
+        await asyncio.sleep(cfg.snapshot_interval_sec)
+        # sérialisation rapide; l'écriture disque part dans un thread
+        data = snapshot.dumps(price_data, last_alert_time, bybit_api._liq_cache)
+        try:
+            await asyncio.to_thread(snapshot.write, cfg.snapshot_path, data)
+        except Exception as e:
+            logging.warning("snapshot save failed: %s", e)
+
+
+# ---- Enrichissement REST ----
+def configure_enrichment(cfg: Config) -> None:
+    evaluator.sources.configure(
+        cfg.enrich_hedge_pct, cfg.enrich_stale_after_sec,
+        cfg.enrich_breaker_failures, cfg.enrich_breaker_reset_sec,
+    )
+
+
+# ---- Journal d'événements ----
+_log_listener = None
+
+
+def configure_events(cfg: Config) -> None:
+    """Logs et journal JSONL écrits par des threads: plus d'I/O disque sur les boucles."""
+    global _log_listener
+    if _log_listener is None:
+        _log_listener = install_queue_logging()
+    EVENTS.configure(
+        cfg.event_log_path, cfg.event_log_sample, cfg.event_log_limits,
+        cfg.event_log_max_mb * 1024 * 1024, cfg.event_log_backups,
+    )
+    EVENTS.start()
+
+
+def shutdown_events() -> None:
+    global _log_listener
+    EVENTS.close()
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+# ---- Historique des ticks ----
+def configure_tickstore(cfg: Config) -> None:
+    TICKS.configure(cfg.tickstore_path, cfg.tickstore_tick_days, cfg.tickstore_retention_days)
+
+
+async def tickstore_loop(cfg: Config) -> None:
+    """Écritures disque groupées (thread) et rétention / compaction horaire."""
+    next_maintain = 0.0
+    try:
+        while True:
+            await asyncio.sleep(cfg.tickstore_flush_sec)
+            await asyncio.to_thread(TICKS.flush)
+            if time.time() >= next_maintain:
+                next_maintain = time.time() + TICKSTORE_MAINTAIN_SEC
+                await asyncio.to_thread(TICKS.maintain)
+    finally:
+        TICKS.close()
+
+
+# ---- Market loop ----
+async def feed_watchdog_loop() -> None:
+    """Boucle du flux marché: ferme les connexions WS muettes (reconnexion par le moniteur)."""
+    while True:
+        await asyncio.sleep(FEED_CHECK_SEC)
+        WATCHDOG.enforce()
+
+
+async def feed_alert_loop(cfg: Config, bot: Bot) -> None:
+    """Alerte les opérateurs sur une coupure de flux prolongée, puis au retour."""
+    if cfg.feed_gap_alert_sec <= 0:
+        return
+    while True:
+        await asyncio.sleep(FEED_ALERT_CHECK_SEC)
+        for text in WATCHDOG.alerts(gap_sec=cfg.feed_gap_alert_sec):
+            logging.warning("feed alert: %s", text)
+            for uid in cfg.authorized_users:
+                await notifier.send_text(bot, uid, text)
+
+
+def market_tasks(
+    cfg: Config,
+    bot: Bot | None,
+    http: httpx.AsyncClient,
+    symbols: list[str],
+    emit: Emit | None = None,
+) -> tuple[list, list[str]]:
+    """Tâches du flux marché (WS, régime, roue de timers, snapshots) et flux attendus."""
+    tasks = [loop_health.run(), housekeeping_loop(), feed_watchdog_loop()]
+    feeds = []
+    if cfg.use_binance_ws:
+        tasks.append(price_monitor_binance(cfg, bot, http, perps=symbols or None, emit=emit))
+        feeds.append("binance")
+    if cfg.use_bybit_ws:
+        tasks.append(price_monitor_bybit(cfg, bot, http, symbols=symbols or None, emit=emit))
+        feeds.append("bybit")
+    if cfg.use_bybit_spot_ws:
+        tasks.append(price_monitor_bybit_spot(cfg, bot, http, perps=symbols or None, emit=emit))
+        feeds.append("bybit_spot")
+    if cfg.snapshot_path and cfg.snapshot_interval_sec > 0:
+        tasks.append(snapshot_loop(cfg))
+    if cfg.regime_filter != "off":
+        tasks.append(regime_loop())
+    if TICKS.enabled:
+        tasks.append(tickstore_loop(cfg))
+    return tasks, feeds
+
+
+# ---- Abonnements ----
+def configure_subscriptions(cfg: Config) -> None:
+    """Charge les abonnements et resserre la détection des symboles suivis."""
+    SUBSCRIPTIONS.on_scale = price_data.set_scale
+    SUBSCRIPTIONS.configure(cfg.threshold_percent, cfg.authorized_users, cfg.subscriptions_path)
+    SUBSCRIPTIONS.apply_scales()
+
+
+async def subscriptions_loop() -> None:
+    """Workers shardés: relit le fichier d'abonnements modifié par le coordinateur."""
+    while True:
+        await asyncio.sleep(SUBSCRIPTIONS_RELOAD_SEC)
+        if SUBSCRIPTIONS.reload_if_changed():
+            logging.info("subscriptions reloaded: %s", SUBSCRIPTIONS.summary())
+
+
+# ---- Telegram: polling ou webhook ----
+def make_bot(cfg: Config) -> Bot:
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+
+    session = None
+    if cfg.telegram_api_url:
+        # serveur Bot API local ou factice (tests d'intégration)
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+        session = AiohttpSession(api=TelegramAPIServer.from_base(cfg.telegram_api_url))
+    return Bot(
         cfg.telegram_bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    dp = Dispatcher()
-    register_commands(dp, cfg)
+
+
+async def serve_bot(cfg: Config, bot: Bot, dp: Dispatcher) -> None:
+    """Réception des mises à jour: long polling (défaut) ou webhook embarqué."""
+    if cfg.telegram_mode != "webhook":
+        await dp.start_polling(bot)
+        return
+    if not cfg.webhook_url:
+        raise ValueError("TELEGRAM_MODE=webhook requires WEBHOOK_URL")
+    secret = cfg.webhook_secret or secrets.token_urlsafe(32)
+    server = WebhookServer(
+        partial(dp.feed_raw_update, bot), secret,
+        path=cfg.webhook_path, workers=cfg.webhook_workers, queue_size=cfg.webhook_queue_size,
+    )
+    await server.start(cfg.webhook_host, cfg.webhook_port)
+    status_extras.append(lambda: f"• webhook: {server.summary()}\n")
+    try:
+        await bot.set_webhook(
+            cfg.webhook_url, secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types(), drop_pending_updates=False,
+        )
+        logging.info("telegram webhook set to %s", cfg.webhook_url)
+        await asyncio.Event().wait()
+    finally:
+        try:
+            # sans quoi un redémarrage en polling serait refusé par Telegram
+            await bot.delete_webhook()
+        except Exception as e:
+            logging.warning("delete_webhook failed: %s", e)
+        await server.close()
+        await bot.session.close()
+
+
+# ---- main ----
+async def main():
+    with startup.phase("config"):
+        cfg = load_config()
+        price_data.configure(cfg.detection_timeframes())
+        price_data.on_new_symbol = watch_idle
+        configure_books(cfg)
+        configure_subscriptions(cfg)
+        configure_tickstore(cfg)
+        configure_events(cfg)
+        configure_enrichment(cfg)
+
+    if cfg.snapshot_path:
+        with startup.phase("restore"):
+            restored = snapshot.load(
+                cfg.snapshot_path, price_data, last_alert_time, bybit_api._liq_cache,
+                price_data.max_window, cfg.cooldown_sec,
+            )
+        if restored:
+            logging.info("♻️ state restored: %s", restored)
+            SUBSCRIPTIONS.seed_cooldowns(last_alert_time, cfg.cooldown_sec)
+    arm_housekeeping(cfg)
 
     timeout = httpx.Timeout(10.0)
     async with httpx.AsyncClient(timeout=timeout) as http:
-        tasks = [dp.start_polling(bot)]
-        if cfg.use_binance_ws:
-            tasks.append(price_monitor_binance(cfg, bot, http))
-        if cfg.use_bybit_ws:
-            tasks.append(price_monitor_bybit(cfg, bot, http))
-        await asyncio.gather(*tasks)
+        with startup.phase("warm_up"):
+            symbols, _ = await asyncio.gather(
+                warm_up(cfg, http),
+                _timed("telegram_import", asyncio.to_thread(_import_telegram)),
+            )
+
+        from aiogram import Dispatcher
+
+        bot = make_bot(cfg)
+        dp = Dispatcher()
+        register_commands(dp, cfg)
+
+        tasks, feeds = market_tasks(cfg, bot, http, symbols)
+        tasks += [serve_bot(cfg, bot, dp), feed_alert_loop(cfg, bot)]
+        startup.expect_feeds(feeds)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if cfg.snapshot_path:
+                save_snapshot(cfg)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_events()
@@ -1,21 +1,47 @@
 from __future__ import annotations
+import asyncio
 import time
 import threading
 from collections import defaultdict, deque
+from functools import partial
 from typing import List, Tuple, Deque, Dict, Set, Any
 
 import httpx
 
+from ticker_state import TICKERS
+from timerwheel import WHEEL
+
 BASE = "https://api.bybit.com"
 
 
+class BybitError(RuntimeError):
+    """Réponse Bybit en échec: ``retCode`` non nul (HTTP 200) ou liste vide."""
+
+
+def _result_list(data: Dict[str, Any], what: str) -> List[Any]:
+    """``result.list`` d'une réponse v5; lève ``BybitError`` si ``retCode`` != 0."""
+    code = data.get("retCode", 0)
+    if str(code) != "0":
+        raise BybitError(f"{what}: retCode {code} ({data.get('retMsg', '')})")
+    return (data.get("result") or {}).get("list") or []
+
+
 # ===== Liste des symboles USDT perp =====
 async def fetch_usdt_perp_symbols(client: httpx.AsyncClient) -> List[str]:
     """Retourne la liste des symboles USDT perp (Bybit v5)."""
+    return await _fetch_usdt_symbols(client, "linear")
+
+
+async def fetch_usdt_spot_symbols(client: httpx.AsyncClient) -> List[str]:
+    """Retourne la liste des paires spot en USDT (Bybit v5)."""
+    return await _fetch_usdt_symbols(client, "spot")
+
+
+async def _fetch_usdt_symbols(client: httpx.AsyncClient, category: str) -> List[str]:
     symbols: List[str] = []
     cursor: str | None = None
     while True:
-        params = {"category": "linear"}
+        params = {"category": category}
         if cursor:
             params["cursor"] = cursor
         r = await client.get(f"{BASE}/v5/market/instruments-info", params=params)
@@ -23,7 +49,7 @@ async def fetch_usdt_perp_symbols(client: httpx.AsyncClient) -> List[str]:
         data = r.json() or {}
         result = data.get("result") or {}
         items = result.get("list") or []
-        # garde uniquement les perp en USDT (ex: BTCUSDT, ETHUSDT…)
+        # garde uniquement les paires en USDT (ex: BTCUSDT, ETHUSDT…)
         symbols += [str(it.get("symbol", "")) for it in items if str(it.get("symbol", "")).endswith("USDT")]
         cursor = result.get("nextPageCursor")
         if not cursor:
@@ -38,12 +64,38 @@ async def fetch_usdt_perp_symbols(client: httpx.AsyncClient) -> List[str]:
     return uniq
 
 
+# ===== Snapshot marché (tous les tickers linear en un appel) =====
+async def fetch_linear_tickers(client: httpx.AsyncClient) -> Dict[str, Dict[str, Any]]:
+    """Retourne {symbol: ticker} pour tous les perps linear via /v5/market/tickers.
+
+    Un seul appel REST: sert à amorcer les fenêtres de prix et l'état des
+    tickers (funding, OI) au démarrage.
+    """
+    r = await client.get(f"{BASE}/v5/market/tickers", params={"category": "linear"})
+    r.raise_for_status()
+    data = r.json() or {}
+    rows = (data.get("result") or {}).get("list") or []
+    out: Dict[str, Dict[str, Any]] = {}
+    now = time.time()
+    for row in rows:
+        sym = str(row.get("symbol") or "")
+        if not sym.endswith("USDT"):
+            continue
+        out[sym] = row
+        TICKERS.apply("snapshot", sym, row, now)
+    return out
+
+
 # ===== Open Interest: variation ≈1h =====
 async def get_oi_1h_change(client: httpx.AsyncClient, symbol: str) -> Tuple[float, float, float]:
     """
     Retourne (oi_1h_ago, oi_last, delta_pct) à partir de /v5/market/open-interest
     période 5min, limit=13 (~65min) pour couvrir ≈1h.
+    Répond localement (flux tickers) quand l'historique couvre déjà ~1h.
     """
+    local = TICKERS.oi_change(symbol)
+    if local is not None:
+        return local
     params = {
         "category": "linear",
         "symbol": symbol,
@@ -52,10 +104,10 @@ async def get_oi_1h_change(client: httpx.AsyncClient, symbol: str) -> Tuple[floa
     }
     r = await client.get(f"{BASE}/v5/market/open-interest", params=params)
     r.raise_for_status()
-    data = r.json() or {}
-    rows = (data.get("result") or {}).get("list") or []
+    rows = _result_list(r.json() or {}, f"open-interest {symbol}")
     if not rows:
-        return 0.0, 0.0, 0.0
+        # pas de zéros silencieux: l'appelant sert la dernière valeur connue
+        raise BybitError(f"open-interest {symbol}: empty list")
 
     def _ts(row: dict) -> int:
         return int(row.get("timestamp") or row.get("ts") or row.get("startTime") or 0)
@@ -67,12 +119,9 @@ async def get_oi_1h_change(client: httpx.AsyncClient, symbol: str) -> Tuple[floa
 
     try:
         oi_last = float(rows[-1]["openInterest"])
-    except Exception:
-        oi_last = 0.0
-    try:
         oi_1h = float(rows[0]["openInterest"])
-    except Exception:
-        oi_1h = 0.0
+    except (KeyError, TypeError, ValueError) as e:
+        raise BybitError(f"open-interest {symbol}: bad row ({e})") from e
 
     delta_pct = ((oi_last - oi_1h) / oi_1h * 100.0) if oi_1h else 0.0
     return oi_1h, oi_last, delta_pct
@@ -154,11 +203,55 @@ class _LiqCache:
         now_ms = int(time.time() * 1000)
         cutoff = now_ms - self.window_sec * 1000
         dq = self.by_symbol[symbol]
+        if not dq:
+            # TTL: le symbole est libéré quand sa dernière liquidation sort de la fenêtre
+            WHEEL.schedule_at(ts_ms / 1000.0 + self.window_sec, partial(self._expire, symbol), key=("liq", symbol))
         dq.append((ts_ms, side, qty))
         # prune
         while dq and dq[0][0] < cutoff:
             dq.popleft()
 
+    def entries(self) -> int:
+        with self.lock:
+            return sum(len(dq) for dq in self.by_symbol.values())
+
+    def nbytes(self) -> int:
+        # deque + entrée de dict par symbole, tuple (ts, side, qty) par liquidation
+        with self.lock:
+            return sum(700 + len(dq) * 120 for dq in self.by_symbol.values())
+
+    def evict_oldest(self, nbytes: int) -> int:
+        """Retire les symboles dont la dernière liquidation est la plus ancienne."""
+        with self.lock:
+            ranked = sorted(self.by_symbol, key=lambda s: self.by_symbol[s][-1][0] if self.by_symbol[s] else 0)
+            freed = 0
+            for sym in ranked:
+                if freed >= nbytes:
+                    break
+                freed += 700 + len(self.by_symbol.pop(sym)) * 120
+        return freed
+
+    def arm(self) -> None:
+        """Pose les TTL de tous les symboles (après restauration d'un snapshot)."""
+        with self.lock:
+            oldest = {sym: dq[0][0] for sym, dq in self.by_symbol.items() if dq}
+        for sym, ts_ms in oldest.items():
+            WHEEL.schedule_at(ts_ms / 1000.0 + self.window_sec, partial(self._expire, sym), key=("liq", sym))
+
+    def _expire(self, symbol: str) -> None:
+        with self.lock:
+            dq = self.by_symbol.get(symbol)
+            if dq is None:
+                return
+            cutoff = int(time.time() * 1000) - self.window_sec * 1000
+            while dq and dq[0][0] < cutoff:
+                dq.popleft()
+            if not dq:
+                del self.by_symbol[symbol]
+                return
+            oldest = dq[0][0]
+        WHEEL.schedule_at(oldest / 1000.0 + self.window_sec, partial(self._expire, symbol), key=("liq", symbol))
+
     def stats_last_hour(self, symbol: str) -> Tuple[float, float]:
         """Retourne (longs_liquidés_qty, shorts_liquidés_qty) sur ~1h."""
         now_ms = int(time.time() * 1000)
@@ -192,7 +285,11 @@ def set_bybit_testnet(flag: bool) -> None:
 
 
 def _ensure_ws_started() -> None:
-    """Démarre le WebSocket (pybit) une seule fois."""
+    """Démarre le WebSocket (pybit) une seule fois.
+
+    pybit est importé ici, au premier usage: l'import et la connexion sont
+    bloquants, à appeler hors de la boucle asyncio (cf. start_liquidation_ws).
+    """
     global _ws
     if _ws is not None:
         return
@@ -250,43 +347,67 @@ def _subscribe_symbol(symbol: str) -> None:
         _subscribed.add(symbol)
 
 
+def start_liquidation_ws() -> None:
+    """Import de pybit + connexion WS, bloquant (à lancer via asyncio.to_thread)."""
+    _ensure_ws_started()
+
+
 # ===== Liquidations ≈1h (WebSocket) =====
 async def get_liquidation_stats(client: httpx.AsyncClient, symbol: str) -> Tuple[float, float]:
     """
     Retourne (longs_liquidés_qty, shorts_liquidés_qty) agrégés sur ~1h via WebSocket.
     Note: au premier appel pour un symbole, l'historique avant abonnement n'existe pas.
     """
-    _subscribe_symbol(symbol)
+    if symbol not in _subscribed:
+        # abonnement (et éventuel démarrage pybit) hors de la boucle asyncio
+        await asyncio.to_thread(_subscribe_symbol, symbol)
+    with _liq_cache.lock:
+        return _liq_cache.stats_last_hour(symbol)
+
+
+def cached_liquidation_stats(symbol: str) -> Tuple[float, float] | None:
+    """Stats locales si le symbole est déjà abonné (aucun I/O), sinon None."""
+    if symbol not in _subscribed:
+        return None
     with _liq_cache.lock:
         return _liq_cache.stats_last_hour(symbol)
 
 
 # (Facultatif) pré-abonnement de masse pour “chauffer” le cache
-def warm_subscribe_liquidations(symbols: List[str]) -> None:
-    """Permet d'amorcer les abonnements tôt au démarrage de l'app."""
+def warm_subscribe_liquidations(symbols: List[str], chunk_size: int = 50) -> None:
+    """Permet d'amorcer les abonnements tôt au démarrage de l'app (bloquant)."""
     if not symbols:
         return
-    for s in symbols:
-        _subscribe_symbol(s)
+    _ensure_ws_started()
+    todo = [s for s in dict.fromkeys(symbols) if s and s not in _subscribed]
+    for i in range(0, len(todo), chunk_size):
+        chunk = todo[i:i + chunk_size]
+        with _ws_lock:
+            # pybit accepte une liste de symboles: un seul message par chunk
+            _ws.liquidation_stream(chunk, _ws_handler)
+            _subscribed.update(chunk)
 
 
 # ===== Funding rate (actuel) =====
 async def get_current_funding_rate(client: httpx.AsyncClient, symbol: str) -> float:
     """
     Lit le funding rate actuel pour un perpetual 'symbol' (Bybit v5).
-    Source: /v5/market/tickers (category=linear, symbol=...)
+    Source: état local du flux tickers s'il est vivant, sinon
+    /v5/market/tickers (category=linear, symbol=...)
     """
+    local = TICKERS.funding(symbol)
+    if local is not None:
+        return local
     params = {"category": "linear", "symbol": symbol}
     r = await client.get(f"{BASE}/v5/market/tickers", params=params)
     r.raise_for_status()
-    data = r.json() or {}
-    rows = (data.get("result") or {}).get("list") or []
+    rows = _result_list(r.json() or {}, f"tickers {symbol}")
     if not rows:
-        return 0.0
+        raise BybitError(f"tickers {symbol}: empty list")
     try:
-        return float(rows[0].get("fundingRate", 0.0))
-    except Exception:
-        return 0.0
+        return float(rows[0]["fundingRate"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise BybitError(f"tickers {symbol}: no funding rate ({e})") from e
 
 
 # ===== Position dans l'historique (all-time) =====
@@ -324,10 +445,9 @@ async def get_alltime_range(
         }
         r = await client.get(f"{BASE}/v5/market/kline", params=params)
         r.raise_for_status()
-        data = r.json() or {}
-        rows = (data.get("result") or {}).get("list") or []
+        rows = _result_list(r.json() or {}, f"kline {symbol}")
         if not rows:
-            break
+            break  # début de l'historique
 
         # Format: [start, open, high, low, close, volume, turnover]
         try:
@@ -356,7 +476,7 @@ async def get_alltime_range(
         scanned_days += window_days
 
     if all_min == float("inf"):
-        all_min = 0.0
+        raise BybitError(f"kline {symbol}: no daily candles")
     return all_min, all_max, last_close, ts_min, ts_max
 
 
@@ -0,0 +1,261 @@
+"""Tick-to-candle aggregator: local multi-resolution OHLCV.
+
+Chaque série est un buffer circulaire de taille fixe (``array('d')``).
+Les bougies sont construites à partir du topic Bybit ``kline.1`` (tous les
+perps linéaires): OHLC, volume et turnover cumulés de la minute, horodatés
+par l'exchange (``start``), donc une seule horloge pour toutes les
+résolutions. Chaque message remplace la bougie 1 min de même début; les
+résolutions supérieures reçoivent la différence de volume/turnover.
+
+``volume_change`` sert la variation de volume / notionnel des alertes
+(même forme que ``bybit_api.get_volume_1h_change``); ``None`` tant que
+l'historique local ne couvre pas l'heure demandée (warm-up, reconnexion):
+l'appelant repasse alors par les klines REST.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# résolution (s) -> nombre de bougies conservées
+DEFAULT_RESOLUTIONS: Dict[int, int] = {60: 120, 300: 48, 3600: 48}
+KLINE_SEC = 60          # résolution du topic ``kline.1``
+VOLUME_RES = 300        # bougies comparées par volume_change (comme les klines REST 5 min)
+VOLUME_LOOKBACK = 3600
+
+_TS, _O, _H, _L, _C, _V, _T = range(7)
+_FIELDS = 7
+
+
+class Candle(NamedTuple):
+    ts: float
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    turnover: float
+
+
+class CandleSeries:
+    """Buffer circulaire de bougies d'une résolution donnée."""
+
+    def __init__(self, res_sec: int, slots: int) -> None:
+        self.res = res_sec
+        self.slots = slots
+        self.data = array("d", [0.0]) * (slots * _FIELDS)
+        self.head = -1       # slot de la bougie courante
+        self.count = 0
+        self.first_ts: Optional[float] = None
+
+    def _bucket(self, ts: float) -> float:
+        return float(int(ts // self.res) * self.res)
+
+    def _locate(self, bucket: float) -> int:
+        """Offset de la bougie *bucket* dans le buffer (-1 si absente)."""
+        d = self.data
+        for i in range(self.count):
+            base = ((self.head - i) % self.slots) * _FIELDS
+            ts = d[base + _TS]
+            if ts == bucket:
+                return base
+            if ts < bucket:
+                break
+        return -1
+
+    def _append(self, bucket: float, o: float, h: float, l: float, c: float, v: float, t: float) -> None:
+        self.head = (self.head + 1) % self.slots
+        self.count = min(self.count + 1, self.slots)
+        base = self.head * _FIELDS
+        self.data[base:base + _FIELDS] = array("d", (bucket, o, h, l, c, v, t))
+
+    def _is_new(self, bucket: float) -> bool:
+        return self.head < 0 or bucket > self.data[self.head * _FIELDS + _TS]
+
+    def merge(
+        self, ts: float, o: float, h: float, l: float, c: float, volume: float = 0.0, turnover: float = 0.0,
+        late: bool = False,
+    ) -> None:
+        """Ajoute une sous-bougie (ou un tick) à la bougie de *ts*.
+
+        Une sous-bougie en retard (*late*, ou d'une bougie déjà close) est
+        reportée dans sa bougie si elle est encore dans le buffer, sans toucher
+        à la clôture; elle est ignorée sinon.
+        """
+        if self.first_ts is None:
+            self.first_ts = ts
+        bucket = self._bucket(ts)
+        if self._is_new(bucket):
+            self._append(bucket, o, h, l, c, volume, turnover)
+            return
+        base = self._locate(bucket)
+        if base < 0:
+            return
+        d = self.data
+        if h > d[base + _H]:
+            d[base + _H] = h
+        if l < d[base + _L]:
+            d[base + _L] = l
+        if base == self.head * _FIELDS and not late:
+            d[base + _C] = c
+        d[base + _V] += volume
+        d[base + _T] += turnover
+
+    def update(self, ts: float, price: float, volume: float = 0.0, turnover: float = 0.0) -> None:
+        self.merge(ts, price, price, price, price, volume, turnover)
+
+    def put(
+        self, ts: float, o: float, h: float, l: float, c: float, volume: float, turnover: float,
+    ) -> Optional[Tuple[float, float]]:
+        """Remplace la bougie de *ts* par une bougie complète.
+
+        Renvoie l'ancien (volume, turnover) de cette bougie (0 si nouvelle), ou
+        None si elle est trop ancienne pour le buffer.
+        """
+        if self.first_ts is None:
+            self.first_ts = ts
+        bucket = self._bucket(ts)
+        if self._is_new(bucket):
+            self._append(bucket, o, h, l, c, volume, turnover)
+            return 0.0, 0.0
+        base = self._locate(bucket)
+        if base < 0:
+            return None
+        d = self.data
+        prev = d[base + _V], d[base + _T]
+        d[base:base + _FIELDS] = array("d", (bucket, o, h, l, c, volume, turnover))
+        return prev
+
+    def candles(self, start: float | None = None, end: float | None = None) -> List[Candle]:
+        """Bougies (ordre chronologique) dont le début est dans [start, end]."""
+        out: List[Candle] = []
+        d = self.data
+        for i in range(self.count):
+            slot = (self.head - self.count + 1 + i) % self.slots
+            base = slot * _FIELDS
+            ts = d[base + _TS]
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts > end:
+                break
+            out.append(Candle(*d[base:base + _FIELDS]))
+        return out
+
+    def get(self, bucket_ts: float) -> Optional[Candle]:
+        """Bougie commençant à *bucket_ts*, si encore dans le buffer."""
+        base = self._locate(bucket_ts)
+        return Candle(*self.data[base:base + _FIELDS]) if base >= 0 else None
+
+    def last(self) -> Optional[Candle]:
+        if self.head < 0:
+            return None
+        base = self.head * _FIELDS
+        return Candle(*self.data[base:base + _FIELDS])
+
+    def covers(self, bucket_ts: float) -> bool:
+        """True si la bougie *bucket_ts* a été observée depuis son début."""
+        return self.first_ts is not None and bucket_ts >= self._bucket(self.first_ts) + self.res
+
+    def resync(self) -> None:
+        """Flux interrompu: la couverture repart de la prochaine bougie reçue."""
+        self.first_ts = None
+
+
+class CandleAggregator:
+    """Bougies OHLCV multi-résolutions pour tous les symboles."""
+
+    def __init__(self, resolutions: Dict[int, int] | None = None) -> None:
+        self.resolutions = dict(resolutions or DEFAULT_RESOLUTIONS)
+        self.series: Dict[str, Dict[int, CandleSeries]] = {}
+
+    def _for(self, symbol: str) -> Dict[int, CandleSeries]:
+        by_res = self.series.get(symbol)
+        if by_res is None:
+            by_res = {res: CandleSeries(res, n) for res, n in self.resolutions.items()}
+            self.series[symbol] = by_res
+        return by_res
+
+    def nbytes(self, symbol: str | None = None) -> int:
+        """Taille approximative des séries d'un symbole (ou de toutes)."""
+        series = self.series if symbol is None else {symbol: self.series.get(symbol, {})}
+        return sum(
+            200 + sum(s.data.buffer_info()[1] * s.data.itemsize + 100 for s in by_res.values())
+            for by_res in series.values()
+        )
+
+    def last_update(self, symbol: str) -> float:
+        """Début de la bougie la plus récente (0 si aucune)."""
+        by_res = self.series.get(symbol)
+        if not by_res:
+            return 0.0
+        s = by_res[min(by_res)]
+        return s.data[s.head * _FIELDS + _TS] if s.head >= 0 else 0.0
+
+    def evict(self, symbol: str) -> None:
+        self.series.pop(symbol, None)
+
+    def resync(self) -> None:
+        """Reconnexion WS: les bougies en cours ont pu perdre des mises à jour."""
+        for by_res in self.series.values():
+            for s in by_res.values():
+                s.resync()
+
+    def on_kline(self, symbol: str, rows: Iterable[Dict[str, Any]]) -> None:
+        """Lot ``kline.1`` Bybit (``start`` en ms, valeurs cumulées de la minute)."""
+        by_res = self._for(symbol)
+        base = by_res.get(KLINE_SEC)
+        if base is None:
+            return
+        for r in rows:
+            try:
+                ts = int(r["start"]) / 1000.0
+                o, h, l, c = float(r["open"]), float(r["high"]), float(r["low"]), float(r["close"])
+                volume, turnover = float(r["volume"]), float(r["turnover"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            cur = base.last()
+            late = cur is not None and ts < cur.ts
+            prev = base.put(ts, o, h, l, c, volume, turnover)
+            if prev is None:
+                continue
+            for s in by_res.values():
+                if s is not base:
+                    s.merge(ts, o, h, l, c, volume - prev[0], turnover - prev[1], late)
+
+    def volume_change(
+        self,
+        symbol: str,
+        now: float,
+        res: int = VOLUME_RES,
+        lookback: int = VOLUME_LOOKBACK,
+    ) -> Optional[Tuple[float, float, float, float, float, float]]:
+        """(vol_1h_ago, vol_last, vol_delta_pct, notional_1h_ago, notional_last, notional_delta_pct).
+
+        Bougie *res* courante contre celle d'il y a *lookback*; None si
+        l'historique local ne la couvre pas ou si le flux est arrêté.
+        """
+        s = self.series.get(symbol, {}).get(res)
+        last = s.last() if s is not None else None
+        if last is None or now - last.ts > 2 * res:
+            return None
+        first_ts = last.ts - lookback
+        first = s.get(first_ts) if s.covers(first_ts) else None
+        if first is None:
+            return None
+        vol_pct = (last.volume - first.volume) / first.volume * 100.0 if first.volume else 0.0
+        not_pct = (last.turnover - first.turnover) / first.turnover * 100.0 if first.turnover else 0.0
+        return first.volume, last.volume, vol_pct, first.turnover, last.turnover, not_pct
+
+    def query(
+        self,
+        symbol: str,
+        res: int,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> List[Candle]:
+        """API de lecture (graphiques, backtests)."""
+        s = self.series.get(symbol, {}).get(res)
+        return s.candles(start, end) if s else []
+
+
+CANDLES = CandleAggregator()
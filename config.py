@@ -1,6 +1,8 @@
 from __future__ import annotations
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from mtf import Timeframe, parse_timeframes
 
 @dataclass
 class Config:
@@ -21,6 +23,88 @@ class Config:
     enable_coinglass_capture: bool
     chromedriver_path: str | None
     chrome_user_data: str | None
+    # Timeframes supplémentaires (en plus de time_window_sec/threshold_percent)
+    extra_timeframes: list[Timeframe] = field(default_factory=list)
+    # Binance fast path
+    binance_universe: str = "bybit"    # "bybit" | "watchlist" | "all"
+    binance_watchlist: set[str] = field(default_factory=set)
+    json_decoder: str = "json"         # "json" | "orjson" | "auto"
+    # Démarrage
+    warm_liquidations: bool = True     # abonnements liquidations dès le démarrage
+    # Warm restart ("" = désactivé)
+    snapshot_path: str = "state.snap"
+    snapshot_interval_sec: int = 60
+    # Mode multi-processus (sharded.py)
+    workers: int = 0
+    # Carnets orderbook.50 Bybit (symboles déclenchés + watchlist) et flux publicTrade
+    orderbook_watchlist: set[str] = field(default_factory=set)
+    orderbook_idle_sec: int = 900
+    # Filtre de régime: "off" | "suppress" | "downrank" (mouvements de marché)
+    regime_filter: str = "suppress"
+    regime_min_excess_pct: float = 4.0   # excès minimal sur le marché pour une alerte normale
+    # Budget mémoire global (Mo, 0 = comptage seul, sans éviction)
+    memory_budget_mb: int = 0
+    # Telegram: "polling" (défaut) ou "webhook" (serveur HTTP embarqué)
+    telegram_mode: str = "polling"
+    webhook_url: str = ""              # URL publique (https) passée à setWebhook
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_path: str = "/telegram"
+    webhook_secret: str = ""           # vide = secret aléatoire à chaque démarrage
+    webhook_workers: int = 4
+    webhook_queue_size: int = 100
+    telegram_api_url: str = ""         # serveur Bot API alternatif (local / tests)
+    # /short par lots: watchlists nommées, parallélisme et délai par symbole
+    short_watchlists: dict[str, list[str]] = field(default_factory=dict)
+    short_concurrency: int = 5
+    short_timeout_sec: float = 8.0
+    short_max_symbols: int = 50
+    # Abonnements par utilisateur (watchlist, seuil, direction, score min), persistés en JSON
+    subscriptions_path: str = "subscriptions.json"
+    # Alerte opérateurs après une coupure de flux prolongée (s, 0 = désactivée)
+    feed_gap_alert_sec: int = 120
+    # Flux Bybit spot (adaptateur exchanges.BybitSpotAdapter)
+    use_bybit_spot_ws: bool = False
+    # Historique des ticks / bougies 1m sur disque ("" = désactivé), rétention en jours
+    tickstore_path: str = ""
+    tickstore_tick_days: int = 2           # au-delà: ticks bruts compactés, bougies 1m gardées
+    tickstore_retention_days: int = 30     # au-delà: tout est supprimé
+    tickstore_flush_sec: float = 5.0
+    # Journal d'événements JSONL (thread dédié, "" = désactivé): échantillonnage et débit par type
+    event_log_path: str = ""
+    event_log_sample: dict[str, float] = field(default_factory=dict)
+    event_log_limits: dict[str, float] = field(default_factory=dict)
+    event_log_max_mb: int = 100          # rotation par taille (0 = jamais)
+    event_log_backups: int = 5           # fichiers tournés conservés
+    # Enrichissement REST: couverture au percentile de latence, secours en cache, disjoncteur par source
+    enrich_hedge_pct: float = 0.95        # 0 = pas de requêtes couvertes
+    enrich_stale_after_sec: float = 2.0   # au-delà, dernière valeur bonne servie (si disponible)
+    enrich_breaker_failures: int = 5
+    enrich_breaker_reset_sec: float = 30.0
+
+    def detection_timeframes(self) -> list[Timeframe]:
+        return [Timeframe(self.time_window_sec, self.threshold_percent), *self.extra_timeframes]
+
+def _symbols_env(name: str) -> set[str]:
+    return {s.upper() for s in os.getenv(name, "").replace(",", " ").split()}
+
+def parse_watchlists(spec: str) -> dict[str, list[str]]:
+    """"majors=BTCUSDT,ETHUSDT;memes=DOGEUSDT" -> {"majors": [...], "memes": [...]}."""
+    out: dict[str, list[str]] = {}
+    for part in spec.split(";"):
+        name, _, symbols = part.partition("=")
+        if name.strip() and symbols.strip():
+            out[name.strip().lower()] = [s.upper() for s in symbols.replace(",", " ").split()]
+    return out
+
+def parse_rates(spec: str) -> dict[str, float]:
+    """"trigger_merged=0.1,ws_error=2" -> {"trigger_merged": 0.1, "ws_error": 2.0}."""
+    out: dict[str, float] = {}
+    for part in spec.replace(";", ",").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            out[name.strip().lower()] = float(value)
+    return out
 
 def load_config() -> Config:
     token = os.getenv("TELEGRAM_BOT_TOKEN", "8261674604:AAGnKKs0RAkzC09ZuMRLbWTt99Hy9zWL2nY")
@@ -45,4 +129,46 @@ def load_config() -> Config:
         enable_coinglass_capture=os.getenv("ENABLE_COINGLASS_CAPTURE", "false").lower() == "true",
         chromedriver_path=os.getenv("CHROMEDRIVER_PATH"),
         chrome_user_data=os.getenv("CHROME_USER_DATA"),
+        extra_timeframes=parse_timeframes(os.getenv("TIMEFRAMES", "")),
+        binance_universe=os.getenv("BINANCE_UNIVERSE", "bybit").lower(),
+        binance_watchlist=_symbols_env("BINANCE_WATCHLIST"),
+        json_decoder=os.getenv("JSON_DECODER", "json").lower(),
+        warm_liquidations=os.getenv("WARM_LIQUIDATIONS", "true").lower() == "true",
+        snapshot_path=os.getenv("SNAPSHOT_PATH", "state.snap"),
+        snapshot_interval_sec=int(os.getenv("SNAPSHOT_INTERVAL_SEC", "60")),
+        workers=int(os.getenv("WORKERS", str(os.cpu_count() or 1))),
+        orderbook_watchlist=_symbols_env("ORDERBOOK_WATCHLIST"),
+        orderbook_idle_sec=int(os.getenv("ORDERBOOK_IDLE_SEC", "900")),
+        regime_filter=os.getenv("REGIME_FILTER", "suppress").lower(),
+        regime_min_excess_pct=float(os.getenv("REGIME_MIN_EXCESS_PCT", "4.0")),
+        memory_budget_mb=int(os.getenv("MEMORY_BUDGET_MB", "0")),
+        telegram_mode=os.getenv("TELEGRAM_MODE", "polling").lower(),
+        webhook_url=os.getenv("WEBHOOK_URL", ""),
+        webhook_host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        webhook_port=int(os.getenv("WEBHOOK_PORT", "8080")),
+        webhook_path=os.getenv("WEBHOOK_PATH", "/telegram"),
+        webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+        webhook_workers=int(os.getenv("WEBHOOK_WORKERS", "4")),
+        webhook_queue_size=int(os.getenv("WEBHOOK_QUEUE_SIZE", "100")),
+        telegram_api_url=os.getenv("TELEGRAM_API_URL", ""),
+        short_watchlists=parse_watchlists(os.getenv("SHORT_WATCHLISTS", "")),
+        short_concurrency=int(os.getenv("SHORT_CONCURRENCY", "5")),
+        short_timeout_sec=float(os.getenv("SHORT_TIMEOUT_SEC", "8.0")),
+        short_max_symbols=int(os.getenv("SHORT_MAX_SYMBOLS", "50")),
+        subscriptions_path=os.getenv("SUBSCRIPTIONS_PATH", "subscriptions.json"),
+        feed_gap_alert_sec=int(os.getenv("FEED_GAP_ALERT_SEC", "120")),
+        use_bybit_spot_ws=os.getenv("USE_BYBIT_SPOT_WS", "false").lower() == "true",
+        tickstore_path=os.getenv("TICKSTORE_PATH", ""),
+        tickstore_tick_days=int(os.getenv("TICKSTORE_TICK_DAYS", "2")),
+        tickstore_retention_days=int(os.getenv("TICKSTORE_RETENTION_DAYS", "30")),
+        tickstore_flush_sec=float(os.getenv("TICKSTORE_FLUSH_SEC", "5.0")),
+        event_log_path=os.getenv("EVENT_LOG_PATH", ""),
+        event_log_sample=parse_rates(os.getenv("EVENT_LOG_SAMPLE", "")),
+        event_log_limits=parse_rates(os.getenv("EVENT_LOG_LIMITS", "")),
+        event_log_max_mb=int(os.getenv("EVENT_LOG_MAX_MB", "100")),
+        event_log_backups=int(os.getenv("EVENT_LOG_BACKUPS", "5")),
+        enrich_hedge_pct=float(os.getenv("ENRICH_HEDGE_PCT", "0.95")),
+        enrich_stale_after_sec=float(os.getenv("ENRICH_STALE_AFTER_SEC", "2.0")),
+        enrich_breaker_failures=int(os.getenv("ENRICH_BREAKER_FAILURES", "5")),
+        enrich_breaker_reset_sec=float(os.getenv("ENRICH_BREAKER_RESET_SEC", "30.0")),
     )
@@ -1,6 +1,16 @@
-"""Signal detectors for price and open interest."""
-from typing import Sequence
+"""Signal detectors for price and open interest.
 
+The plain functions work on full sequences; the ``StreamingDetector``
+classes keep incremental per-symbol state for the live monitors.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from risk import calc_risk_score
 from utils import pct_change
 
 
@@ -27,3 +37,261 @@ def detect_divergence(prices: Sequence[float], oi_values: Sequence[float]) -> bo
     price_change = pct_change(prices[0], prices[-1])
     oi_change = pct_change(oi_values[0], oi_values[-1])
     return price_change * oi_change < 0
+
+
+# ---- Streaming detectors ----
+
+@dataclass
+class Event:
+    """Signal emitted when a detector's state turns on."""
+    detector: str
+    symbol: str
+    ts: float
+    value: float
+
+
+class _Anchor:
+    """Rolling window keeping one sample per *resolution* seconds.
+
+    Gives the oldest and latest value of the window in O(1) amortized.
+    """
+
+    __slots__ = ("window", "resolution", "samples")
+
+    def __init__(self, window: float, resolution: float) -> None:
+        self.window = window
+        self.resolution = resolution
+        self.samples: Deque[Tuple[float, float]] = deque()
+
+    def push(self, ts: float, value: float) -> None:
+        s = self.samples
+        if s and ts - s[-1][0] < self.resolution:
+            s[-1] = (s[-1][0], value)
+        else:
+            s.append((ts, value))
+        cutoff = ts - self.window
+        while len(s) > 1 and s[0][0] < cutoff:
+            s.popleft()
+
+    def change_pct(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        return pct_change(self.samples[0][1], self.samples[-1][1])
+
+
+class StreamingDetector:
+    """Base class: per-symbol incremental state, O(1) updates, own CPU accounting."""
+
+    name = "detector"
+    consumes: Tuple[str, ...] = ()  # "price" and/or "oi"
+
+    def __init__(self) -> None:
+        self.active: Dict[str, bool] = {}
+        self.cpu_ns = 0
+        self.calls = 0
+
+    def update(self, kind: str, symbol: str, ts: float, value: float) -> Optional[Event]:
+        start = time.perf_counter_ns()
+        try:
+            result = self._update(kind, symbol, ts, value)
+        finally:
+            self.cpu_ns += time.perf_counter_ns() - start
+            self.calls += 1
+        if result is None:
+            return None
+        on, magnitude = result
+        was = self.active.get(symbol, False)
+        self.active[symbol] = on
+        if on and not was:
+            return Event(self.name, symbol, ts, magnitude)
+        return None
+
+    def _update(self, kind: str, symbol: str, ts: float, value: float) -> Optional[Tuple[bool, float]]:
+        """Return (state, magnitude) or None when there is not enough data."""
+        raise NotImplementedError
+
+    def forget(self, symbol: str) -> None:
+        self.active.pop(symbol, None)
+
+    @property
+    def ns_per_tick(self) -> float:
+        return self.cpu_ns / self.calls if self.calls else 0.0
+
+
+class PumpDumpDetector(StreamingDetector):
+    """Streaming version of :func:`detect_pump_dump`."""
+
+    name = "pump_dump"
+    consumes = ("price",)
+
+    def __init__(self, window_sec: float, threshold_pct: float, resolution: float = 1.0) -> None:
+        super().__init__()
+        self.window_sec = window_sec
+        self.threshold_pct = threshold_pct
+        self.resolution = resolution
+        self.prices: Dict[str, _Anchor] = {}
+
+    def _update(self, kind, symbol, ts, value):
+        anchor = self.prices.get(symbol)
+        if anchor is None:
+            anchor = self.prices[symbol] = _Anchor(self.window_sec, self.resolution)
+        anchor.push(ts, value)
+        change = anchor.change_pct()
+        if change is None:
+            return None
+        return abs(change) >= self.threshold_pct, change
+
+    def forget(self, symbol: str) -> None:
+        super().forget(symbol)
+        self.prices.pop(symbol, None)
+
+
+class OIDeltaDetector(StreamingDetector):
+    """Streaming version of :func:`detect_oi_delta`."""
+
+    name = "oi_delta"
+    consumes = ("oi",)
+
+    def __init__(self, window_sec: float, threshold_pct: float, resolution: float = 1.0) -> None:
+        super().__init__()
+        self.window_sec = window_sec
+        self.threshold_pct = threshold_pct
+        self.resolution = resolution
+        self.ois: Dict[str, _Anchor] = {}
+
+    def _update(self, kind, symbol, ts, value):
+        anchor = self.ois.get(symbol)
+        if anchor is None:
+            anchor = self.ois[symbol] = _Anchor(self.window_sec, self.resolution)
+        anchor.push(ts, value)
+        change = anchor.change_pct()
+        if change is None:
+            return None
+        return abs(change) >= self.threshold_pct, change
+
+    def forget(self, symbol: str) -> None:
+        super().forget(symbol)
+        self.ois.pop(symbol, None)
+
+
+class DivergenceDetector(StreamingDetector):
+    """Streaming version of :func:`detect_divergence`."""
+
+    name = "divergence"
+    consumes = ("price", "oi")
+
+    def __init__(self, window_sec: float, resolution: float = 1.0) -> None:
+        super().__init__()
+        self.window_sec = window_sec
+        self.resolution = resolution
+        self.series: Dict[Tuple[str, str], _Anchor] = {}
+
+    def _update(self, kind, symbol, ts, value):
+        key = (kind, symbol)
+        anchor = self.series.get(key)
+        if anchor is None:
+            anchor = self.series[key] = _Anchor(self.window_sec, self.resolution)
+        anchor.push(ts, value)
+        price = self.series.get(("price", symbol))
+        oi = self.series.get(("oi", symbol))
+        if price is None or oi is None:
+            return None
+        price_change, oi_change = price.change_pct(), oi.change_pct()
+        if price_change is None or oi_change is None:
+            return None
+        return price_change * oi_change < 0, price_change - oi_change
+
+    def forget(self, symbol: str) -> None:
+        super().forget(symbol)
+        self.series.pop(("price", symbol), None)
+        self.series.pop(("oi", symbol), None)
+
+
+class _RollingVolatility:
+    """Standard deviation of 1-sample returns (percentage points) over a window."""
+
+    __slots__ = ("window", "returns", "last", "total", "total_sq")
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.returns: Deque[Tuple[float, float]] = deque()
+        self.last: Optional[float] = None
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, ts: float, price: float) -> None:
+        if self.last is not None and price != self.last:
+            r = pct_change(self.last, price)
+            self.returns.append((ts, r))
+            self.total += r
+            self.total_sq += r * r
+        self.last = price
+        cutoff = ts - self.window
+        while self.returns and self.returns[0][0] < cutoff:
+            _, old = self.returns.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def value(self) -> float:
+        n = len(self.returns)
+        if n < 2:
+            return 0.0
+        var = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return var ** 0.5 if var > 0 else 0.0
+
+
+class DetectorPipeline:
+    """Runs streaming detectors on price/OI updates and scores with calc_risk_score."""
+
+    def __init__(self, detectors: Sequence[StreamingDetector], volatility_window: float) -> None:
+        self.detectors = list(detectors)
+        self.volatility_window = volatility_window
+        self.volatility: Dict[str, _RollingVolatility] = {}
+
+    @classmethod
+    def default(cls, window_sec: float, pump_pct: float, oi_pct: float) -> "DetectorPipeline":
+        return cls(
+            [PumpDumpDetector(window_sec, pump_pct), OIDeltaDetector(window_sec, oi_pct),
+             DivergenceDetector(window_sec)],
+            volatility_window=window_sec,
+        )
+
+    def _feed(self, kind: str, symbol: str, ts: float, value: float) -> List[Event]:
+        events = []
+        for det in self.detectors:
+            if kind in det.consumes:
+                ev = det.update(kind, symbol, ts, value)
+                if ev is not None:
+                    events.append(ev)
+        return events
+
+    def on_price(self, symbol: str, ts: float, price: float) -> List[Event]:
+        vol = self.volatility.get(symbol)
+        if vol is None:
+            vol = self.volatility[symbol] = _RollingVolatility(self.volatility_window)
+        vol.push(ts, price)
+        return self._feed("price", symbol, ts, price)
+
+    def on_oi(self, symbol: str, ts: float, oi: float) -> List[Event]:
+        return self._feed("oi", symbol, ts, oi)
+
+    def signals(self, symbol: str) -> Dict[str, bool]:
+        return {det.name: det.active.get(symbol, False) for det in self.detectors}
+
+    def risk_score(self, symbol: str) -> float:
+        sig = self.signals(symbol)
+        vol = self.volatility.get(symbol)
+        return calc_risk_score(
+            sig.get(PumpDumpDetector.name, False),
+            sig.get(OIDeltaDetector.name, False),
+            sig.get(DivergenceDetector.name, False),
+            vol.value() if vol else 0.0,
+        )
+
+    def forget(self, symbol: str) -> None:
+        for det in self.detectors:
+            det.forget(symbol)
+        self.volatility.pop(symbol, None)
+
+    def cost_report(self) -> str:
+        return ", ".join(f"{d.name} {d.ns_per_tick / 1000:.1f}µs" for d in self.detectors)
@@ -0,0 +1,266 @@
+"""Tiered alert evaluation with cheap upper-bound short-score pruning.
+
+1. Entrées locales (flux tickers, cache liquidations, plage historique en
+   cache + dernier prix): gratuites.
+2. Borne supérieure du score short (entrée inconnue = maximum): si elle ne
+   peut pas passer le seuil, ou si l'OI connu ne confirme pas, on s'arrête.
+3. Sinon on ne récupère que les entrées qui peuvent encore changer la
+   décision, la plus informative (poids le plus fort) d'abord.
+
+Les appels REST passent par ``resilience.SourceSet`` (requêtes couvertes,
+disjoncteur, dernière valeur bonne servie en secours): une entrée servie
+depuis le cache est notée dans ``Decision.stale`` avec son âge.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+import bybit_api
+from orderbook import BOOKS
+from resilience import SourceSet
+from risk import SHORT_WEIGHTS, calc_short_score, short_score_bounds
+from ticker_state import TICKERS
+from tradeflow import FLOWS
+
+SHORT_GATE = 0.25
+RANGE_TTL = 6 * 3600.0
+
+# ordre de récupération: le plus gros poids d'abord
+_ORDER = sorted(SHORT_WEIGHTS, key=SHORT_WEIGHTS.get, reverse=True)
+
+
+@dataclass
+class Decision:
+    symbol: str
+    passed: bool
+    reason: str
+    # entrées du score (None = inconnue)
+    funding: Optional[float] = None
+    position: Optional[float] = None
+    oi_delta_pct: Optional[float] = None
+    liq_ratio: Optional[float] = None
+    # carnet d'ordres / flux agresseur: locaux uniquement, jamais récupérés par REST (None = ignoré)
+    book_imbalance: Optional[float] = None
+    flow_imbalance: Optional[float] = None
+    # détails pour la légende
+    alltime: Optional[Tuple[float, float, float, int, int]] = None
+    label: str = "inconnu"
+    oi: Optional[Tuple[float, float, float]] = None
+    liq: Optional[Tuple[float, float]] = None
+    fetched: list = field(default_factory=list)
+    # entrées servies depuis le cache de secours: nom -> âge (s)
+    stale: Dict[str, float] = field(default_factory=dict)
+
+    def bounds(self) -> Tuple[float, float]:
+        return short_score_bounds(
+            self.funding, self.position, self.oi_delta_pct, self.liq_ratio,
+            self.book_imbalance, self.flow_imbalance,
+        )
+
+    def inputs(self) -> Dict[str, Optional[float]]:
+        """Entrées du score (journal des décisions: ``Decision(symbol, passed, reason, **inputs)`` le recalcule)."""
+        return {
+            "funding": self.funding, "position": self.position,
+            "oi_delta_pct": self.oi_delta_pct, "liq_ratio": self.liq_ratio,
+            "book_imbalance": self.book_imbalance, "flow_imbalance": self.flow_imbalance,
+        }
+
+    @property
+    def complete(self) -> bool:
+        return None not in (self.funding, self.position, self.oi_delta_pct, self.liq_ratio)
+
+    @property
+    def score(self) -> float:
+        """Score short, entrées inconnues comptées à 0 (borne basse)."""
+        return calc_short_score(
+            self.funding or 0.0, self.position or 0.0, self.oi_delta_pct or 0.0, self.liq_ratio or 0.0,
+            self.book_imbalance, self.flow_imbalance,
+        )
+
+
+class TieredEvaluator:
+    """Décide si un déclenchement mérite une alerte en minimisant les appels REST."""
+
+    def __init__(self, gate: float = SHORT_GATE) -> None:
+        self.gate = gate
+        self.ranges: Dict[str, Tuple[float, Tuple[float, float, float, int, int]]] = {}
+        self.pruned = 0
+        self.enriched = 0
+        self.fetches = 0
+        self.skipped_fetches = 0
+        self.sources = SourceSet()
+
+    # ---- tier 0: entrées locales ----
+    def _position(self, d: Decision, last_price: Optional[float], now: float) -> None:
+        cached = self.ranges.get(d.symbol)
+        if cached is None or now - cached[0] > RANGE_TTL:
+            return
+        d.alltime = cached[1]
+        pmin, pmax, plast = cached[1][:3]
+        price = last_price if last_price else plast
+        d.position, d.label = bybit_api.historical_position_label(price, pmin, pmax)
+
+    def _oi(self, d: Decision, oi: Optional[Tuple[float, float, float]]) -> None:
+        if oi is not None:
+            d.oi = oi
+            d.oi_delta_pct = oi[2]
+
+    def _liq(self, d: Decision, stats: Optional[Tuple[float, float]]) -> None:
+        if stats is not None:
+            d.liq = stats
+            total = stats[0] + stats[1]
+            d.liq_ratio = stats[1] / total if total else 0.0
+
+    def local(
+        self,
+        symbol: str,
+        last_price: Optional[float] = None,
+        now: float | None = None,
+        book_imbalance: Optional[float] = None,
+        flow_imbalance: Optional[float] = None,
+    ) -> Decision:
+        """*book_imbalance* / *flow_imbalance*: valeurs jointes par un worker (mode shardé)."""
+        now = time.time() if now is None else now
+        d = Decision(symbol, passed=False, reason="")
+        d.funding = TICKERS.funding(symbol, now)
+        self._oi(d, TICKERS.oi_change(symbol, now=now))
+        self._liq(d, bybit_api.cached_liquidation_stats(symbol))
+        self._position(d, last_price, now)
+        d.book_imbalance = BOOKS.imbalance(symbol, now) if book_imbalance is None else book_imbalance
+        d.flow_imbalance = FLOWS.imbalance(symbol, now) if flow_imbalance is None else flow_imbalance
+        return d
+
+    # ---- tier 1: REST ----
+    @staticmethod
+    def _fetcher(name: str) -> Any:
+        return {
+            "funding": bybit_api.get_current_funding_rate,
+            "price": bybit_api.get_alltime_range,
+            "oi": bybit_api.get_oi_1h_change,
+            "liq": bybit_api.get_liquidation_stats,
+        }[name]
+
+    async def _fetch(self, name: str, http: httpx.AsyncClient, d: Decision, last_price: Optional[float]) -> None:
+        self.fetches += 1
+        d.fetched.append(name)
+        try:
+            if name == "liq":
+                # cache local + abonnement pybit: ni couverture ni disjoncteur
+                value, age = await self._fetcher(name)(http, d.symbol), 0.0
+            else:
+                value, age = await self.sources.call(name, self._fetcher(name), http, d.symbol)
+        except Exception as e:
+            logging.warning("%s fetch failed for %s: %s", name, d.symbol, e)
+            return
+        if age:
+            d.stale[name] = age
+        if name == "funding":
+            d.funding = value
+        elif name == "price":
+            fetched_at = time.time() - age
+            self.ranges[d.symbol] = (fetched_at, value)
+            # plage de secours acceptée quel que soit son âge (RANGE_TTL vaut pour le cache local)
+            self._position(d, last_price, fetched_at)
+        elif name == "oi":
+            self._oi(d, value)
+        elif name == "liq":
+            self._liq(d, value)
+
+    def _missing(self, d: Decision, name: str) -> bool:
+        value: Any = {"funding": d.funding, "price": d.position, "oi": d.oi_delta_pct, "liq": d.liq_ratio}[name]
+        return value is None
+
+    def _oi_rejects(self, d: Decision, direction: str, require: bool, confirm_pct: float) -> bool:
+        if not require or d.oi_delta_pct is None:
+            return False
+        return (direction == "up" and d.oi_delta_pct <= +confirm_pct) or \
+               (direction == "down" and d.oi_delta_pct >= -confirm_pct)
+
+    async def evaluate(
+        self,
+        http: httpx.AsyncClient,
+        symbol: str,
+        direction: str,
+        require_oi_confirm: bool = False,
+        confirm_oi_pct: float = 0.0,
+        last_price: Optional[float] = None,
+        gate: Optional[float] = None,
+        book_imbalance: Optional[float] = None,
+        flow_imbalance: Optional[float] = None,
+    ) -> Decision:
+        """*gate*: seuil de score de cette décision (le plus bas des destinataires), défaut ``self.gate``."""
+        gate = self.gate if gate is None else gate
+        d = self.local(symbol, last_price, book_imbalance=book_imbalance, flow_imbalance=flow_imbalance)
+        order = list(_ORDER)
+        if require_oi_confirm:
+            # filtre dur: l'OI est l'entrée la plus décisive
+            order.remove("oi")
+            order.insert(0, "oi")
+        for name in order:
+            if self._oi_rejects(d, direction, require_oi_confirm, confirm_oi_pct):
+                return self._prune(d, f"OI not confirming ({d.oi_delta_pct:+.2f}%)")
+            lo, hi = d.bounds()
+            if hi <= gate:
+                return self._prune(d, f"short score ≤ {hi:.2f} (bound) <= {gate:.2f}")
+            oi_pending = require_oi_confirm and d.oi_delta_pct is None
+            if lo > gate and not oi_pending:
+                break  # décision acquise: les entrées restantes ne changent rien
+            if self._missing(d, name):
+                await self._fetch(name, http, d, last_price)
+            if name == "oi" and oi_pending and d.oi_delta_pct is None:
+                # OI requis mais indisponible (erreur, disjoncteur ouvert): pas de confirmation
+                return self._prune(d, "OI unavailable (not confirming)")
+        if require_oi_confirm and d.oi_delta_pct is None:
+            return self._prune(d, "OI unavailable (not confirming)")
+        if self._oi_rejects(d, direction, require_oi_confirm, confirm_oi_pct):
+            return self._prune(d, f"OI not confirming ({d.oi_delta_pct:+.2f}%)")
+        if d.score <= gate:
+            return self._prune(d, f"short score {d.score:.2f} <= {gate:.2f}")
+        self.skipped_fetches += sum(1 for n in _ORDER if self._missing(d, n))
+        self.enriched += 1
+        d.passed = True
+        return d
+
+    async def complete(
+        self, http: httpx.AsyncClient, symbol: str, timeout: float | None = None
+    ) -> Decision:
+        """Toutes les entrées du score (commande /short): caches locaux d'abord,
+        puis les entrées manquantes en parallèle. Au-delà de *timeout*, les
+        requêtes en cours sont annulées et la décision reste partielle."""
+        return await self.fill(http, self.local(symbol), timeout)
+
+    async def fill(
+        self, http: httpx.AsyncClient, d: Decision, timeout: float | None = None,
+        last_price: Optional[float] = None,
+    ) -> Decision:
+        """Récupère en parallèle les entrées encore inconnues de *d*."""
+        fetches = [
+            asyncio.create_task(self._fetch(name, http, d, last_price))
+            for name in _ORDER if self._missing(d, name)
+        ]
+        if fetches:
+            _, pending = await asyncio.wait(fetches, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                d.reason = "timeout"
+        return d
+
+    def _prune(self, d: Decision, reason: str) -> Decision:
+        self.pruned += 1
+        self.skipped_fetches += sum(1 for n in _ORDER if self._missing(d, n))
+        d.reason = reason
+        return d
+
+    def summary(self) -> str:
+        return (
+            f"pruned {self.pruned}, enriched {self.enriched}, "
+            f"REST fetches {self.fetches} (skipped {self.skipped_fetches})"
+        )
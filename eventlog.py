@@ -0,0 +1,247 @@
+"""Structured JSONL event log, written by a background thread.
+
+``EVENTS.emit(kind, **fields)`` ne fait qu'un échantillonnage, un test de
+débit (seau à jetons par type) et un ``put_nowait`` dans une file bornée:
+jamais d'I/O sur la boucle. Un thread dédié vide la file par lots, sérialise
+(orjson si installé) et ajoute les lignes au fichier.
+
+- ``sample``: fraction conservée par type (ex: ``{"trigger_merged": 0.1}``)
+- ``limits``: débit maximal par type, en événements/s (rafale = 1 s)
+- les décisions d'alerte (``alert``) ne sont jamais échantillonnées ni
+  limitées: chaque décision est enregistrée avec ses entrées et son score,
+  rejouable via ``read_events`` + ``evaluator.Decision``
+- rotation par taille: au-delà de ``max_bytes``, ``path`` devient
+  ``path.1`` (``path.1`` -> ``path.2``...), ``backups`` fichiers gardés
+
+``install_queue_logging`` applique le même principe au module ``logging``:
+les handlers existants passent derrière un ``QueueHandler``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+QUEUE_SIZE = 10000
+BATCH = 500
+MAX_BYTES = 100 * 1024 * 1024
+BACKUPS = 5
+ALWAYS = frozenset({"alert"})
+DEFAULT_LIMITS = {"ws_error": 1.0}
+_STOP = object()
+
+
+def _json_dumps() -> Callable[[Any], bytes]:
+    try:
+        import orjson
+        return orjson.dumps
+    except ImportError:
+        return lambda obj: json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+class RateLimit:
+    """Seau à jetons: *rate* événements/s, rafale de *burst*."""
+
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self.last = 0.0
+
+    def allow(self, now: float) -> bool:
+        if self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class EventLog:
+    def __init__(
+        self,
+        path: str = "",
+        sample: Optional[Dict[str, float]] = None,
+        limits: Optional[Dict[str, float]] = None,
+        queue_size: int = QUEUE_SIZE,
+        rng: Callable[[], float] = random.random,
+        max_bytes: int = MAX_BYTES,
+        backups: int = BACKUPS,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes     # 0 = pas de rotation
+        self.backups = backups
+        self.size: Optional[int] = None  # taille du fichier courant (thread d'écriture)
+        self.rotations = 0
+        self.sample: Dict[str, float] = {}
+        self.limiters: Dict[str, RateLimit] = {}
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.rng = rng
+        self.thread: Optional[threading.Thread] = None
+        self.counts: Dict[str, int] = {}
+        self.sampled_out = 0
+        self.limited = 0
+        self.dropped = 0
+        self.written = 0
+        self.set_policy(sample or {}, {**DEFAULT_LIMITS, **(limits or {})})
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def configure(
+        self,
+        path: str,
+        sample: Dict[str, float],
+        limits: Dict[str, float],
+        max_bytes: int = MAX_BYTES,
+        backups: int = BACKUPS,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.size = None
+        self.set_policy(sample, {**DEFAULT_LIMITS, **limits})
+
+    def set_policy(self, sample: Dict[str, float], limits: Dict[str, float]) -> None:
+        self.sample = {k: v for k, v in sample.items() if k not in ALWAYS}
+        self.limiters = {k: RateLimit(v) for k, v in limits.items() if k not in ALWAYS and v > 0}
+
+    # ---- côté boucle (non bloquant) ----
+    def emit(self, kind: str, **fields: Any) -> bool:
+        """Enregistre un événement; retourne False s'il est écarté (échantillon, débit, file pleine)."""
+        if not self.path:
+            return False
+        rate = self.sample.get(kind)
+        if rate is not None and self.rng() >= rate:
+            self.sampled_out += 1
+            return False
+        now = time.time()
+        limiter = self.limiters.get(kind)
+        if limiter is not None and not limiter.allow(now):
+            self.limited += 1
+            return False
+        fields["ts"] = now
+        fields["kind"] = kind
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        return True
+
+    # ---- thread d'écriture ----
+    def start(self) -> None:
+        if not self.path or (self.thread is not None and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self._run, name="eventlog", daemon=True)
+        self.thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vide la file puis arrête le thread."""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _run(self) -> None:
+        dumps = _json_dumps()
+        stop = False
+        while not stop:
+            batch: List[Any] = [self.queue.get()]
+            while len(batch) < BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stop = True
+                batch = [e for e in batch if e is not _STOP]
+            lines = []
+            for event in batch:
+                try:
+                    lines.append(dumps(event))
+                except (TypeError, ValueError) as e:
+                    logging.warning("event not serializable (%s): %s", event.get("kind"), e)
+            if not lines:
+                continue
+            try:
+                self._write(b"\n".join(lines) + b"\n")
+                self.written += len(lines)
+            except OSError as e:
+                logging.warning("event log write failed: %s", e)
+
+    def _write(self, data: bytes) -> None:
+        if self.max_bytes > 0:
+            if self.size is None:
+                self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if self.size and self.size + len(data) > self.max_bytes:
+                self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+        self.size = (self.size or 0) + len(data)
+
+    def _rotate(self) -> None:
+        """``path`` -> ``path.1`` -> ... -> ``path.<backups>`` (le plus ancien est supprimé)."""
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.size = 0
+        self.rotations += 1
+
+    # ---- rapports ----
+    def nbytes(self) -> int:
+        return self.queue.qsize() * 600
+
+    def summary(self) -> str:
+        if not self.path:
+            return "disabled"
+        kinds = ", ".join(f"{k}={n}" for k, n in sorted(self.counts.items())) or "none"
+        return (
+            f"{self.written} written ({kinds}), {self.rotations} rotations, queue {self.queue.qsize()}, "
+            f"{self.sampled_out} sampled out, {self.limited} rate-limited, {self.dropped} dropped"
+        )
+
+
+def read_events(path: str, kind: str | None = None) -> Iterator[Dict[str, Any]]:
+    """Relit un journal (audit / rejeu); lignes tronquées ignorées."""
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if kind is None or event.get("kind") == kind:
+                yield event
+
+
+def install_queue_logging() -> logging.handlers.QueueListener:
+    """Handlers du logger racine déplacés derrière une file (écriture dans un thread)."""
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for h in handlers:
+        root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+EVENTS = EventLog()
@@ -0,0 +1,281 @@
+"""Exchange adapters: venue WebSocket frames -> normalized tick batches.
+
+Un adaptateur connaît l'URL, les abonnements et le format d'une venue; il
+transforme chaque frame décodée en ``TickBatch`` (identifiants de symbole,
+timestamps et prix dans des ``array``), consommé par le cœur de détection
+unique (``app.detect_batch``). La connexion, le watchdog, le backoff et
+l'émission des déclenchements sont communs (``app.run_feed``).
+
+Ajouter une venue = écrire un adaptateur (voir ``BybitSpotAdapter``).
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+from candles import CANDLES
+from fastpath import ChangeFilter, FrameStats, SymbolUniverse
+from feedhealth import WATCHDOG
+from orderbook import BOOKS
+from ticker_state import TICKERS
+from tradeflow import FLOWS
+
+
+class SymbolTable:
+    """Interning symbole <-> identifiant compact, partagé par toutes les venues."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, symbol: str) -> int:
+        sid = self.ids.get(symbol)
+        if sid is None:
+            sid = self.ids[symbol] = len(self.names)
+            self.names.append(symbol)
+        return sid
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+SYMBOLS = SymbolTable()
+
+
+class TickBatch:
+    """Ticks normalisés d'une frame: colonnes ids / ts / prix."""
+
+    __slots__ = ("exchange", "ids", "ts", "prices", "held_ids", "held_ts", "held_prices", "seen", "skipped")
+
+    def __init__(self, exchange: str) -> None:
+        self.exchange = exchange
+        self.ids = array("I")
+        self.ts = array("d")
+        self.prices = array("d")
+        # prix inchangés: fenêtre rafraîchie sans détection
+        self.held_ids = array("I")
+        self.held_ts = array("d")
+        self.held_prices = array("d")
+        self.seen = 0       # tickers présents dans la frame
+        self.skipped = 0    # hors univers / prix inchangé
+
+    def append(self, symbol: str, ts: float, price: float) -> None:
+        self.ids.append(SYMBOLS.intern(symbol))
+        self.ts.append(ts)
+        self.prices.append(price)
+
+    def hold(self, symbol: str, ts: float, price: float) -> None:
+        self.held_ids.append(SYMBOLS.intern(symbol))
+        self.held_ts.append(ts)
+        self.held_prices.append(price)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def symbols(self) -> List[str]:
+        names = SYMBOLS.names
+        return [names[i] for i in self.ids]
+
+
+class ExchangeAdapter(abc.ABC):
+    """Interface d'une venue. ``parse`` est appelée pour chaque frame décodée."""
+
+    name = ""               # label des fenêtres et des alertes ("Binance", "Bybit")
+    feed = ""               # nom du flux (watchdog, démarrage)
+    uri = ""
+    interval_hint = 1.0     # intervalle attendu entre messages (s), affiné en ligne
+    sync_sec = 0.0          # période de ``sync`` (0 = jamais)
+    connect_kwargs: Dict[str, Any] = {}
+
+    def __init__(self) -> None:
+        self.stats = FrameStats()
+
+    def describe(self) -> str:
+        return ""
+
+    async def on_connect(self, ws: Any) -> None:
+        """Abonnements après (re)connexion."""
+
+    async def sync(self, ws: Any, now: float) -> None:
+        """Travail périodique sur la connexion (abonnements dynamiques)."""
+
+    def forget(self, symbol: str) -> None:
+        """Symbole évincé: état par symbole de l'adaptateur oublié."""
+
+    @abc.abstractmethod
+    def parse(self, data: Any, now: float) -> Optional[TickBatch]:
+        """Frame décodée -> batch de ticks (None: frame sans prix)."""
+
+
+class BinanceAdapter(ExchangeAdapter):
+    """Binance spot ``!ticker@arr`` (ou ``<symbol>@ticker`` par shard)."""
+
+    name = "Binance"
+    feed = "binance"
+    interval_hint = 1.0
+    connect_kwargs = {"ping_interval": 20, "ping_timeout": 10}
+
+    def __init__(
+        self,
+        universe: SymbolUniverse,
+        fallback: Optional[SymbolUniverse] = None,
+        per_symbol: bool = False,
+        stats: Optional[FrameStats] = None,
+    ) -> None:
+        super().__init__()
+        self.universe = universe
+        # Bybit coupé: univers élargi (le flux !ticker@arr contient déjà tout)
+        self.fallback = fallback
+        self.per_symbol = per_symbol
+        self.uri = "wss://stream.binance.com:9443/ws" + ("" if per_symbol else "/!ticker@arr")
+        self.changes = ChangeFilter()
+        if stats is not None:
+            self.stats = stats
+
+    def describe(self) -> str:
+        return f"universe: {len(self.universe) or 'all USDT'}"
+
+    def forget(self, symbol: str) -> None:
+        # prochain tick traité comme un changement: la fenêtre est réamorcée
+        self.changes.forget(symbol)
+
+    async def on_connect(self, ws: Any) -> None:
+        if self.per_symbol:
+            streams = [f"{s.lower()}@ticker" for s in sorted(self.universe.symbols or ())]
+            for i in range(0, len(streams), 200):
+                await ws.send(json.dumps({"method": "SUBSCRIBE", "params": streams[i:i + 200], "id": i + 1}))
+                await asyncio.sleep(0.25)  # limite Binance: 5 messages/s
+        self.changes.reset()
+
+    def parse(self, data: Any, now: float) -> Optional[TickBatch]:
+        if isinstance(data, dict):  # flux par symbole / réponse SUBSCRIBE
+            data = [data]
+        universe = self.universe
+        if self.fallback is not None and WATCHDOG.venue_down("bybit", now):
+            universe = self.fallback
+        batch = TickBatch(self.name)
+        batch.seen = len(data)
+        changed = self.changes.changed
+        for ticker in data:
+            symbol = ticker.get("s")
+            if not symbol or not universe.allows(symbol):
+                batch.skipped += 1
+                continue
+            raw = ticker.get("c")
+            try:
+                price = float(raw)
+            except Exception:
+                continue
+            if changed(symbol, raw):
+                batch.append(symbol, now, price)
+            else:
+                batch.skipped += 1
+                batch.hold(symbol, now, price)
+        return batch
+
+
+class BybitLinearAdapter(ExchangeAdapter):
+    """Bybit v5 perps linéaires: ``tickers.SYMBOL`` + ``kline.1.SYMBOL`` + carnets / trades paresseux."""
+
+    name = "Bybit"
+    feed = "bybit"
+    uri = "wss://stream.bybit.com/v5/public/linear"
+    interval_hint = 0.1
+    sync_sec = 1.0
+    chunk_size = 100
+
+    def __init__(self, symbols: List[str], on_oi: Optional[Callable[[str, float, float], None]] = None) -> None:
+        super().__init__()
+        self.symbols = symbols
+        self.on_oi = on_oi
+
+    def describe(self) -> str:
+        return f"{len(self.symbols)} symbols"
+
+    async def _send(self, ws: Any, op: str, args: List[str]) -> None:
+        for i in range(0, len(args), self.chunk_size):
+            await ws.send(json.dumps({"op": op, "args": args[i:i + self.chunk_size]}))
+            await asyncio.sleep(0.1)
+
+    async def on_connect(self, ws: Any) -> None:
+        await self._send(ws, "subscribe", [f"tickers.{s}" for s in self.symbols])
+        await self._send(ws, "subscribe", [f"kline.1.{s}" for s in self.symbols])
+        BOOKS.reset()
+        FLOWS.reset()
+        CANDLES.resync()
+
+    async def sync(self, ws: Any, now: float) -> None:
+        # carnets et trades: abonnements paresseux / désabonnement après inactivité
+        for manager in (BOOKS, FLOWS):
+            sub, unsub = manager.sync(now)
+            if sub:
+                await ws.send(json.dumps({"op": "subscribe", "args": [manager.topic(s) for s in sub]}))
+            if unsub:
+                await ws.send(json.dumps({"op": "unsubscribe", "args": [manager.topic(s) for s in unsub]}))
+
+    def parse(self, data: Any, now: float) -> Optional[TickBatch]:
+        topic = data.get("topic", "")
+        if topic.startswith("orderbook."):
+            BOOKS.on_message(topic, data.get("type", "delta"), data.get("data") or {}, now)
+            return None
+        if topic.startswith("publicTrade."):
+            # un message = un lot de trades, ingéré en une fois
+            FLOWS.on_message(topic, data.get("data") or [])
+            return None
+        if topic.startswith("kline."):
+            CANDLES.on_kline(topic.rsplit(".", 1)[1], data.get("data") or [])
+            return None
+        if not topic.startswith("tickers."):
+            return None
+        symbol = topic.split(".", 1)[1]
+        ticker_data = data.get("data") or {}
+        # fusion snapshot/delta: OI et funding suivis même sans lastPrice
+        TICKERS.apply(data.get("type", "delta"), symbol, ticker_data, now)
+        if "openInterest" in ticker_data and self.on_oi is not None:
+            try:
+                self.on_oi(symbol, now, float(ticker_data["openInterest"]))
+            except (TypeError, ValueError):
+                pass
+        batch = TickBatch(self.name)
+        batch.seen = 1
+        last_price = ticker_data.get("lastPrice")
+        if last_price is None:
+            batch.skipped = 1
+            return batch
+        try:
+            batch.append(symbol, now, float(last_price))
+        except (TypeError, ValueError):
+            batch.skipped = 1
+        return batch
+
+
+class BybitSpotAdapter(BybitLinearAdapter):
+    """Bybit v5 spot ``tickers.SYMBOL``: prix seulement (ni OI, ni funding, ni carnets).
+
+    Les symboles fournis doivent avoir un perp linéaire (cf.
+    ``app.price_monitor_bybit_spot``): alertes et enrichissement passent par lui.
+    """
+
+    name = "BybitSpot"
+    feed = "bybit_spot"
+    uri = "wss://stream.bybit.com/v5/public/spot"
+    sync_sec = 0.0
+    chunk_size = 10     # limite Bybit spot: 10 topics par requête
+
+    async def on_connect(self, ws: Any) -> None:
+        await self._send(ws, "subscribe", [f"tickers.{s}" for s in self.symbols])
+
+    def parse(self, data: Any, now: float) -> Optional[TickBatch]:
+        topic = data.get("topic", "")
+        if not topic.startswith("tickers."):
+            return None
+        batch = TickBatch(self.name)
+        batch.seen = 1
+        try:
+            batch.append(topic.split(".", 1)[1], now, float((data.get("data") or {})["lastPrice"]))
+        except (KeyError, TypeError, ValueError):
+            batch.skipped = 1
+        return batch
@@ -0,0 +1,144 @@
+"""Fast path for the Binance all-tickers stream.
+
+- filtre d'univers précalculé (intersection avec les perps Bybit ou watchlist)
+- détection de changement du dernier prix (les tickers inchangés sautent
+  la mise à jour de fenêtre et la détection)
+- décodeur JSON interchangeable
+- statistiques par frame (temps de traitement, fraction ignorée)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+JsonDecoder = Callable[[Any], Any]
+
+
+def get_json_decoder(name: str = "json") -> JsonDecoder:
+    """Retourne une fonction ``loads`` selon *name*: "json", "orjson" ou "auto".
+
+    "orjson" est optionnel: en son absence on retombe sur ``json.loads``.
+    """
+    name = (name or "json").lower()
+    if name in ("orjson", "auto"):
+        try:
+            import orjson
+            return orjson.loads
+        except ImportError:
+            if name == "orjson":
+                logging.warning("orjson not installed, falling back to json")
+    return json.loads
+
+
+def shard_of(symbol: str, n_shards: int) -> int:
+    """Shard stable (indépendant de PYTHONHASHSEED) d'un symbole."""
+    return zlib.crc32(symbol.encode("ascii", "ignore")) % n_shards if n_shards > 1 else 0
+
+
+class SymbolUniverse:
+    """Ensemble de symboles autorisés, calculé une fois au démarrage.
+
+    ``symbols=None`` = tous les symboles en USDT. *shard* = (index, total)
+    restreint en plus l'univers aux symboles de ce shard.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.shard = shard if shard and shard[1] > 1 else None
+        if symbols is not None and self.shard is not None:
+            symbols = [s for s in symbols if shard_of(s, self.shard[1]) == self.shard[0]]
+        self.symbols = frozenset(symbols) if symbols is not None else None
+
+    @classmethod
+    def build(
+        cls,
+        mode: str,
+        watchlist: Iterable[str] = (),
+        bybit_perps: Iterable[str] = (),
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> "SymbolUniverse":
+        """*mode*: "all" | "bybit" (perps Bybit ∪ watchlist) | "watchlist"."""
+        mode = (mode or "all").lower()
+        watch = {s.upper() for s in watchlist}
+        if mode == "watchlist":
+            return cls(watch, shard)
+        if mode == "bybit":
+            perps = set(bybit_perps)
+            if not perps:
+                # liste indisponible: on ne filtre que le suffixe
+                return cls(shard=shard)
+            return cls(perps | watch, shard)
+        return cls(shard=shard)
+
+    def allows(self, symbol: str) -> bool:
+        if self.symbols is not None:
+            return symbol in self.symbols
+        if not symbol.endswith("USDT"):
+            return False
+        return self.shard is None or shard_of(symbol, self.shard[1]) == self.shard[0]
+
+    def __len__(self) -> int:
+        return len(self.symbols) if self.symbols is not None else 0
+
+
+class ChangeFilter:
+    """Détecte les tickers dont le prix de clôture (chaîne brute) a changé.
+
+    Un prix identique au précédent ne peut pas élargir l'écart min/max de la
+    fenêtre: seule la détection est sautée. Le tick doit tout de même
+    rafraîchir la fenêtre (ancre d'un prix plat plus vieux que la fenêtre,
+    dernier tick et suivi d'inactivité), voir ``TickBatch.hold``.
+    """
+
+    def __init__(self) -> None:
+        self.last: Dict[str, Any] = {}
+
+    def changed(self, symbol: str, raw: Any) -> bool:
+        if self.last.get(symbol) == raw:
+            return False
+        self.last[symbol] = raw
+        return True
+
+    def forget(self, symbol: str) -> None:
+        self.last.pop(symbol, None)
+
+    def reset(self) -> None:
+        self.last.clear()
+
+
+class FrameStats:
+    """Compteurs cumulés par frame WS."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.tickers = 0
+        self.skipped = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, tickers: int, skipped: int, elapsed_ns: int) -> None:
+        self.frames += 1
+        self.tickers += tickers
+        self.skipped += skipped
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    @property
+    def skipped_fraction(self) -> float:
+        return self.skipped / self.tickers if self.tickers else 0.0
+
+    @property
+    def avg_frame_ms(self) -> float:
+        return self.total_ns / self.frames / 1e6 if self.frames else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.frames} frames, avg {self.avg_frame_ms:.2f} ms "
+            f"(max {self.max_ns / 1e6:.2f} ms), skipped {self.skipped_fraction:.0%}"
+        )
@@ -0,0 +1,204 @@
+"""Feed liveness tracking, stall detection and reconnect backoff.
+
+Chaque flux WS (et chaque flux de chaque shard) a un ``FeedHealth``:
+âge du dernier message et intervalle moyen entre messages (moyenne
+exponentielle), d'où un délai de silence toléré propre au flux
+(``STALE_FACTOR`` intervalles, borné à [``MIN_STALE``, ``MAX_STALE``]).
+
+- un flux connecté mais muet au-delà de ce délai (socket à moitié ouverte)
+  est fermé de force par ``FeedWatchdog.enforce``; le moniteur reconnecte
+- les reconnexions suivent un backoff exponentiel à jitter complet, remis
+  à zéro après ``STABLE_SEC`` de connexion saine
+- ``venue_down``: la détection s'appuie temporairement sur l'autre venue
+- ``alerts``: une alerte opérateur par coupure prolongée, puis au retour
+
+Le suivi par message coûte quelques opérations flottantes; aucune tâche
+supplémentaire n'attend sur les sockets.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+MIN_STALE = 10.0
+MAX_STALE = 120.0
+STALE_FACTOR = 20.0
+STABLE_SEC = 30.0
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 60.0
+GAP_ALERT_SEC = 120.0
+EWMA_ALPHA = 0.05
+
+
+class Backoff:
+    """Backoff exponentiel à jitter complet: délai uniforme dans [0, min(cap, base·2^n)]."""
+
+    def __init__(
+        self,
+        base: float = BACKOFF_BASE,
+        cap: float = BACKOFF_CAP,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.base = base
+        self.cap = cap
+        self.rng = rng
+        self.attempt = 0
+
+    def next(self) -> float:
+        delay = self.rng() * min(self.cap, self.base * (1 << min(self.attempt, 30)))
+        self.attempt += 1
+        return delay
+
+    def reset(self) -> None:
+        self.attempt = 0
+
+
+class FeedHealth:
+    """État de vie d'un flux."""
+
+    def __init__(self, name: str, venue: str = "", interval_hint: float = 1.0, now: float | None = None) -> None:
+        self.name = name
+        self.venue = venue or name
+        self.interval = interval_hint       # intervalle moyen entre messages (s)
+        self.connected = False
+        self.connected_at = 0.0
+        self.last_msg = 0.0
+        self.messages = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.down_since: Optional[float] = time.time() if now is None else now
+        self.alerted = False
+        self.backoff = Backoff()
+        self._close: Optional[Callable[[], Awaitable[Any]]] = None
+
+    def on_connect(self, now: float, close: Optional[Callable[[], Awaitable[Any]]] = None) -> None:
+        self.connected = True
+        self.connected_at = now
+        self.last_msg = now
+        self._close = close
+
+    def on_message(self, now: float) -> None:
+        if self.messages:
+            gap = now - self.last_msg
+            self.interval += EWMA_ALPHA * (gap - self.interval)
+        self.messages += 1
+        self.last_msg = now
+        if self.down_since is not None:
+            self.down_since = None
+        if self.backoff.attempt and now - self.connected_at > STABLE_SEC:
+            self.backoff.reset()
+
+    def on_disconnect(self, now: float) -> float:
+        """Connexion perdue: retourne le délai avant reconnexion."""
+        if self.connected:
+            self.reconnects += 1
+        self.connected = False
+        self._close = None
+        if self.down_since is None:
+            self.down_since = self.last_msg or now
+        return self.backoff.next()
+
+    def stale_after(self) -> float:
+        return min(max(STALE_FACTOR * self.interval, MIN_STALE), MAX_STALE)
+
+    def age(self, now: float) -> float:
+        return now - self.last_msg if self.last_msg else float("inf")
+
+    def stalled(self, now: float) -> bool:
+        return self.connected and self.age(now) > self.stale_after()
+
+    def down(self, now: float) -> bool:
+        return not self.connected or self.age(now) > self.stale_after()
+
+    def gap(self, now: float) -> float:
+        """Durée de la coupure en cours (0 si le flux est vivant)."""
+        if not self.down(now):
+            return 0.0
+        start = self.down_since if self.down_since is not None else self.last_msg
+        return now - start
+
+    # ---- IPC (mode shardé) ----
+    def state(self) -> Dict[str, Any]:
+        return {
+            "venue": self.venue, "connected": self.connected, "last_msg": self.last_msg,
+            "interval": self.interval, "down_since": self.down_since,
+            "reconnects": self.reconnects, "stalls": self.stalls, "messages": self.messages,
+        }
+
+    def apply_state(self, state: Dict[str, Any]) -> None:
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def summary(self, now: float) -> str:
+        if self.down(now):
+            return f"{self.name} DOWN {self.gap(now):.0f}s"
+        rate = 1.0 / self.interval if self.interval > 0 else 0.0
+        return f"{self.name} ok ({self.age(now):.1f}s, {rate:.1f} msg/s, {self.reconnects} reconnects, {self.stalls} stalls)"
+
+
+class FeedWatchdog:
+    """Registre des flux: fermeture des flux bloqués, état par venue, alertes opérateur."""
+
+    def __init__(self) -> None:
+        self.feeds: Dict[str, FeedHealth] = {}
+
+    def feed(self, name: str, venue: str = "", interval_hint: float = 1.0) -> FeedHealth:
+        health = self.feeds.get(name)
+        if health is None:
+            health = self.feeds[name] = FeedHealth(name, venue, interval_hint)
+        return health
+
+    def enforce(self, now: float | None = None) -> List[str]:
+        """Ferme les connexions muettes (boucle du flux); retourne les flux concernés."""
+        now = time.time() if now is None else now
+        stalled = []
+        for health in self.feeds.values():
+            if health._close is None or not health.stalled(now):
+                continue
+            health.stalls += 1
+            logging.warning(
+                "%s feed silent for %.0fs (expected every %.2fs), forcing reconnect",
+                health.name, health.age(now), health.interval,
+            )
+            close, health._close = health._close, None
+            asyncio.ensure_future(close())
+            stalled.append(health.name)
+        return stalled
+
+    def venue_down(self, venue: str, now: float | None = None) -> bool:
+        """Vrai si la venue est suivie et qu'aucun de ses flux n'est vivant."""
+        now = time.time() if now is None else now
+        feeds = [h for h in self.feeds.values() if h.venue == venue]
+        return bool(feeds) and all(h.down(now) for h in feeds)
+
+    def merge(self, prefix: str, states: Dict[str, Dict[str, Any]]) -> None:
+        """États reçus d'un shard (flux nommés ``<flux>[<prefix>]``)."""
+        for name, state in states.items():
+            self.feed(f"{name}[{prefix}]", state.get("venue", name)).apply_state(state)
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        return {name: h.state() for name, h in self.feeds.items()}
+
+    def alerts(self, now: float | None = None, gap_sec: float = GAP_ALERT_SEC) -> List[str]:
+        """Messages opérateur: coupure prolongée (une fois), puis rétablissement."""
+        now = time.time() if now is None else now
+        out = []
+        for h in list(self.feeds.values()):
+            gap = h.gap(now)
+            if not h.alerted and gap >= gap_sec:
+                h.alerted = True
+                out.append(f"⚠️ Flux {h.name} coupé depuis {gap / 60:.0f} min ({h.reconnects} reconnexions)")
+            elif h.alerted and gap == 0.0:
+                h.alerted = False
+                out.append(f"✅ Flux {h.name} rétabli")
+        return out
+
+    def summary(self, now: float | None = None) -> str:
+        now = time.time() if now is None else now
+        return " | ".join(h.summary(now) for h in list(self.feeds.values())) or "no feeds"
+
+
+WATCHDOG = FeedWatchdog()
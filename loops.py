@@ -0,0 +1,47 @@
+"""Santé de la boucle asyncio.
+
+Un battement (``LoopHealth``) mesure chaque seconde le retard de
+planification de la boucle; elle est considérée bloquée si le dernier
+battement date de plus de ``STALL_SEC`` (affiché dans /status).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+BEAT_SEC = 1.0
+STALL_SEC = 5.0
+
+
+class LoopHealth:
+    """Battement d'une boucle: retard de planification et détection de blocage."""
+
+    def __init__(self, name: str, beat_sec: float = BEAT_SEC) -> None:
+        self.name = name
+        self.beat_sec = beat_sec
+        self.last_beat = 0.0
+        self.lag = 0.0          # dernier retard mesuré (s)
+        self.max_lag = 0.0
+        self.beats = 0
+
+    async def run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.beat_sec)
+            self.record(time.perf_counter() - t0 - self.beat_sec)
+
+    def record(self, lag: float) -> None:
+        self.lag = max(lag, 0.0)
+        self.max_lag = max(self.max_lag, self.lag)
+        self.last_beat = time.time()
+        self.beats += 1
+
+    def alive(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return self.beats > 0 and now - self.last_beat < STALL_SEC
+
+    def summary(self) -> str:
+        if not self.beats:
+            return f"{self.name} starting"
+        state = "ok" if self.alive() else f"STALLED ({time.time() - self.last_beat:.0f}s)"
+        return f"{self.name} {state}, lag {self.lag * 1000:.1f}ms (max {self.max_lag * 1000:.0f}ms)"
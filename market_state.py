@@ -0,0 +1,193 @@
+"""Per-exchange price windows behind a unified symbol index."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from mtf import MultiWindow, Timeframe, WindowPlan
+from timerwheel import WHEEL, TimerWheel
+
+
+@dataclass
+class Trigger:
+    """Mouvement détecté sur un exchange donné."""
+    symbol: str
+    exchange: str
+    variation: float
+    direction: str  # "up" | "down"
+    ts: float
+    spread: Optional[float] = None  # renseigné par les workers (mode shardé)
+    window_sec: int = 0             # timeframe ayant déclenché
+    risk_score: Optional[float] = None  # DetectorPipeline.risk_score au déclenchement
+    market_pct: Optional[float] = None  # composante marché (regime.RegimeEngine)
+    excess_pct: Optional[float] = None  # rendement du symbole au-delà du marché
+    # carnet / flux agresseur du shard propriétaire (mode shardé: le coordinateur n'a pas de WS Bybit)
+    book_imbalance: Optional[float] = None
+    flow_imbalance: Optional[float] = None
+    # variation volume / notionnel des bougies locales (candles.CandleAggregator.volume_change)
+    volume: Optional[Tuple[float, float, float, float, float, float]] = None
+
+
+@dataclass
+class Move:
+    """Mouvement fusionné (un par symbole) regroupant les exchanges qui l'ont vu."""
+    symbol: str
+    direction: str
+    variation: float
+    first_ts: float
+    exchanges: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return "+".join(self.exchanges)
+
+
+class SymbolIndex:
+    """Index symbole -> exchange -> fenêtre de prix.
+
+    Chaque exchange garde sa propre fenêtre afin que les ticks Binance et
+    Bybit ne s'entrelacent pas dans un même buffer. Chaque fenêtre est une
+    ``mtf.MultiWindow`` partagée par toutes les timeframes configurées.
+    """
+
+    def __init__(self, timeframes: Iterable[Timeframe] = (Timeframe(1200, 8.0),)) -> None:
+        self.plan = WindowPlan(timeframes)
+        self.symbols: Dict[str, Dict[str, MultiWindow]] = {}
+        # dernier tick par venue, conservé même quand la fenêtre est vidée
+        self.last_ticks: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        # appelé à la création des fenêtres d'un nouveau symbole (ex: suivi d'inactivité)
+        self.on_new_symbol: Optional[Callable[[str], None]] = None
+        # facteur de seuil par symbole (< 1 pour les symboles suivis avec un seuil plus serré)
+        self.scales: Dict[str, float] = {}
+
+    def configure(self, timeframes: Iterable[Timeframe]) -> None:
+        """Change les timeframes; les fenêtres existantes sont rejouées dans le nouveau plan."""
+        plan = WindowPlan(timeframes)
+        if plan.timeframes == self.plan.timeframes:
+            return
+        self.plan = plan
+        for by_ex in self.symbols.values():
+            for ex, win in by_ex.items():
+                fresh = MultiWindow(plan)
+                for ts, price in win.points():
+                    fresh.add(ts, price, detect=False)
+                by_ex[ex] = fresh
+
+    @property
+    def max_window(self) -> int:
+        return self.plan.max_window
+
+    def window(self, symbol: str, exchange: str) -> MultiWindow:
+        by_ex = self.symbols.get(symbol)
+        if by_ex is None:
+            by_ex = self.symbols[symbol] = {}
+            if self.on_new_symbol is not None:
+                self.on_new_symbol(symbol)
+        win = by_ex.get(exchange)
+        if win is None:
+            win = by_ex[exchange] = MultiWindow(self.plan)
+        return win
+
+    def seed(self, exchange: str, symbol: str, ts: float, price: float) -> None:
+        """Ajoute un tick sans détection (amorçage au démarrage)."""
+        self.window(symbol, exchange).add(ts, price, detect=False)
+        self.last_ticks.setdefault(symbol, {})[exchange] = (ts, price)
+
+    def update(self, exchange: str, symbol: str, ts: float, price: float) -> List[Trigger]:
+        """Ajoute un tick et retourne un Trigger par timeframe dont le seuil est dépassé."""
+        self.last_ticks.setdefault(symbol, {})[exchange] = (ts, price)
+        hits = self.window(symbol, exchange).add(ts, price, scale=self.scales.get(symbol, 1.0))
+        return [
+            Trigger(symbol, exchange, variation, direction, ts, window_sec=tf.window_sec)
+            for tf, variation, direction in hits
+        ]
+
+    def set_scale(self, symbol: str, scale: float) -> None:
+        """Resserre (ou rétablit, *scale* = 1) les seuils de détection d'un symbole."""
+        if scale < 1.0:
+            self.scales[symbol] = scale
+        else:
+            self.scales.pop(symbol, None)
+
+    def last_seen(self, symbol: str) -> Optional[float]:
+        """Timestamp du dernier tick, toutes venues confondues."""
+        ticks = self.last_ticks.get(symbol)
+        return max(ts for ts, _ in ticks.values()) if ticks else None
+
+    def nbytes(self, symbol: str | None = None) -> int:
+        """Taille approximative des fenêtres d'un symbole (ou de toutes)."""
+        symbols = self.symbols if symbol is None else {symbol: self.symbols.get(symbol, {})}
+        return sum(200 + sum(w.nbytes() for w in wins.values()) for wins in symbols.values())
+
+    def evict(self, symbol: str) -> None:
+        """Libère les fenêtres et derniers ticks d'un symbole inactif."""
+        self.symbols.pop(symbol, None)
+        self.last_ticks.pop(symbol, None)
+
+    def last_tick(self, symbol: str, exchange: str) -> Optional[Tuple[float, float]]:
+        return self.last_ticks.get(symbol, {}).get(exchange)
+
+    def spread_pct(
+        self,
+        symbol: str,
+        a: str = "Binance",
+        b: str = "Bybit",
+        max_age: float | None = None,
+        now: float | None = None,
+    ) -> Optional[float]:
+        """Écart de prix (en %) entre deux venues: (a - b) / mid.
+
+        Retourne None si l'une des fenêtres est vide ou plus vieille que *max_age*.
+        """
+        ta = self.last_tick(symbol, a)
+        tb = self.last_tick(symbol, b)
+        if ta is None or tb is None:
+            return None
+        if max_age is not None and now is not None:
+            if now - ta[0] > max_age or now - tb[0] > max_age:
+                return None
+        mid = (ta[1] + tb[1]) / 2.0
+        if mid <= 0:
+            return None
+        return (ta[1] - tb[1]) / mid * 100.0
+
+    def tracked_count(self) -> int:
+        return sum(1 for wins in self.symbols.values() if any(wins.values()))
+
+
+class MoveMerger:
+    """Fusion cross-exchange: un seul enrichissement par symbole et par mouvement.
+
+    Un déclenchement dans la même direction, sur le même symbole et dans les
+    *merge_sec* suivant le premier, est rattaché au mouvement existant.
+    Un mouvement est retiré par la roue de timers à la fin de sa fenêtre de
+    fusion ou de son cooldown (*ttl_sec*), selon ce qui arrive en dernier.
+    """
+
+    def __init__(self, wheel: TimerWheel = WHEEL) -> None:
+        self.moves: Dict[str, Move] = {}
+        self.wheel = wheel
+
+    def _expire(self, move: Move) -> None:
+        if self.moves.get(move.symbol) is move:
+            del self.moves[move.symbol]
+
+    def submit(self, trig: Trigger, merge_sec: float, ttl_sec: float = 0.0) -> Optional[Move]:
+        """Retourne le Move à enrichir si *trig* ouvre un nouveau mouvement, sinon None."""
+        move = self.moves.get(trig.symbol)
+        if (
+            move is not None
+            and move.direction == trig.direction
+            and trig.ts - move.first_ts < merge_sec
+        ):
+            if trig.exchange not in move.exchanges:
+                move.exchanges.append(trig.exchange)
+            move.variation = max(move.variation, trig.variation)
+            return None
+        move = Move(trig.symbol, trig.direction, trig.variation, trig.ts, [trig.exchange])
+        self.moves[trig.symbol] = move
+        self.wheel.schedule_at(
+            trig.ts + max(merge_sec, ttl_sec), partial(self._expire, move), key=("move", trig.symbol)
+        )
+        return move
@@ -0,0 +1,152 @@
+"""Per-subsystem memory accounting and global budget enforcement.
+
+Chaque structure en mémoire s'enregistre avec un compteur d'entrées, une
+estimation (approximative, sans parcours profond) de sa taille en octets
+et, si elle peut être réduite, une fonction d'éviction et sa politique
+(``least-active``: symboles les moins actifs d'abord, ``oldest``: entrées
+les plus anciennes d'abord).
+
+``enforce`` est appelée périodiquement: au-delà du budget global, les
+structures sont réduites par priorité croissante jusqu'à revenir sous
+``LOW_WATERMARK`` × budget.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+LOW_WATERMARK = 0.9
+
+# tailles CPython 64 bits approximatives
+FLOAT = sys.getsizeof(0.0)
+TUPLE2 = sys.getsizeof((0, 0))
+DICT_SLOT = 100      # entrée de dict (hash, clé, valeur, sur-allocation)
+SYMBOL = 60          # str court, souvent partagé
+DEQUE = sys.getsizeof(deque())
+
+
+def flat_dict_bytes(d: Mapping[Any, Any]) -> int:
+    """Taille d'un dict de scalaires (clés et valeurs comprises)."""
+    return sys.getsizeof(d) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in d.items())
+
+
+def rss_bytes() -> Optional[int]:
+    """RSS du processus (Linux), None si indisponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class Structure:
+    name: str
+    entries: Callable[[], int]
+    nbytes: Callable[[], int]
+    evict: Optional[Callable[[int], int]] = None   # (octets à libérer) -> octets libérés
+    policy: str = ""                               # "least-active" | "oldest" | "" (compté seulement)
+    priority: int = 0                              # plus petit = réduit en premier
+
+
+class MemoryAccount:
+    """Registre des structures et application du budget."""
+
+    def __init__(self) -> None:
+        self.structures: Dict[str, Structure] = {}
+        self.budget = 0                 # octets, 0 = pas de budget
+        self.evicted: Dict[str, int] = {}
+        self.enforcements = 0
+
+    def register(self, structure: Structure) -> None:
+        self.structures[structure.name] = structure
+
+    def report(self) -> List[Tuple[str, int, int]]:
+        """[(nom, entrées, octets)] trié par taille décroissante."""
+        rows = []
+        for s in self.structures.values():
+            try:
+                rows.append((s.name, s.entries(), s.nbytes()))
+            except Exception as e:  # une structure en cours de modification ne bloque pas le rapport
+                logging.debug("memory accounting failed for %s: %s", s.name, e)
+        return sorted(rows, key=lambda r: r[2], reverse=True)
+
+    def total(self) -> int:
+        return sum(b for _, _, b in self.report())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Vue structurée (logs / export)."""
+        return {
+            "budget_bytes": self.budget,
+            "total_bytes": self.total(),
+            "rss_bytes": rss_bytes(),
+            "structures": {name: {"entries": n, "bytes": b} for name, n, b in self.report()},
+            "evicted_bytes": dict(self.evicted),
+        }
+
+    def enforce(self) -> int:
+        """Réduit les structures évictables si le total dépasse le budget; retourne les octets libérés."""
+        if not self.budget:
+            return 0
+        total = self.total()
+        if total <= self.budget:
+            return 0
+        self.enforcements += 1
+        need = total - int(self.budget * LOW_WATERMARK)
+        freed = 0
+        for s in sorted(self.structures.values(), key=lambda s: s.priority):
+            if s.evict is None or freed >= need:
+                continue
+            got = s.evict(need - freed)
+            if got:
+                self.evicted[s.name] = self.evicted.get(s.name, 0) + got
+                freed += got
+        logging.warning(
+            "memory budget exceeded (%s > %s): freed %s",
+            fmt_bytes(total), fmt_bytes(self.budget), fmt_bytes(freed),
+        )
+        return freed
+
+    def summary(self) -> str:
+        total = self.total()
+        budget = f" / {fmt_bytes(self.budget)}" if self.budget else ""
+        rss = rss_bytes()
+        rss_str = f", rss {fmt_bytes(rss)}" if rss is not None else ""
+        return f"{fmt_bytes(total)}{budget}{rss_str}, {self.enforcements} evictions"
+
+    def table(self) -> str:
+        lines = [f"{name:<16} {n:>8} {fmt_bytes(b):>9}" for name, n, b in self.report()]
+        return "\n".join(lines)
+
+
+def fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+def evict_by_rank(
+    keys_ranked: List[Any],
+    size_of: Callable[[Any], int],
+    drop: Callable[[Any], None],
+    nbytes: int,
+) -> int:
+    """Retire les clés dans l'ordre donné jusqu'à libérer *nbytes*; retourne les octets libérés."""
+    freed = 0
+    for key in keys_ranked:
+        if freed >= nbytes:
+            break
+        size = size_of(key)
+        drop(key)
+        freed += size
+    return freed
+
+
+MEMORY = MemoryAccount()
@@ -0,0 +1,210 @@
+"""Multi-timeframe pump/dump detection over one shared hierarchical window.
+
+Chaque (symbole, exchange) garde des buckets min/max à quelques résolutions
+(par défaut 1s, 10s, 60s). Chaque timeframe lit le niveau le plus fin qui
+la couvre en au plus ``MAX_BUCKETS`` buckets:
+
+- par tick: mise à jour du bucket courant de chaque niveau, puis pour chaque
+  timeframe combinaison O(1) d'un agrégat en cache + bucket courant
+- à chaque changement de bucket d'un niveau: recalcul de l'agrégat des
+  timeframes de ce niveau (au plus ``MAX_BUCKETS`` buckets)
+
+Ajouter une timeframe ne coûte donc presque rien par tick. Le début de
+fenêtre est arrondi à la résolution du niveau (fenêtre effective entre
+``W - res`` et ``W``).
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+LEVELS: Tuple[int, ...] = (1, 10, 60)
+MAX_BUCKETS = 120
+
+# champs d'un bucket
+_START, _FTS, _FIRST, _LO, _HI, _LTS, _LAST = range(7)
+_FIELDS = 7
+_INF = math.inf
+
+
+class Timeframe(NamedTuple):
+    window_sec: int
+    threshold_pct: float
+
+
+def parse_timeframes(spec: str) -> List[Timeframe]:
+    """"180:5,3600:12" -> [Timeframe(180, 5.0), Timeframe(3600, 12.0)]."""
+    out: List[Timeframe] = []
+    for part in spec.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        window, _, threshold = part.partition(":")
+        out.append(Timeframe(int(window), float(threshold)))
+    return out
+
+
+class WindowPlan:
+    """Plan partagé: niveau et taille de ring de chaque timeframe."""
+
+    def __init__(self, timeframes: Iterable[Timeframe], levels: Sequence[int] = LEVELS) -> None:
+        self.timeframes = sorted(set(timeframes))
+        if not self.timeframes:
+            raise ValueError("at least one timeframe is required")
+        self.levels = sorted(levels)
+        self.tf_level: List[int] = []
+        for tf in self.timeframes:
+            lvl = next(
+                (i for i, res in enumerate(self.levels) if tf.window_sec / res <= MAX_BUCKETS),
+                len(self.levels) - 1,
+            )
+            self.tf_level.append(lvl)
+        # seuls les niveaux utilisés sont alloués
+        self.slots: Dict[int, int] = {}
+        for tf, lvl in zip(self.timeframes, self.tf_level):
+            need = math.ceil(tf.window_sec / self.levels[lvl]) + 1
+            self.slots[lvl] = max(self.slots.get(lvl, 0), need)
+        self.max_window = max(tf.window_sec for tf in self.timeframes)
+
+
+class _Level:
+    __slots__ = ("res", "slots", "data", "head", "count")
+
+    def __init__(self, res: int, slots: int) -> None:
+        self.res = res
+        self.slots = slots
+        self.data = array("d", [0.0]) * (slots * _FIELDS)
+        self.head = -1
+        self.count = 0
+
+    def add(self, ts: float, price: float) -> bool:
+        """Ajoute un tick; retourne True si un nouveau bucket a été ouvert."""
+        start = float(int(ts // self.res) * self.res)
+        d = self.data
+        if self.head >= 0:
+            base = self.head * _FIELDS
+            if start <= d[base + _START]:
+                # même bucket (ou tick en retard, rangé dans le bucket courant)
+                if price < d[base + _LO]:
+                    d[base + _LO] = price
+                if price > d[base + _HI]:
+                    d[base + _HI] = price
+                d[base + _LTS] = ts
+                d[base + _LAST] = price
+                return False
+        self.head = (self.head + 1) % self.slots
+        self.count = min(self.count + 1, self.slots)
+        base = self.head * _FIELDS
+        d[base:base + _FIELDS] = array("d", (start, ts, price, price, price, ts, price))
+        return True
+
+    def bucket(self, back: int) -> int:
+        """Offset du bucket *back* positions avant la tête."""
+        return ((self.head - back) % self.slots) * _FIELDS
+
+
+class MultiWindow:
+    """Fenêtre hiérarchique d'un (symbole, exchange), partagée par toutes les timeframes."""
+
+    def __init__(self, plan: WindowPlan) -> None:
+        self.plan = plan
+        self.levels: Dict[int, _Level] = {
+            lvl: _Level(plan.levels[lvl], n) for lvl, n in plan.slots.items()
+        }
+        n = len(plan.timeframes)
+        # agrégat des buckets complets (lo, hi, first) par timeframe
+        self._cache: List[Optional[Tuple[float, float, float]]] = [None] * n
+        self._valid = [False] * n
+        self._armed_from = [-_INF] * n
+
+    def __len__(self) -> int:
+        return sum(lv.count for lv in self.levels.values())
+
+    def nbytes(self) -> int:
+        """Taille approximative (buffers des niveaux + agrégats)."""
+        return sum(lv.data.buffer_info()[1] * lv.data.itemsize for lv in self.levels.values()) + 400
+
+    def clear(self) -> None:
+        for lvl, lv in self.levels.items():
+            self.levels[lvl] = _Level(lv.res, lv.slots)
+        n = len(self.plan.timeframes)
+        self._cache = [None] * n
+        self._valid = [False] * n
+        self._armed_from = [-_INF] * n
+
+    def _recompute(self, i: int, lv: _Level) -> None:
+        tf = self.plan.timeframes[i]
+        d = lv.data
+        head_start = d[lv.bucket(0) + _START]
+        floor = max(head_start - tf.window_sec + lv.res, self._armed_from[i])
+        lo, hi, first = _INF, -_INF, None
+        for back in range(1, lv.count):
+            base = lv.bucket(back)
+            if d[base + _START] < floor:
+                break
+            if d[base + _LO] < lo:
+                lo = d[base + _LO]
+            if d[base + _HI] > hi:
+                hi = d[base + _HI]
+            first = d[base + _FIRST]
+        self._cache[i] = (lo, hi, first) if first is not None else None
+        self._valid[i] = True
+
+    def add(
+        self, ts: float, price: float, detect: bool = True, scale: float = 1.0
+    ) -> List[Tuple[Timeframe, float, str]]:
+        """Ajoute un tick; retourne [(timeframe, variation, direction)] déclenchées.
+
+        *scale* multiplie les seuils (< 1: seuils resserrés pour un symbole suivi).
+        """
+        for lvl, lv in self.levels.items():
+            if lv.add(ts, price):
+                for i, tf_lvl in enumerate(self.plan.tf_level):
+                    if tf_lvl == lvl:
+                        self._valid[i] = False
+        if not detect:
+            return []
+        hits: List[Tuple[Timeframe, float, str]] = []
+        for i, tf in enumerate(self.plan.timeframes):
+            lv = self.levels[self.plan.tf_level[i]]
+            d = lv.data
+            head = lv.bucket(0)
+            if d[head + _START] < self._armed_from[i]:
+                continue
+            if not self._valid[i]:
+                self._recompute(i, lv)
+            lo, hi = d[head + _LO], d[head + _HI]
+            first = d[head + _FIRST]
+            cached = self._cache[i]
+            if cached is not None:
+                lo, hi, first = min(lo, cached[0]), max(hi, cached[1]), cached[2]
+            if lo <= 0:
+                continue
+            variation = (hi - lo) / lo * 100.0
+            if variation < tf.threshold_pct * scale:
+                continue
+            direction = "up" if d[head + _LAST] > first else "down"
+            hits.append((tf, variation, direction))
+            # réarme la timeframe à partir du bucket suivant
+            self._armed_from[i] = d[head + _START] + lv.res
+            self._cache[i] = None
+            self._valid[i] = False
+        return hits
+
+    def points(self) -> List[Tuple[float, float]]:
+        """Ticks représentatifs (first, min, max, last par bucket) du niveau le plus long.
+
+        Rejouer ces points via ``add`` reconstruit les mêmes buckets (snapshot).
+        """
+        lvl = max(self.levels, key=lambda k: self.levels[k].res * self.levels[k].slots)
+        lv = self.levels[lvl]
+        d = lv.data
+        out: List[Tuple[float, float]] = []
+        for back in range(lv.count - 1, -1, -1):
+            base = lv.bucket(back)
+            fts, lts = d[base + _FTS], d[base + _LTS]
+            for pt in ((fts, d[base + _FIRST]), (fts, d[base + _LO]), (fts, d[base + _HI]), (lts, d[base + _LAST])):
+                if not out or out[-1] != pt:
+                    out.append(pt)
+        return out
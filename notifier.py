@@ -1,8 +1,10 @@
 """Telegram notification helper (Aiogram)."""
 from __future__ import annotations
 import logging
-from aiogram import Bot
-from aiogram.types import FSInputFile
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # aiogram n'est importé qu'au premier envoi
+    from aiogram import Bot
 
 async def send_text(bot: Bot, chat_id: int | str, text: str, parse_mode: str = "HTML"):
     try:
@@ -18,6 +20,7 @@ async def send_photo_with_caption(
     parse_mode: str = "HTML",
 ):
     try:
+        from aiogram.types import FSInputFile
         photo = FSInputFile(photo_path)
         await bot.send_photo(chat_id=chat_id, photo=photo, caption=caption, parse_mode=parse_mode)
     except Exception as exc:  # pragma: no cover
@@ -0,0 +1,177 @@
+"""Incremental Bybit ``orderbook.50`` books for recently triggered symbols.
+
+Abonnement paresseux: un carnet n'est suivi que pour les symboles ayant
+déclenché récemment (``touch``) ou présents dans la watchlist, et il est
+désabonné après ``idle_sec`` sans nouveau déclenchement (coût socket et
+mémoire borné).
+
+Chaque côté est un dict prix -> quantité plus une liste triée des prix
+(``bisect``): le meilleur prix est en bout de liste, et la profondeur
+cumulée est tenue à jour par différence à chaque niveau modifié. Imbalance
+et spread sont donc O(1) en lecture; une mise à jour coûte O(log n) + le
+décalage d'une liste d'au plus 50 niveaux.
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEPTH = 50
+IDLE_SEC = 900.0
+STALE_SEC = 30.0
+
+
+class _Side:
+    __slots__ = ("levels", "prices", "depth")
+
+    def __init__(self) -> None:
+        self.levels: Dict[float, float] = {}
+        self.prices: List[float] = []   # croissant
+        self.depth = 0.0                # somme des quantités (notionnel de base)
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self.prices.clear()
+        self.depth = 0.0
+
+    def set(self, price: float, qty: float) -> None:
+        old = self.levels.get(price)
+        if qty <= 0.0:
+            if old is None:
+                return
+            del self.levels[price]
+            del self.prices[bisect_left(self.prices, price)]
+            self.depth -= old
+            return
+        if old is None:
+            insort(self.prices, price)
+            self.depth += qty
+        else:
+            self.depth += qty - old
+        self.levels[price] = qty
+
+
+class OrderBook:
+    """Carnet d'un symbole, reconstruit depuis snapshot + deltas."""
+
+    __slots__ = ("symbol", "bids", "asks", "update_id", "ts")
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.bids = _Side()
+        self.asks = _Side()
+        self.update_id = 0
+        self.ts = 0.0
+
+    def apply(self, msg_type: str, data: Dict[str, Any], ts: float) -> None:
+        # u == 1: Bybit redémarre le carnet, à traiter comme un snapshot
+        if msg_type == "snapshot" or data.get("u") == 1:
+            self.bids.clear()
+            self.asks.clear()
+        for side, rows in ((self.bids, data.get("b") or ()), (self.asks, data.get("a") or ())):
+            for price, qty in rows:
+                side.set(float(price), float(qty))
+        self.update_id = int(data.get("u") or self.update_id)
+        self.ts = ts
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.prices[-1] if self.bids.prices else None
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.prices[0] if self.asks.prices else None
+
+    def imbalance(self) -> Optional[float]:
+        """(bids - asks) / (bids + asks) ∈ [-1, 1] sur la profondeur suivie."""
+        total = self.bids.depth + self.asks.depth
+        if total <= 0.0:
+            return None
+        return (self.bids.depth - self.asks.depth) / total
+
+    def spread_pct(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        mid = (bid + ask) / 2.0
+        return (ask - bid) / mid * 100.0 if mid else None
+
+
+class BookManager:
+    """Suivi paresseux des carnets: demandes, abonnements, expiration."""
+
+    def __init__(self, depth: int = DEPTH, idle_sec: float = IDLE_SEC) -> None:
+        self.depth = depth
+        self.idle_sec = idle_sec
+        self.books: Dict[str, OrderBook] = {}
+        self.watchlist: Set[str] = set()
+        self.wanted: Dict[str, float] = {}      # symbole -> dernière activité
+        self.subscribed: Set[str] = set()
+
+    def topic(self, symbol: str) -> str:
+        return f"orderbook.{self.depth}.{symbol}"
+
+    def set_watchlist(self, symbols: Iterable[str]) -> None:
+        self.watchlist = set(symbols)
+
+    def touch(self, symbol: str, now: float | None = None) -> None:
+        """Le symbole vient de déclencher: (re)demande son carnet."""
+        self.wanted[symbol] = time.time() if now is None else now
+
+    def reset(self) -> None:
+        """Reconnexion: tous les abonnements sont à refaire."""
+        self.subscribed.clear()
+        self.books.clear()
+
+    def sync(self, now: float | None = None) -> Tuple[List[str], List[str]]:
+        """(à abonner, à désabonner) pour atteindre l'ensemble voulu."""
+        now = time.time() if now is None else now
+        for symbol, last in list(self.wanted.items()):
+            if now - last > self.idle_sec:
+                del self.wanted[symbol]
+        target = self.watchlist | self.wanted.keys()
+        subscribe = sorted(target - self.subscribed)
+        unsubscribe = sorted(self.subscribed - target)
+        self.subscribed = set(target)
+        for symbol in unsubscribe:
+            self.books.pop(symbol, None)
+        return subscribe, unsubscribe
+
+    def on_message(self, topic: str, msg_type: str, data: Dict[str, Any], ts: float) -> None:
+        symbol = topic.rsplit(".", 1)[1]
+        if symbol not in self.subscribed:
+            return  # message tardif après désabonnement
+        book = self.books.get(symbol)
+        if book is None:
+            if msg_type != "snapshot":
+                return  # delta sans snapshot: on attend le suivant
+            book = self.books[symbol] = OrderBook(symbol)
+        book.apply(msg_type, data, ts)
+
+    def imbalance(self, symbol: str, now: float | None = None) -> Optional[float]:
+        """Imbalance du carnet si suivi et frais, sinon None."""
+        book = self.books.get(symbol)
+        now = time.time() if now is None else now
+        if book is None or now - book.ts > STALE_SEC:
+            return None
+        return book.imbalance()
+
+    def spread_pct(self, symbol: str, now: float | None = None) -> Optional[float]:
+        book = self.books.get(symbol)
+        now = time.time() if now is None else now
+        if book is None or now - book.ts > STALE_SEC:
+            return None
+        return book.spread_pct()
+
+    def levels(self) -> int:
+        return sum(len(b.bids.levels) + len(b.asks.levels) for b in self.books.values())
+
+    def nbytes(self) -> int:
+        # par niveau: entrée de dict + float prix/quantité + slot de la liste triée
+        return len(self.books) * 600 + self.levels() * 160
+
+    def summary(self) -> str:
+        levels = self.levels()
+        return f"{len(self.subscribed)} subscribed, {len(self.books)} live, {levels} levels"
+
+
+BOOKS = BookManager()
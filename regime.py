@@ -0,0 +1,201 @@
+"""Market-regime filter from vectorized cross-sectional returns.
+
+Pendant un mouvement mené par BTC, des centaines d'alts franchissent le
+seuil ensemble. Chaque seconde, ``RegimeEngine.step`` calcule en une passe
+NumPy le rendement de tous les symboles suivis sur l'horizon de détection,
+estime la composante marché (médiane transversale) et la dispersion.
+Un déclenchement dont l'excès sur le marché reste faible est considéré
+comme « marché » et peut être supprimé ou déclassé avant l'enrichissement.
+``RegimeSet`` tient un moteur par timeframe de détection: un déclenchement
+est comparé au marché sur l'horizon de la fenêtre qui l'a produit.
+
+Les derniers prix sont écrits dans un vecteur (O(1) par tick); toutes les
+``step_sec`` secondes ce vecteur est copié dans un ring ``(slots, n)``.
+
+NumPy est optionnel: en son absence le moteur est inactif (aucun filtrage).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+SLOTS = 120
+MIN_SYMBOLS = 20
+TREND_PCT = 1.0      # |marché| au-delà duquel le régime est directionnel
+
+
+class Regime(NamedTuple):
+    market_pct: float      # rendement médian (points de %)
+    breadth: float         # part des symboles dans le sens du marché
+    dispersion_pct: float  # écart absolu médian autour du marché
+    n: int
+
+    @property
+    def label(self) -> str:
+        if self.market_pct >= TREND_PCT:
+            return "risk-on"
+        if self.market_pct <= -TREND_PCT:
+            return "risk-off"
+        return "calme"
+
+
+def market_move(direction: str, market_pct: float | None, excess_pct: float | None, min_excess_pct: float) -> bool:
+    """Mouvement porté par le marché: régime directionnel dans le même sens, excès faible."""
+    if market_pct is None or excess_pct is None:
+        return False
+    sign = 1.0 if direction == "up" else -1.0
+    return market_pct * sign >= TREND_PCT and excess_pct * sign < min_excess_pct
+
+
+def market_share(direction: str, variation: float, market_pct: float | None) -> float:
+    """Part (0..1) du mouvement du symbole expliquée par le marché."""
+    if market_pct is None or not variation:
+        return 0.0
+    sign = 1.0 if direction == "up" else -1.0
+    return min(max(market_pct * sign / abs(variation), 0.0), 1.0)
+
+
+class RegimeEngine:
+    """Rendements transversaux de tous les symboles d'un exchange."""
+
+    def __init__(self, horizon_sec: int, slots: int = SLOTS, min_symbols: int = MIN_SYMBOLS) -> None:
+        self.horizon_sec = horizon_sec
+        self.slots = slots
+        self.step_sec = max(1.0, horizon_sec / (slots - 1))
+        self.min_symbols = min_symbols
+        self.index: Dict[str, int] = {}
+        self.regime: Optional[Regime] = None
+        self.returns = None
+        self._cap = 0
+        self._last = None
+        self._ring = None
+        self._ring_ts = None
+        self._head = -1
+        self._count = 0
+        self._next_sample = 0.0
+        self._oldest = 0
+        if np is None:
+            logging.warning("numpy not installed, market-regime filter disabled")
+        else:
+            self._grow(256)
+
+    def _grow(self, cap: int) -> None:
+        last = np.full(cap, np.nan)
+        ring = np.full((self.slots, cap), np.nan)
+        if self._cap:
+            last[:self._cap] = self._last
+            ring[:, :self._cap] = self._ring
+        else:
+            self._ring_ts = np.zeros(self.slots)
+        self._last, self._ring, self._cap = last, ring, cap
+
+    def update(self, symbol: str, price: float) -> None:
+        if np is None:
+            return
+        i = self.index.get(symbol)
+        if i is None:
+            i = self.index[symbol] = len(self.index)
+            if i >= self._cap:
+                self._grow(self._cap * 2)
+        self._last[i] = price
+
+    def step(self, now: float) -> Optional[Regime]:
+        """Échantillonne si besoin puis recalcule rendements et régime (une passe)."""
+        if np is None or not self.index:
+            return None
+        if now >= self._next_sample:
+            self._head = (self._head + 1) % self.slots
+            self._count = min(self._count + 1, self.slots)
+            self._ring[self._head] = self._last
+            self._ring_ts[self._head] = now
+            self._next_sample = now + self.step_sec
+        # ligne la plus ancienne encore dans l'horizon (à défaut: la précédente)
+        oldest = (self._head - min(1, self._count - 1)) % self.slots
+        for back in range(self._count - 1, 0, -1):
+            row = (self._head - back) % self.slots
+            if now - self._ring_ts[row] <= self.horizon_sec:
+                oldest = row
+                break
+        self._oldest = oldest
+        n = len(self.index)
+        ref = self._ring[oldest, :n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = (self._last[:n] / ref - 1.0) * 100.0
+        self.returns = r
+        valid = r[np.isfinite(r)]
+        if valid.size < self.min_symbols:
+            self.regime = None
+            return None
+        market = float(np.median(valid))
+        same = np.sign(valid) == np.sign(market) if market else np.zeros(valid.size, bool)
+        self.regime = Regime(
+            market_pct=market,
+            breadth=float(same.mean()),
+            dispersion_pct=float(np.median(np.abs(valid - market))),
+            n=int(valid.size),
+        )
+        return self.regime
+
+    def excess_pct(self, symbol: str) -> Optional[float]:
+        """Rendement du symbole (prix courant) moins la composante marché, sur l'horizon."""
+        i = self.index.get(symbol)
+        if self.regime is None or i is None:
+            return None
+        ref = float(self._ring[self._oldest, i])
+        if not ref > 0.0:
+            return None  # symbole apparu après la ligne de référence
+        return (float(self._last[i]) / ref - 1.0) * 100.0 - self.regime.market_pct
+
+    def nbytes(self) -> int:
+        if np is None or not self._cap:
+            return 0
+        return self._last.nbytes + self._ring.nbytes + self._ring_ts.nbytes + len(self.index) * 160
+
+    def summary(self) -> str:
+        if np is None:
+            return "n/a (numpy missing)"
+        g = self.regime
+        if g is None:
+            return f"warming up ({len(self.index)} symbols)"
+        return (
+            f"{g.label} (market {g.market_pct:+.2f}%, breadth {g.breadth:.0%}, "
+            f"dispersion {g.dispersion_pct:.2f}%, {g.n} symbols)"
+        )
+
+
+class RegimeSet:
+    """Un ``RegimeEngine`` par horizon (fenêtres des timeframes de détection)."""
+
+    def __init__(self, horizons: Iterable[int]) -> None:
+        self.engines: Dict[int, RegimeEngine] = {h: RegimeEngine(h) for h in sorted(set(horizons))}
+
+    def __len__(self) -> int:
+        return max((len(e.index) for e in self.engines.values()), default=0)
+
+    def engine(self, horizon_sec: int) -> RegimeEngine:
+        """Moteur de l'horizon *horizon_sec* (à défaut: l'horizon le plus proche)."""
+        engine = self.engines.get(horizon_sec)
+        if engine is None:
+            engine = self.engines[min(self.engines, key=lambda h: abs(h - horizon_sec))]
+        return engine
+
+    def update(self, symbol: str, price: float) -> None:
+        for engine in self.engines.values():
+            engine.update(symbol, price)
+
+    def step(self, now: float) -> None:
+        for engine in self.engines.values():
+            engine.step(now)
+
+    def nbytes(self) -> int:
+        return sum(e.nbytes() for e in self.engines.values())
+
+    def summary(self) -> str:
+        if len(self.engines) == 1:
+            return next(iter(self.engines.values())).summary()
+        return " | ".join(f"{h // 60} min {e.summary()}" for h, e in self.engines.items())
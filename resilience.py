@@ -0,0 +1,231 @@
+"""Resilience layer for REST enrichment sources.
+
+Chaque source REST (funding, plage historique, OI) passe par un ``Source``
+(les liquidations sont une lecture de cache local, appelée directement).
+Les fetchers ``bybit_api`` lèvent ``BybitError`` sur ``retCode`` non nul ou
+liste vide: seules de vraies valeurs sont mises en cache.
+
+- requête couverte (*hedged*): si la première tentative dépasse le
+  percentile ``hedge_pct`` des latences observées, une seconde part en
+  parallèle; la première réponse gagne, l'autre est annulée. Les
+  couvertures sont plafonnées à ``max_hedge_ratio`` des appels.
+- disjoncteur par source: après ``failures`` échecs consécutifs, plus
+  d'appels pendant ``reset_sec``, puis une seule requête de test.
+- *stale-while-revalidate*: la dernière valeur bonne (moins de
+  ``max_stale`` s) est servie avec son âge si l'appel échoue, si le
+  disjoncteur est ouvert, ou s'il dépasse ``stale_after`` s; l'appel en
+  cours continue alors en tâche de fond et rafraîchit le cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+Fetcher = Callable[[Any, str], Awaitable[Any]]
+
+HEDGE_PCT = 0.95
+MIN_SAMPLES = 20
+MAX_HEDGE_RATIO = 0.1
+STALE_AFTER = 2.0
+BREAKER_FAILURES = 5
+BREAKER_RESET = 30.0
+LATENCY_WINDOW = 200
+# âge maximal d'une valeur servie en secours, par source
+MAX_STALE = {"funding": 8 * 3600.0, "price": 7 * 86400.0, "oi": 3600.0}
+
+
+class CircuitOpen(Exception):
+    """Disjoncteur ouvert et aucune valeur de secours."""
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_sec: float = BREAKER_RESET) -> None:
+        self.threshold = failures
+        self.reset_sec = reset_sec
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+
+    def allow(self, now: float) -> bool:
+        if self.opened_at is None:
+            return True
+        if now - self.opened_at >= self.reset_sec:
+            # semi-ouvert: une requête de test, les suivantes attendent son issue
+            self.opened_at = now
+            return True
+        return False
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self, now: float) -> None:
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                self.trips += 1
+            self.opened_at = now
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+
+class Source:
+    """Une source d'enrichissement: latences, disjoncteur, cache de secours."""
+
+    def __init__(
+        self,
+        name: str,
+        hedge_pct: float = HEDGE_PCT,
+        stale_after: float = STALE_AFTER,
+        max_stale: float = 3600.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.name = name
+        self.hedge_pct = hedge_pct
+        self.stale_after = stale_after
+        self.max_stale = max_stale
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.cache: Dict[str, Tuple[float, Any]] = {}
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.stale_served = 0
+        self.errors = 0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(pct * len(ordered)), len(ordered) - 1)]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Délai avant couverture (None: pas assez d'historique ou budget épuisé)."""
+        if self.hedge_pct <= 0 or len(self.latencies) < MIN_SAMPLES:
+            return None
+        if self.hedges >= MAX_HEDGE_RATIO * self.calls:
+            return None
+        return self.percentile(self.hedge_pct)
+
+    async def call(self, fetch: Fetcher, client: Any, symbol: str, now: float | None = None) -> Tuple[Any, float]:
+        """Retourne (valeur, âge en s); âge 0 pour une réponse en direct."""
+        now = time.time() if now is None else now
+        self.calls += 1
+        cached = self.cache.get(symbol)
+        if cached is not None and now - cached[0] > self.max_stale:
+            cached = None
+        if not self.breaker.allow(now):
+            if cached is None:
+                raise CircuitOpen(self.name)
+            return self._stale(cached, now)
+        live = self.inflight.get(symbol)
+        if live is None:
+            live = self.inflight[symbol] = asyncio.ensure_future(self._live(fetch, client, symbol))
+            live.add_done_callback(lambda t: self._settled(symbol, t))
+        # valeur de secours disponible: on n'attend la réponse que stale_after secondes
+        done, _ = await asyncio.wait({live}, timeout=self.stale_after if cached is not None else None)
+        if not done:
+            return self._stale(cached, now)
+        if live.exception() is not None:
+            if cached is None:
+                raise live.exception()
+            return self._stale(cached, now)
+        return live.result(), 0.0
+
+    def _stale(self, cached: Tuple[float, Any], now: float) -> Tuple[Any, float]:
+        self.stale_served += 1
+        return cached[1], max(now - cached[0], 0.0)
+
+    def _settled(self, symbol: str, task: asyncio.Future) -> None:
+        if self.inflight.get(symbol) is task:
+            del self.inflight[symbol]
+        if not task.cancelled():
+            task.exception()    # revalidation de fond: erreur déjà comptée
+
+    async def _live(self, fetch: Fetcher, client: Any, symbol: str) -> Any:
+        start = time.perf_counter()
+        first = asyncio.ensure_future(fetch(client, symbol))
+        attempts = [first]
+        pending = {first}
+        error: Optional[BaseException] = None
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(fetch(client, symbol))
+                    attempts.append(hedge)
+                    pending.add(hedge)
+                pending |= done
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self.latencies.append(time.perf_counter() - start)
+                        self.breaker.success()
+                        self.cache[symbol] = (time.time(), task.result())
+                        return task.result()
+                    error = task.exception()
+            self.errors += 1
+            self.breaker.failure(time.time())
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    def summary(self) -> str:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        lat = f"p50 {p50 * 1000:.0f}ms p95 {p95 * 1000:.0f}ms" if p50 is not None else "no samples"
+        return (
+            f"{self.name} {self.breaker.state} ({lat}, {self.hedges} hedges/{self.hedge_wins} won, "
+            f"{self.stale_served} stale, {self.errors} errors, {self.breaker.trips} trips)"
+        )
+
+
+class SourceSet:
+    """Sources par nom, créées à la demande avec les réglages communs."""
+
+    def __init__(self) -> None:
+        self.sources: Dict[str, Source] = {}
+        self.hedge_pct = HEDGE_PCT
+        self.stale_after = STALE_AFTER
+        self.failures = BREAKER_FAILURES
+        self.reset_sec = BREAKER_RESET
+
+    def configure(self, hedge_pct: float, stale_after: float, failures: int, reset_sec: float) -> None:
+        self.hedge_pct = hedge_pct
+        self.stale_after = stale_after
+        self.failures = failures
+        self.reset_sec = reset_sec
+        for source in self.sources.values():
+            source.hedge_pct = hedge_pct
+            source.stale_after = stale_after
+            source.breaker.threshold = failures
+            source.breaker.reset_sec = reset_sec
+
+    def source(self, name: str) -> Source:
+        source = self.sources.get(name)
+        if source is None:
+            source = self.sources[name] = Source(
+                name, self.hedge_pct, self.stale_after, MAX_STALE.get(name, 3600.0),
+                CircuitBreaker(self.failures, self.reset_sec),
+            )
+        return source
+
+    async def call(self, name: str, fetch: Fetcher, client: Any, symbol: str) -> Tuple[Any, float]:
+        return await self.source(name).call(fetch, client, symbol)
+
+    def nbytes(self) -> int:
+        return sum(len(s.cache) * 200 + len(s.latencies) * 32 for s in self.sources.values())
+
+    def summary(self) -> str:
+        return " | ".join(s.summary() for s in self.sources.values()) or "no calls"
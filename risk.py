@@ -1,5 +1,7 @@
 """Risk and short-scoring utilities."""
-from typing import Sequence
+from __future__ import annotations
+
+from typing import Sequence, Tuple
 
 from utils import pct_change, stddev
 
@@ -34,11 +36,75 @@ def calc_risk_score(pump: bool, oi_delta: bool, divergence: bool, volatility: fl
     return 0.7 * signal_score + 0.3 * vol_score
 
 
+# Poids normalisés qui somment à 1.0
+SHORT_WEIGHTS = {"funding": 0.4, "price": 0.3, "oi": 0.2, "liq": 0.1}
+# Entrées optionnelles (carnet d'ordres, flux agresseur): bonus additifs
+# uniquement; un carnet/flux neutre ou acheteur laisse le score inchangé
+OPTIONAL_WEIGHTS = {"book": 0.1, "flow": 0.1}
+
+
+def short_score_components(
+    funding_rate: float | None,
+    price_position: float | None,
+    oi_delta_pct: float | None,
+    short_liq_ratio: float | None,
+    book_imbalance: float | None = None,
+    flow_imbalance: float | None = None,
+) -> dict[str, float | None]:
+    """Composantes 0..1 du score short (None si l'entrée est inconnue).
+
+    Les clés ``book`` / ``flow`` ne sont présentes que si l'entrée est fournie.
+    """
+    def clamp(x: float) -> float:
+        return min(max(x, 0.0), 1.0)
+
+    comps = {
+        # Funding score: négatif → mieux pour short ; -1% -> 1.0
+        "funding": None if funding_rate is None else clamp(-funding_rate * 100.0),
+        # Price score: plus proche du haut historique → mieux pour short
+        "price": None if price_position is None else clamp(price_position),
+        # OI score: baisse de l'OI (jusqu'à -5%) → 1.0
+        "oi": None if oi_delta_pct is None else clamp(-oi_delta_pct / 5.0),
+        # Liquidations: ratio [0..1]
+        "liq": None if short_liq_ratio is None else clamp(short_liq_ratio),
+    }
+    if book_imbalance is not None:
+        # Carnet: imbalance (bids-asks)/(bids+asks) ∈ [-1,1]; côté ask lourd → mieux pour short
+        comps["book"] = clamp(-book_imbalance)
+    if flow_imbalance is not None:
+        # Flux agresseur: ventes dominantes (CVD négatif) → essoufflement, mieux pour short
+        comps["flow"] = clamp(-flow_imbalance)
+    return comps
+
+
+def _weighted(comps: dict[str, float | None], unknown: float) -> float:
+    weights = {**SHORT_WEIGHTS, **OPTIONAL_WEIGHTS}
+    score = sum(weights[k] * (unknown if v is None else v) for k, v in comps.items())
+    return min(max(score, 0.0), 1.0)
+
+
+def short_score_bounds(
+    funding_rate: float | None = None,
+    price_position: float | None = None,
+    oi_delta_pct: float | None = None,
+    short_liq_ratio: float | None = None,
+    book_imbalance: float | None = None,
+    flow_imbalance: float | None = None,
+) -> Tuple[float, float]:
+    """(min, max) atteignables de calc_short_score: une entrée inconnue vaut 0 ou 1."""
+    comps = short_score_components(
+        funding_rate, price_position, oi_delta_pct, short_liq_ratio, book_imbalance, flow_imbalance
+    )
+    return _weighted(comps, 0.0), _weighted(comps, 1.0)
+
+
 def calc_short_score(
     funding_rate: float,
     price_position: float,
     oi_delta_pct: float,
     short_liq_ratio: float = 0.0,
+    book_imbalance: float | None = None,
+    flow_imbalance: float | None = None,
 ) -> float:
     """Return 0..1 score indicating short opportunity strength.
 
@@ -46,23 +112,10 @@ def calc_short_score(
     price_position: ratio [0..1] (0=plus bas historique, 1=plus haut)
     oi_delta_pct: variation d'OI sur ~1h en points de % (ex: -3.2)
     short_liq_ratio: ratio [0..1] des liq shorts / (longs+shorts)
+    book_imbalance: (bids-asks)/(bids+asks) du carnet, optionnel (None = ignoré)
+    flow_imbalance: (achats-ventes)/total du flux agresseur, optionnel (None = ignoré)
     """
-    # Funding score: négatif → mieux pour short ; -1% -> 1.0
-    funding_score = min(max(-funding_rate * 100.0, 0.0), 1.0)
-
-    # Price score: plus proche du haut historique → mieux pour short
-    price_score = min(max(price_position, 0.0), 1.0)
-
-    # OI score: baisse de l'OI (jusqu'à -5%) → 1.0
-    oi_score = min(max(-oi_delta_pct / 5.0, 0.0), 1.0)
-
-    # Liquidations: ratio [0..1]
-    liq_score = min(max(short_liq_ratio, 0.0), 1.0)
-
-    # Poids normalisés qui somment à 1.0
-    w_funding, w_price, w_oi, w_liq = 0.4, 0.3, 0.2, 0.1
-    score = (w_funding * funding_score
-             + w_price * price_score
-             + w_oi * oi_score
-             + w_liq * liq_score)
-    return min(max(score, 0.0), 1.0)
+    comps = short_score_components(
+        funding_rate, price_position, oi_delta_pct, short_liq_ratio, book_imbalance, flow_imbalance
+    )
+    return _weighted(comps, 0.0)
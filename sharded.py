@@ -0,0 +1,273 @@
+"""Multi-process sharded mode: ``python sharded.py``.
+
+L'univers de symboles est réparti par hash (``fastpath.shard_of``) entre
+``WORKERS`` processus. Chaque worker possède ses abonnements WS et ses
+fenêtres, et envoie les candidats d'alerte par IPC au coordinateur, qui
+garde cooldowns, fusion cross-exchange, caches d'enrichissement et Telegram.
+
+Un worker qui plante est relancé sans impacter les autres. ``app.py`` reste
+le point d'entrée mono-processus.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import replace
+from typing import Any, Dict, List
+
+import httpx
+
+import app
+import bybit_api
+import snapshot
+from config import Config, load_config
+from fastpath import shard_of
+from market_state import Trigger
+
+RESTART_BACKOFF_MAX = 30.0
+RESTART_STABLE_SEC = 60.0   # un worker resté en vie aussi longtemps remet son backoff à zéro
+HEALTH_REPORT_SEC = 5.0
+
+
+# ---- Worker ----
+def worker_main(cfg: Config, index: int, total: int, symbols: List[str], out: Any) -> None:
+    """Point d'entrée d'un processus worker (shard *index* sur *total*)."""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [w{index}] %(message)s")
+    try:
+        asyncio.run(_worker(cfg, index, total, symbols, out))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.shutdown_events()
+
+
+async def _worker(cfg: Config, index: int, total: int, symbols: List[str], out: Any) -> None:
+    mine = [s for s in symbols if shard_of(s, total) == index]
+    app.price_data.configure(cfg.detection_timeframes())
+    app.price_data.on_new_symbol = app.watch_idle
+    # seuils resserrés des symboles suivis (abonnements gérés par le coordinateur)
+    app.configure_subscriptions(cfg)
+    # carnets et flux des symboles du shard: seul le worker a le WS Bybit
+    app.configure_books(cfg, owned=lambda s: shard_of(s, total) == index)
+    # symboles disjoints entre shards: mêmes fichiers d'historique, sans conflit d'écriture
+    app.configure_tickstore(cfg)
+    # un journal par shard (erreurs WS, événements des flux)
+    suffix = f".shard{index}" if cfg.event_log_path else ""
+    app.configure_events(replace(cfg, event_log_path=cfg.event_log_path + suffix))
+    if cfg.snapshot_path:
+        # chaque shard a son propre fichier (fenêtres uniquement)
+        cfg = replace(cfg, snapshot_path=f"{cfg.snapshot_path}.shard{index}")
+        snapshot.load(
+            cfg.snapshot_path, app.price_data, app.last_alert_time, bybit_api._liq_cache,
+            app.price_data.max_window, cfg.cooldown_sec,
+        )
+        app.arm_housekeeping(cfg)
+
+    async def emit(trig: Trigger) -> None:
+        trig.spread = app.price_data.spread_pct(trig.symbol, max_age=cfg.time_window_sec, now=trig.ts)
+        if not app.regime_suppresses(cfg, trig):
+            app.touch_hot(trig)
+        try:
+            out.put_nowait(trig)
+        except queue.Full:
+            logging.warning("IPC queue full, %s trigger dropped", trig.symbol)
+
+    logging.info("worker %d/%d: %d Bybit symbols", index, total, len(mine))
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0)) as http:
+        tasks = []
+        if cfg.use_binance_ws:
+            tasks.append(app.price_monitor_binance(
+                cfg, None, http, perps=symbols or None, emit=emit, shard=(index, total)
+            ))
+        if cfg.use_bybit_ws:
+            tasks.append(app.price_monitor_bybit(cfg, None, http, symbols=mine, emit=emit))
+        if cfg.use_bybit_spot_ws:
+            tasks.append(app.price_monitor_bybit_spot(
+                cfg, None, http, perps=symbols or None, emit=emit, shard=(index, total)
+            ))
+        if cfg.snapshot_path and cfg.snapshot_interval_sec > 0:
+            tasks.append(app.snapshot_loop(cfg))
+        if cfg.regime_filter != "off":
+            # régime estimé sur le shard (échantillon aléatoire de l'univers par hash)
+            tasks.append(app.regime_loop())
+        tasks.append(app.housekeeping_loop())
+        tasks += [app.feed_watchdog_loop(), report_health(index, out)]
+        if cfg.subscriptions_path:
+            tasks.append(app.subscriptions_loop())
+        if app.TICKS.enabled:
+            tasks.append(app.tickstore_loop(cfg))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if cfg.snapshot_path:
+                app.save_snapshot(cfg)
+
+
+async def report_health(index: int, out: Any) -> None:
+    """État des flux du shard, envoyé au coordinateur (qui alerte les opérateurs)."""
+    while True:
+        await asyncio.sleep(HEALTH_REPORT_SEC)
+        try:
+            out.put_nowait(("health", index, app.WATCHDOG.states()))
+        except queue.Full:
+            pass
+
+
+# ---- Coordinator ----
+class Supervisor:
+    """Lance les workers et relance ceux qui meurent.
+
+    Backoff exponentiel par shard sur les plantages consécutifs (``streak``);
+    un worker qui a tenu ``RESTART_STABLE_SEC`` repart d'un délai minimal.
+    """
+
+    def __init__(self, cfg: Config, total: int, symbols: List[str]) -> None:
+        self.cfg = cfg
+        self.total = total
+        self.symbols = symbols
+        self.ctx = mp.get_context("spawn")
+        self.queue = self.ctx.Queue(maxsize=10_000)
+        self.procs: Dict[int, Any] = {}
+        self.restarts: Dict[int, int] = {i: 0 for i in range(total)}
+        self.streak: Dict[int, int] = {i: 0 for i in range(total)}
+        self.started: Dict[int, float] = {i: 0.0 for i in range(total)}
+        self.next_start: Dict[int, float] = {i: 0.0 for i in range(total)}
+
+    def _spawn(self, index: int, now: float) -> None:
+        p = self.ctx.Process(
+            target=worker_main,
+            args=(self.cfg, index, self.total, self.symbols, self.queue),
+            name=f"shard-{index}",
+            daemon=True,
+        )
+        p.start()
+        self.procs[index] = p
+        self.started[index] = now
+
+    def start(self) -> None:
+        now = time.monotonic()
+        for i in range(self.total):
+            self._spawn(i, now)
+
+    def check(self, now: float | None = None) -> None:
+        """Relance les workers morts (appelé périodiquement)."""
+        now = time.monotonic() if now is None else now
+        for i in range(self.total):
+            p = self.procs.get(i)
+            if p is not None and p.is_alive():
+                continue
+            if p is not None:
+                # mort constatée: délai de relance selon les plantages consécutifs
+                del self.procs[i]
+                if now - self.started[i] >= RESTART_STABLE_SEC:
+                    self.streak[i] = 0
+                self.streak[i] += 1
+                self.restarts[i] += 1
+                delay = min(2.0 ** self.streak[i], RESTART_BACKOFF_MAX)
+                self.next_start[i] = now + delay
+                logging.warning("shard %d died (exit %s), restarting in %.0fs", i, p.exitcode, delay)
+            if now >= self.next_start[i]:
+                self._spawn(i, now)
+
+    def stop(self) -> None:
+        for p in self.procs.values():
+            if p.is_alive():
+                p.terminate()
+        for p in self.procs.values():
+            p.join(timeout=5)
+
+    def status(self) -> str:
+        alive = sum(1 for p in self.procs.values() if p.is_alive())
+        return f"{alive}/{self.total} workers alive, restarts={sum(self.restarts.values())}"
+
+
+async def supervise(sup: Supervisor) -> None:
+    while True:
+        sup.check()
+        await asyncio.sleep(1.0)
+
+
+async def consume(cfg: Config, bot: Any, http: httpx.AsyncClient, sup: Supervisor) -> None:
+    """Lit les candidats des workers et les passe à la fusion + enrichissement."""
+    while True:
+        try:
+            trig = await asyncio.to_thread(sup.queue.get, True, 1.0)
+        except queue.Empty:
+            continue
+        if isinstance(trig, tuple):
+            _, index, states = trig
+            app.WATCHDOG.merge(f"s{index}", states)
+            continue
+        # l'enrichissement ne doit pas bloquer la lecture de la file
+        task = asyncio.create_task(app.dispatch_trigger(cfg, bot, http, trig))
+        app._background.add(task)
+        task.add_done_callback(app._background.discard)
+
+
+async def main() -> None:
+    with app.startup.phase("config"):
+        cfg = load_config()
+        app.price_data.configure(cfg.detection_timeframes())
+        app.configure_subscriptions(cfg)
+        # /history lit les fichiers écrits par les workers
+        app.configure_tickstore(cfg)
+        app.configure_events(cfg)
+        # l'enrichissement se fait dans le coordinateur; carnets et flux dans les workers
+        app.configure_enrichment(cfg)
+        app.local_books = False
+    total = max(cfg.workers, 1)
+
+    if cfg.snapshot_path:
+        with app.startup.phase("restore"):
+            # cooldowns + liquidations; les fenêtres sont restaurées par les workers
+            snapshot.load(
+                cfg.snapshot_path, app.price_data, app.last_alert_time, bybit_api._liq_cache,
+                app.price_data.max_window, cfg.cooldown_sec,
+            )
+            app.SUBSCRIPTIONS.seed_cooldowns(app.last_alert_time, cfg.cooldown_sec)
+    app.arm_housekeeping(cfg)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0)) as http:
+        with app.startup.phase("warm_up"):
+            symbols, _ = await asyncio.gather(
+                app.warm_up(cfg, http),
+                asyncio.to_thread(app._import_telegram),
+            )
+        # le coordinateur ne garde pas de fenêtres: seules celles des workers comptent
+        app.price_data.symbols.clear()
+        app.price_data.last_ticks.clear()
+
+        sup = Supervisor(cfg, total, symbols)
+        with app.startup.phase("spawn_workers"):
+            sup.start()
+        app.status_extras.append(lambda: f"• shards: {sup.status()}\n")
+
+        from aiogram import Dispatcher
+
+        bot = app.make_bot(cfg)
+        dp = Dispatcher()
+        app.register_commands(dp, cfg)
+
+        tasks = [
+            app.serve_bot(cfg, bot, dp), supervise(sup), consume(cfg, bot, http, sup),
+            app.feed_alert_loop(cfg, bot),
+        ]
+        if cfg.snapshot_path and cfg.snapshot_interval_sec > 0:
+            tasks.append(app.snapshot_loop(cfg))
+        tasks.append(app.housekeeping_loop())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            sup.stop()
+            if cfg.snapshot_path:
+                app.save_snapshot(cfg)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        app.shutdown_events()
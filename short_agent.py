@@ -1,13 +1,25 @@
 """High level helpers to evaluate short opportunities on Bybit."""
 from __future__ import annotations
 
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
 import httpx
 
-import bybit_api
-from risk import calc_short_score
+from evaluator import Decision, TieredEvaluator
+
+CONCURRENCY = 5
+SYMBOL_TIMEOUT = 8.0
 
+# évaluateur par défaut: son cache de plages historiques est partagé entre les appels
+_default = TieredEvaluator()
 
-async def evaluate_short_symbol(client: httpx.AsyncClient, symbol: str) -> float:
+
+async def evaluate_short_symbol(
+    client: httpx.AsyncClient, symbol: str, evaluator: TieredEvaluator | None = None
+) -> float:
     """Return a 0..1 score estimating short potential for *symbol*.
 
     The score combines four factors:
@@ -16,16 +28,91 @@ async def evaluate_short_symbol(client: httpx.AsyncClient, symbol: str) -> float
     - Position of the current price in its historical range
     - Recent open interest change (falling OI favours shorts)
     - Ratio of short liquidation volume over total liquidations
+
+    Inputs already known locally (ticker stream, liquidation cache, cached
+    range) are reused; the missing ones are fetched concurrently.
     """
+    d = await (evaluator or _default).complete(client, symbol)
+    return d.score
+
+
+@dataclass
+class ShortResult:
+    symbol: str
+    decision: Optional[Decision]
+    elapsed: float
+    error: str = ""
+
+    @property
+    def score(self) -> float:
+        return self.decision.score if self.decision is not None else -1.0
+
+
+def parse_symbols(args: Iterable[str], watchlists: Dict[str, List[str]]) -> List[str]:
+    """Symboles et/ou noms de watchlist -> liste de symboles sans doublons (ordre conservé)."""
+    out: Dict[str, None] = {}
+    for arg in args:
+        for part in arg.replace(",", " ").split():
+            named = watchlists.get(part.lower())
+            for symbol in named if named is not None else [part]:
+                out[symbol.upper()] = None
+    return list(out)
+
+
+async def evaluate_many(
+    client: httpx.AsyncClient,
+    symbols: List[str],
+    evaluator: TieredEvaluator | None = None,
+    concurrency: int = CONCURRENCY,
+    timeout: float = SYMBOL_TIMEOUT,
+) -> List[ShortResult]:
+    """Évalue *symbols* en parallèle (au plus *concurrency* à la fois), triés par score décroissant.
+
+    Chaque symbole a son propre délai: un symbole lent rend un score partiel
+    sans retarder les autres.
+    """
+    ev = evaluator or _default
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(symbol: str) -> ShortResult:
+        async with sem:
+            start = time.perf_counter()
+            try:
+                d = await ev.complete(client, symbol, timeout)
+            except Exception as e:
+                return ShortResult(symbol, None, time.perf_counter() - start, str(e) or type(e).__name__)
+            return ShortResult(symbol, d, time.perf_counter() - start)
+
+    results = await asyncio.gather(*(one(s) for s in symbols))
+    return sorted(results, key=lambda r: r.score, reverse=True)
 
-    funding = await bybit_api.get_current_funding_rate(client, symbol)
-    _, _, oi_delta_pct = await bybit_api.get_oi_1h_change(client, symbol)
-    pmin, pmax, last_close, _, _ = await bybit_api.get_alltime_range(client, symbol)
-    ratio, _ = bybit_api.historical_position_label(last_close, pmin, pmax)
 
-    long_liq, short_liq = await bybit_api.get_liquidation_stats(client, symbol)
-    total = long_liq + short_liq
-    short_liq_ratio = short_liq / total if total else 0.0
+def _fmt(value: Optional[float], spec: str) -> str:
+    return "n/a" if value is None else format(value, spec)
 
-    return calc_short_score(funding, ratio, oi_delta_pct, short_liq_ratio)
 
+def format_table(results: List[ShortResult], elapsed: float) -> str:
+    """Tableau texte (à placer dans un bloc <pre>)."""
+    lines = [f"{'symbol':<14} {'score':>6} {'fund%':>7} {'pos':>5} {'OI%':>6} {'liqS':>5} {'ms':>5}"]
+    for r in results:
+        ms = f"{r.elapsed * 1000:.0f}"
+        d = r.decision
+        if d is None:
+            lines.append(f"{r.symbol:<14} {'error':>6} {r.error[:30]}")
+            continue
+        score = f"{d.score:.2f}" if d.complete else f"≥{d.score:.2f}"
+        if d.stale:
+            score += "*"
+        funding = d.funding * 100 if d.funding is not None else None
+        lines.append(
+            f"{r.symbol:<14} {score:>6} {_fmt(funding, '+.3f'):>7} {_fmt(d.position, '.2f'):>5} "
+            f"{_fmt(d.oi_delta_pct, '+.1f'):>6} {_fmt(d.liq_ratio, '.2f'):>5} {ms:>5}"
+        )
+    slow = sum(1 for r in results if r.decision is not None and r.decision.reason == "timeout")
+    footer = f"{len(results)} symbols in {elapsed:.2f}s"
+    if slow:
+        footer += f" ({slow} partial: timeout)"
+    stale = sum(1 for r in results if r.decision is not None and r.decision.stale)
+    if stale:
+        footer += f" (*{stale} with cached inputs)"
+    return "\n".join(lines + [footer])
@@ -0,0 +1,204 @@
+"""Warm restart: snapshot binaire compact de l'état en mémoire.
+
+Structures sauvegardées:
+
+- fenêtres de prix par exchange (``SymbolIndex``)
+- cooldowns d'alerte (``last_alert_time``)
+- cache des liquidations (``bybit_api._LiqCache``)
+
+Format (little-endian)::
+
+    header   : b"CRSN" | u16 version | f64 created_at
+    section  : u32 count, puis ``count`` enregistrements
+    str      : u16 len | utf-8
+    window   : str symbol | str exchange | u32 n | n * (f64 ts, f64 price)
+               (points représentatifs des buckets, cf. ``MultiWindow.points``)
+    cooldown : str symbol | f64 ts
+    liq      : str symbol | u32 n | n * i64 ts_ms | n * u8 side | n * f64 qty
+
+Le fichier est écrit atomiquement (tmp + rename) et relu via ``mmap``.
+"""
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections import deque
+from typing import Any, Dict, Tuple
+
+from market_state import SymbolIndex
+
+MAGIC = b"CRSN"
+VERSION = 1
+_HEADER = struct.Struct("<4sHd")
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_F64 = struct.Struct("<d")
+
+_SIDES = {"sell": 0, "buy": 1}
+_SIDE_NAMES = ("Sell", "Buy", "")
+
+
+def _pack_str(out: bytearray, s: str) -> None:
+    raw = s.encode("utf-8")
+    out += _U16.pack(len(raw))
+    out += raw
+
+
+def _read_str(buf: Any, off: int) -> Tuple[str, int]:
+    (n,) = _U16.unpack_from(buf, off)
+    off += _U16.size
+    return bytes(buf[off:off + n]).decode("utf-8"), off + n
+
+
+def _read_array(buf: Any, off: int, typecode: str, n: int) -> Tuple[array, int]:
+    arr = array(typecode)
+    size = arr.itemsize * n
+    arr.frombytes(buf[off:off + size])
+    return arr, off + size
+
+
+def dumps(index: SymbolIndex, cooldowns: Dict[str, float], liq_cache: Any, now: float | None = None) -> bytes:
+    """Sérialise l'état en bytes."""
+    now = time.time() if now is None else now
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, now))
+
+    windows = [
+        (sym, ex, pts)
+        for sym, by_ex in index.symbols.items()
+        for ex, win in by_ex.items()
+        if (pts := win.points())
+    ]
+    out += _U32.pack(len(windows))
+    for sym, ex, pts in windows:
+        _pack_str(out, sym)
+        _pack_str(out, ex)
+        out += _U32.pack(len(pts))
+        flat = array("d")
+        for ts, price in pts:
+            flat.append(ts)
+            flat.append(price)
+        out += flat.tobytes()
+
+    out += _U32.pack(len(cooldowns))
+    for sym, ts in cooldowns.items():
+        _pack_str(out, sym)
+        out += _F64.pack(ts)
+
+    with liq_cache.lock:
+        liqs = [(sym, list(dq)) for sym, dq in liq_cache.by_symbol.items() if dq]
+    out += _U32.pack(len(liqs))
+    for sym, rows in liqs:
+        _pack_str(out, sym)
+        out += _U32.pack(len(rows))
+        out += array("q", (r[0] for r in rows)).tobytes()
+        out += array("B", (_SIDES.get((r[1] or "").lower(), 2) for r in rows)).tobytes()
+        out += array("d", (r[2] for r in rows)).tobytes()
+    return bytes(out)
+
+
+def write(path: str, data: bytes) -> int:
+    """Écrit *data* de façon atomique (tmp + rename) et retourne sa taille."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def save(path: str, index: SymbolIndex, cooldowns: Dict[str, float], liq_cache: Any) -> int:
+    """Sérialise puis écrit le snapshot; retourne sa taille en octets."""
+    return write(path, dumps(index, cooldowns, liq_cache))
+
+
+def loads_into(
+    buf: Any,
+    index: SymbolIndex,
+    cooldowns: Dict[str, float],
+    liq_cache: Any,
+    window_sec: float,
+    cooldown_sec: float,
+    now: float | None = None,
+) -> Dict[str, int]:
+    """Restaure *buf* dans les structures fournies.
+
+    Les données plus vieilles que leur fenêtre respective sont ignorées.
+    Retourne le nombre d'entrées restaurées par structure.
+    """
+    now = time.time() if now is None else now
+    magic, version, _created = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"unsupported snapshot ({magic!r} v{version})")
+    off = _HEADER.size
+    counts = {"ticks": 0, "cooldowns": 0, "liquidations": 0}
+
+    price_cutoff = now - window_sec
+    (n_windows,) = _U32.unpack_from(buf, off)
+    off += _U32.size
+    for _ in range(n_windows):
+        sym, off = _read_str(buf, off)
+        ex, off = _read_str(buf, off)
+        (n,) = _U32.unpack_from(buf, off)
+        off += _U32.size
+        flat, off = _read_array(buf, off, "d", 2 * n)
+        ticks = [(flat[i], flat[i + 1]) for i in range(0, 2 * n, 2) if flat[i] >= price_cutoff]
+        for ts, price in ticks:
+            index.seed(ex, sym, ts, price)
+        counts["ticks"] += len(ticks)
+
+    (n_cool,) = _U32.unpack_from(buf, off)
+    off += _U32.size
+    for _ in range(n_cool):
+        sym, off = _read_str(buf, off)
+        (ts,) = _F64.unpack_from(buf, off)
+        off += _F64.size
+        if now - ts < cooldown_sec and ts > cooldowns.get(sym, 0.0):
+            cooldowns[sym] = ts
+            counts["cooldowns"] += 1
+
+    liq_cutoff_ms = int((now - liq_cache.window_sec) * 1000)
+    (n_liq,) = _U32.unpack_from(buf, off)
+    off += _U32.size
+    for _ in range(n_liq):
+        sym, off = _read_str(buf, off)
+        (n,) = _U32.unpack_from(buf, off)
+        off += _U32.size
+        ts_arr, off = _read_array(buf, off, "q", n)
+        side_arr, off = _read_array(buf, off, "B", n)
+        qty_arr, off = _read_array(buf, off, "d", n)
+        rows = [
+            (ts_arr[i], _SIDE_NAMES[min(side_arr[i], 2)], qty_arr[i])
+            for i in range(n)
+            if ts_arr[i] >= liq_cutoff_ms
+        ]
+        if not rows:
+            continue
+        with liq_cache.lock:
+            dq = liq_cache.by_symbol[sym]
+            # les liquidations reçues depuis le démarrage restent après l'historique
+            liq_cache.by_symbol[sym] = deque(rows + list(dq))
+        counts["liquidations"] += len(rows)
+    return counts
+
+
+def load(
+    path: str,
+    index: SymbolIndex,
+    cooldowns: Dict[str, float],
+    liq_cache: Any,
+    window_sec: float,
+    cooldown_sec: float,
+) -> Dict[str, int] | None:
+    """Charge le snapshot *path* via mmap. Retourne None si absent ou illisible."""
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return loads_into(mm, index, cooldowns, liq_cache, window_sec, cooldown_sec)
+    except FileNotFoundError:
+        return None
+    except (ValueError, struct.error, OSError) as e:
+        logging.warning("snapshot %s ignored: %s", path, e)
+        return None
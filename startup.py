@@ -0,0 +1,47 @@
+"""Startup timing breakdown (per phase) and "all feeds live" tracking."""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class StartupTimer:
+    """Mesure la durée de chaque phase de démarrage et l'arrivée des feeds."""
+
+    def __init__(self) -> None:
+        self.t0 = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.marks: Dict[str, float] = {}
+        self.expected_feeds: set[str] = set()
+        self.all_live_at: float | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def record(self, name: str, seconds: float) -> None:
+        """Enregistre une phase mesurée ailleurs (ex: tâche de fond)."""
+        self.phases.append((name, seconds))
+
+    def expect_feeds(self, feeds: Iterable[str]) -> None:
+        self.expected_feeds = set(feeds)
+
+    def mark_live(self, feed: str) -> None:
+        """Marque *feed* comme actif (seule la première occurrence compte)."""
+        if feed in self.marks:
+            return
+        self.marks[feed] = time.perf_counter() - self.t0
+        if self.all_live_at is None and self.expected_feeds <= set(self.marks):
+            self.all_live_at = self.marks[feed]
+            logging.info("🚀 all feeds live in %.2fs | %s", self.all_live_at, self.report())
+
+    def report(self) -> str:
+        parts = [f"{name}={sec * 1000:.0f}ms" for name, sec in self.phases]
+        parts += [f"{feed} live@{sec:.2f}s" for feed, sec in self.marks.items()]
+        return ", ".join(parts)
@@ -1,9 +1,12 @@
 """In-memory application state."""
 from collections import deque
-from typing import Deque, Dict, Iterable, Tuple
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from timerwheel import WHEEL
 
 PRICE_HISTORY: Dict[str, Deque[Tuple[float, float]]] = {}
 OI_HISTORY: Dict[str, Deque[Tuple[float, float]]] = {}
+FUNDING_HISTORY: Dict[str, Deque[Tuple[float, float]]] = {}
 LAST_ALERT: Dict[str, float] = {}
 
 
@@ -22,6 +25,10 @@ def update_oi(symbol: str, oi: float, ts: float, max_age: float) -> None:
     _update(OI_HISTORY, symbol, oi, ts, max_age)
 
 
+def update_funding(symbol: str, rate: float, ts: float, max_age: float) -> None:
+    _update(FUNDING_HISTORY, symbol, rate, ts, max_age)
+
+
 def get_prices(symbol: str) -> Iterable[float]:
     return [p for _, p in PRICE_HISTORY.get(symbol, [])]
 
@@ -30,10 +37,17 @@ def get_ois(symbol: str) -> Iterable[float]:
     return [v for _, v in OI_HISTORY.get(symbol, [])]
 
 
+def get_fundings(symbol: str) -> Iterable[float]:
+    return [v for _, v in FUNDING_HISTORY.get(symbol, [])]
+
+
 def can_notify(symbol: str, now: float, cooldown: float) -> bool:
     last = LAST_ALERT.get(symbol)
     return last is None or now - last >= cooldown
 
 
-def mark_notified(symbol: str, now: float) -> None:
+def mark_notified(symbol: str, now: float, cooldown: Optional[float] = None) -> None:
     LAST_ALERT[symbol] = now
+    if cooldown is not None:
+        # cooldown écoulé = plus d'entrée (can_notify renvoie True dans les deux cas)
+        WHEEL.schedule_at(now + cooldown, lambda: LAST_ALERT.pop(symbol, None), key=("state.cooldown", symbol))
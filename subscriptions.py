@@ -0,0 +1,280 @@
+"""Per-user alert subscriptions behind a symbol -> subscribers inverted index.
+
+Chaque utilisateur autorisé a un abonnement: watchlist (vide = tous les
+symboles), seuil de variation, direction et score short minimal. Par
+défaut (aucun réglage) il reçoit tout, au seuil global: comportement
+historique.
+
+- ``candidates``: destinataires d'un déclenchement en O(abonnés du
+  symbole + abonnés « tous symboles »), sans parcourir tous les utilisateurs
+- seuls les symboles explicitement suivis avec un seuil plus bas que le
+  seuil global voient leur détection resserrée (``detection_scale``); un
+  abonné « tous symboles » ne peut pas descendre sous le seuil global
+- cooldown par (utilisateur, symbole), expiré par la roue de timers
+
+Les abonnements sont persistés en JSON (écriture atomique); en mode shardé
+les workers relisent le fichier quand il change pour leurs seuils.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from timerwheel import WHEEL
+
+DIRECTIONS = ("both", "up", "down")
+
+
+@dataclass
+class Subscription:
+    user_id: int
+    symbols: Set[str] = field(default_factory=set)   # vide = tous les symboles
+    threshold_pct: Optional[float] = None            # None = seuil global
+    direction: str = "both"                          # "both" | "up" | "down"
+    min_score: Optional[float] = None                # None = seuil de l'évaluateur
+
+    @property
+    def default(self) -> bool:
+        return not self.symbols and self.threshold_pct is None \
+            and self.direction == "both" and self.min_score is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "symbols": sorted(self.symbols),
+            "threshold_pct": self.threshold_pct,
+            "direction": self.direction,
+            "min_score": self.min_score,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Subscription":
+        return cls(
+            int(d["user_id"]),
+            set(d.get("symbols") or ()),
+            d.get("threshold_pct"),
+            d.get("direction") or "both",
+            d.get("min_score"),
+        )
+
+
+class SubscriptionIndex:
+    """Abonnements par utilisateur et index inversé symbole -> utilisateurs."""
+
+    def __init__(self, base_threshold: float = 8.0) -> None:
+        self.base_threshold = base_threshold
+        self.users: Dict[int, Subscription] = {}
+        self.by_symbol: Dict[str, Set[int]] = {}
+        self.wildcard: Set[int] = set()
+        self.sent: Dict[Tuple[int, str], float] = {}
+        self.path = ""
+        self.mtime = 0.0
+        # seuil de détection d'un symbole modifié: (symbole, facteur)
+        self.on_scale: Optional[Callable[[str, float], None]] = None
+
+    # ---- gestion ----
+    def configure(self, base_threshold: float, users: Iterable[int], path: str = "") -> None:
+        """Seuil global, utilisateurs autorisés et fichier de persistance."""
+        self.base_threshold = base_threshold
+        self.path = path
+        if path:
+            self.load()
+        allowed = set(users)
+        for uid in list(self.users):
+            if uid not in allowed:
+                self._unindex(self.users.pop(uid))
+        for uid in allowed:
+            self.get(uid)
+
+    def get(self, uid: int) -> Subscription:
+        sub = self.users.get(uid)
+        if sub is None:
+            sub = self.users[uid] = Subscription(uid)
+            self._index(sub)
+        return sub
+
+    def _index(self, sub: Subscription) -> None:
+        if not sub.symbols:
+            self.wildcard.add(sub.user_id)
+        for symbol in sub.symbols:
+            self.by_symbol.setdefault(symbol, set()).add(sub.user_id)
+
+    def _unindex(self, sub: Subscription) -> None:
+        self.wildcard.discard(sub.user_id)
+        for symbol in sub.symbols:
+            watchers = self.by_symbol.get(symbol)
+            if watchers is not None:
+                watchers.discard(sub.user_id)
+                if not watchers:
+                    del self.by_symbol[symbol]
+
+    def _update(self, uid: int, change: Callable[[Subscription], None]) -> Subscription:
+        sub = self.get(uid)
+        before = set(sub.symbols)
+        self._unindex(sub)
+        change(sub)
+        self._index(sub)
+        self._rescale(before | sub.symbols)
+        self.save()
+        return sub
+
+    def watch(self, uid: int, symbols: Iterable[str]) -> Subscription:
+        return self._update(uid, lambda s: s.symbols.update(symbols))
+
+    def unwatch(self, uid: int, symbols: Iterable[str] | None = None) -> Subscription:
+        """Retire des symboles (``None``: tous, retour à « tous symboles »)."""
+        if symbols is None:
+            return self._update(uid, lambda s: s.symbols.clear())
+        return self._update(uid, lambda s: s.symbols.difference_update(symbols))
+
+    def set_threshold(self, uid: int, pct: Optional[float]) -> Subscription:
+        return self._update(uid, lambda s: setattr(s, "threshold_pct", pct))
+
+    def set_direction(self, uid: int, direction: str) -> Subscription:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        return self._update(uid, lambda s: setattr(s, "direction", direction))
+
+    def set_min_score(self, uid: int, score: Optional[float]) -> Subscription:
+        return self._update(uid, lambda s: setattr(s, "min_score", score))
+
+    # ---- seuils ----
+    def scale(self, sub: Subscription) -> float:
+        """Facteur appliqué aux seuils des timeframes pour cet utilisateur."""
+        if sub.threshold_pct is None or self.base_threshold <= 0:
+            return 1.0
+        scale = sub.threshold_pct / self.base_threshold
+        # resserrement réservé aux symboles explicitement suivis
+        return scale if sub.symbols else max(scale, 1.0)
+
+    def detection_scale(self, symbol: str) -> float:
+        watchers = self.by_symbol.get(symbol, ())
+        return min([1.0] + [self.scale(self.users[uid]) for uid in watchers])
+
+    def _rescale(self, symbols: Iterable[str]) -> None:
+        if self.on_scale is None:
+            return
+        for symbol in symbols:
+            self.on_scale(symbol, self.detection_scale(symbol))
+
+    def apply_scales(self) -> None:
+        """Pousse les seuils resserrés de tous les symboles suivis vers la détection."""
+        self._rescale(list(self.by_symbol))
+
+    # ---- résolution ----
+    def watchers(self, symbol: str) -> Iterator[int]:
+        """Abonnés à tout puis abonnés du symbole, sans doublon ni ensemble temporaire."""
+        wildcard = self.wildcard
+        yield from wildcard
+        for uid in self.by_symbol.get(symbol, ()):
+            if uid not in wildcard:
+                yield uid
+
+    def candidates(
+        self,
+        symbol: str,
+        direction: str,
+        variation: float,
+        tf_threshold: float,
+        now: float,
+        cooldown: float,
+    ) -> List[Subscription]:
+        """Abonnés concernés par ce mouvement (direction, seuil, hors cooldown)."""
+        out = []
+        for uid in self.watchers(symbol):
+            sub = self.users[uid]
+            if sub.direction != "both" and sub.direction != direction:
+                continue
+            if variation < tf_threshold * self.scale(sub):
+                continue
+            last = self.sent.get((uid, symbol))
+            if last is not None and now - last < cooldown:
+                continue
+            out.append(sub)
+        return out
+
+    def mark_sent(self, uid: int, symbol: str, now: float, cooldown: float) -> None:
+        key = (uid, symbol)
+        self.sent[key] = now
+        WHEEL.schedule_at(now + cooldown, lambda: self.sent.pop(key, None), key=("subs.cooldown", key))
+
+    def seed_cooldowns(self, last_alert: Dict[str, float], cooldown: float) -> None:
+        """Après restauration: les symboles alertés récemment restent en cooldown pour leurs abonnés."""
+        for symbol, ts in last_alert.items():
+            for uid in self.watchers(symbol):
+                self.mark_sent(uid, symbol, ts, cooldown)
+
+    # ---- persistance ----
+    def save(self) -> None:
+        if not self.path:
+            return
+        data = [s.to_dict() for s in self.users.values() if not s.default]
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+            self.mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            logging.warning("subscriptions save failed: %s", e)
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                rows = json.load(f)
+            self.mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning("subscriptions load failed: %s", e)
+            return False
+        before = set(self.by_symbol)
+        self.users.clear()
+        self.by_symbol.clear()
+        self.wildcard.clear()
+        for row in rows:
+            sub = Subscription.from_dict(row)
+            self.users[sub.user_id] = sub
+            self._index(sub)
+        self._rescale(before | set(self.by_symbol))
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Relit le fichier s'il a été modifié par un autre processus."""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        return mtime != self.mtime and self.load()
+
+    # ---- rapports ----
+    def nbytes(self) -> int:
+        symbols = sum(len(s.symbols) for s in self.users.values())
+        return len(self.users) * 400 + symbols * 160 + len(self.sent) * 200
+
+    def describe(self, uid: int) -> str:
+        sub = self.get(uid)
+        symbols = ", ".join(sorted(sub.symbols)) if sub.symbols else "tous"
+        threshold = f"{sub.threshold_pct:.2f}%" if sub.threshold_pct is not None else \
+            f"global ({self.base_threshold:.2f}%)"
+        min_score = f"{sub.min_score:.2f}" if sub.min_score is not None else "défaut"
+        return (
+            f"Symboles: {symbols}\nSeuil: {threshold}\n"
+            f"Direction: {sub.direction}\nScore short min: {min_score}"
+        )
+
+    def summary(self) -> str:
+        custom = sum(1 for s in self.users.values() if not s.default)
+        tight = sum(1 for sym in self.by_symbol if self.detection_scale(sym) < 1.0)
+        return (
+            f"{len(self.users)} users ({custom} custom), {len(self.by_symbol)} watched symbols "
+            f"({tight} tighter), {len(self.sent)} cooldowns"
+        )
+
+
+SUBSCRIPTIONS = SubscriptionIndex()
@@ -0,0 +1,95 @@
+"""Helpers partagés par les tests qui importent ``app``.
+
+``stub_missing_dependencies`` remplace par des modules factices les
+dépendances réseau / Telegram absentes (httpx, websockets, aiogram), à
+appeler avant ``import app``. Une dépendance installée n'est jamais
+remplacée.
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+import types
+
+from config import Config
+
+
+def _missing(name: str) -> bool:
+    if name in sys.modules:
+        return False
+    return importlib.util.find_spec(name) is None
+
+
+def stub_missing_dependencies() -> None:
+    if _missing("httpx"):
+        httpx_stub = types.ModuleType("httpx")
+        httpx_stub.AsyncClient = object
+        httpx_stub.Timeout = object
+        sys.modules["httpx"] = httpx_stub
+
+    if _missing("websockets"):
+        sys.modules["websockets"] = types.ModuleType("websockets")
+
+    if _missing("aiogram"):
+        aiogram_stub = types.ModuleType("aiogram")
+        aiogram_stub.Bot = object
+        aiogram_stub.Dispatcher = object
+        sys.modules["aiogram"] = aiogram_stub
+
+        enums_stub = types.ModuleType("aiogram.enums")
+
+        class ParseMode:
+            HTML = "HTML"
+        enums_stub.ParseMode = ParseMode
+        sys.modules["aiogram.enums"] = enums_stub
+
+        default_stub = types.ModuleType("aiogram.client.default")
+
+        class DefaultBotProperties:
+            def __init__(self, *args, **kwargs):
+                pass
+        default_stub.DefaultBotProperties = DefaultBotProperties
+        client_pkg = types.ModuleType("aiogram.client")
+        client_pkg.default = default_stub
+        sys.modules["aiogram.client.default"] = default_stub
+        sys.modules["aiogram.client"] = client_pkg
+
+        filters_stub = types.ModuleType("aiogram.filters")
+
+        def Command(*args, **kwargs):
+            pass
+        filters_stub.Command = Command
+        sys.modules["aiogram.filters"] = filters_stub
+
+        types_stub = types.ModuleType("aiogram.types")
+
+        class Message:
+            from_user = types.SimpleNamespace(id=0)
+            text = ""
+
+            async def answer(self, *args, **kwargs):
+                pass
+        types_stub.Message = Message
+
+        class FSInputFile:
+            def __init__(self, *args, **kwargs):
+                pass
+        types_stub.FSInputFile = FSInputFile
+        sys.modules["aiogram.types"] = types_stub
+
+
+def make_config() -> Config:
+    return Config(
+        telegram_bot_token="",
+        authorized_users={1},
+        threshold_percent=5.0,
+        time_window_sec=60,
+        cooldown_sec=0,
+        require_oi_confirm=False,
+        confirm_oi_pct=1.0,
+        use_binance_ws=False,
+        use_bybit_ws=False,
+        enable_coinglass_capture=False,
+        chromedriver_path=None,
+        chrome_user_data=None,
+    )
@@ -1,77 +1,8 @@
-import pytest
-
-import sys
-import types
-
-
-# Stub external dependencies to import app without installing packages
-httpx_stub = types.ModuleType("httpx")
-httpx_stub.AsyncClient = object
-httpx_stub.Timeout = object
-sys.modules.setdefault("httpx", httpx_stub)
-
-websockets_stub = types.ModuleType("websockets")
-sys.modules.setdefault("websockets", websockets_stub)
-
-aiogram_stub = types.ModuleType("aiogram")
-aiogram_stub.Bot = object
-aiogram_stub.Dispatcher = object
-sys.modules.setdefault("aiogram", aiogram_stub)
-
-enums_stub = types.ModuleType("aiogram.enums")
-class ParseMode:
-    HTML = "HTML"
-enums_stub.ParseMode = ParseMode
-sys.modules.setdefault("aiogram.enums", enums_stub)
-
-default_stub = types.ModuleType("aiogram.client.default")
-class DefaultBotProperties:
-    def __init__(self, *args, **kwargs):
-        pass
-default_stub.DefaultBotProperties = DefaultBotProperties
-client_pkg = types.ModuleType("aiogram.client")
-client_pkg.default = default_stub
-sys.modules.setdefault("aiogram.client.default", default_stub)
-sys.modules.setdefault("aiogram.client", client_pkg)
-
-filters_stub = types.ModuleType("aiogram.filters")
-def Command(*args, **kwargs):
-    pass
-filters_stub.Command = Command
-sys.modules.setdefault("aiogram.filters", filters_stub)
-
-types_stub = types.ModuleType("aiogram.types")
-class Message:
-    from_user = types.SimpleNamespace(id=0)
-    text = ""
-    async def answer(self, *args, **kwargs):
-        pass
-types_stub.Message = Message
-class FSInputFile:
-    def __init__(self, *args, **kwargs):
-        pass
-types_stub.FSInputFile = FSInputFile
-sys.modules.setdefault("aiogram.types", types_stub)
-
-import app
-from config import Config
-
-
-def make_config() -> Config:
-    return Config(
-        telegram_bot_token="",
-        authorized_users={1},
-        threshold_percent=5.0,
-        time_window_sec=60,
-        cooldown_sec=0,
-        require_oi_confirm=False,
-        confirm_oi_pct=1.0,
-        use_binance_ws=False,
-        use_bybit_ws=False,
-        enable_coinglass_capture=False,
-        chromedriver_path=None,
-        chrome_user_data=None,
-    )
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
 
 
 def test_handle_alert_filters_by_short_score(monkeypatch):
@@ -134,3 +65,251 @@ def test_handle_alert_filters_by_short_score(monkeypatch):
     asyncio.run(run_low())
     assert not messages, "Alert should be suppressed when score <= 0.50"
 
+
+
+def test_warm_up_seeds_windows_and_subscribes(monkeypatch):
+    import asyncio
+    cfg = make_config()
+    subscribed = []
+
+    async def fake_symbols(http):
+        return ["AAAUSDT", "BBBUSDT"]
+
+    async def fake_tickers(http):
+        return {"AAAUSDT": {"lastPrice": "1.5"}, "BBBUSDT": {"lastPrice": "x"}}
+
+    monkeypatch.setattr(app.bybit_api, "fetch_usdt_perp_symbols", fake_symbols)
+    monkeypatch.setattr(app.bybit_api, "fetch_linear_tickers", fake_tickers)
+    monkeypatch.setattr(app.bybit_api, "start_liquidation_ws", lambda: None)
+    monkeypatch.setattr(app.bybit_api, "warm_subscribe_liquidations", subscribed.extend)
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex())
+
+    async def run():
+        symbols = await app.warm_up(cfg, http=None)
+        await asyncio.gather(*app._background)
+        return symbols
+
+    assert asyncio.run(run()) == ["AAAUSDT", "BBBUSDT"]
+    assert app.price_data.last_tick("AAAUSDT", "Bybit")[1] == 1.5
+    assert subscribed == ["AAAUSDT", "BBBUSDT"]
+
+
+def test_tiered_evaluator_prunes_before_rest(monkeypatch):
+    from evaluator import TieredEvaluator
+
+    calls = []
+
+    def fake(name, value):
+        async def _f(http, symbol):
+            calls.append(name)
+            return value
+        return _f
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", fake("funding", 0.01))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", fake("price", (1.0, 3.0, 1.2, 0, 0)))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", fake("oi", (100.0, 110.0, 10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", fake("liq", (90.0, 10.0)))
+
+    import asyncio
+
+    ev = TieredEvaluator()
+    # funding défavorable + position basse: la borne haute tombe sous le seuil
+    d = asyncio.run(ev.evaluate(None, "PRUNEUSDT", "up"))
+    assert not d.passed
+    assert calls == ["funding", "price", "oi"]  # liquidations jamais récupérées
+    assert ev.pruned == 1 and ev.enriched == 0
+
+    # OI requis: récupéré en premier, et rejet immédiat s'il ne confirme pas
+    calls.clear()
+    d = asyncio.run(ev.evaluate(None, "OIUSDT", "down", require_oi_confirm=True, confirm_oi_pct=1.0))
+    assert not d.passed and "OI" in d.reason
+    assert calls == ["oi"]
+
+    # funding très favorable: décision acquise sans autre appel
+    calls.clear()
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", fake("funding", -0.01))
+    d = asyncio.run(ev.evaluate(None, "GOODUSDT", "up"))
+    assert d.passed and not d.complete
+    assert calls == ["funding"]
+    assert ev.enriched == 1
+
+
+def test_required_oi_unavailable_does_not_confirm(monkeypatch):
+    import asyncio
+    from evaluator import TieredEvaluator
+
+    async def broken(http, symbol):
+        raise RuntimeError("bybit 502")
+
+    async def favorable(http, symbol):
+        return -0.01
+
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", broken)
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", favorable)
+    ev = TieredEvaluator()
+    d = asyncio.run(ev.evaluate(None, "NOOIUSDT", "up", require_oi_confirm=True, confirm_oi_pct=1.0))
+    assert not d.passed and "OI unavailable" in d.reason
+    assert d.fetched == ["oi"]
+    # sans exigence d'OI, l'échec de la source ne bloque pas
+    d = asyncio.run(ev.evaluate(None, "NOOIUSDT", "up"))
+    assert d.passed
+
+
+def test_idle_symbols_are_evicted(monkeypatch):
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex())
+    app.price_data.update("Bybit", "IDLEUSDT", 0.0, 1.0)
+    app._evict_if_idle("IDLEUSDT")
+    assert app.price_data.tracked_count() == 0
+
+    now = app.time.time()
+    app.price_data.update("Bybit", "LIVEUSDT", now, 1.0)
+    app._evict_if_idle("LIVEUSDT")
+    assert app.price_data.tracked_count() == 1
+    # nouvelle échéance posée à last + max_window
+    assert ("idle", "LIVEUSDT") in app.WHEEL.keys
+    app.WHEEL.cancel(("idle", "LIVEUSDT"))
+
+
+def test_handle_alert_routes_to_subscribers(monkeypatch):
+    import asyncio
+
+    from subscriptions import SubscriptionIndex
+
+    cfg = make_config()
+    cfg.authorized_users = {1, 2, 3}
+    subs = SubscriptionIndex()
+    subs.configure(cfg.threshold_percent, cfg.authorized_users)
+    subs.watch(1, ["OTHERUSDT"])         # ne suit pas ce symbole
+    subs.set_min_score(2, 0.99)          # score trop exigeant
+    monkeypatch.setattr(app, "SUBSCRIPTIONS", subs)
+
+    def value(v):
+        async def _f(http, symbol):
+            return v
+        return _f
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", value(-0.01))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", value((100.0, 90.0, -10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", value((10.0, 90.0)))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", value((1.0, 3.0, 2.8, 0, 0)))
+
+    sent = []
+
+    async def fake_send_text(bot, uid, caption, parse_mode=None):
+        sent.append(uid)
+
+    monkeypatch.setattr(app.notifier, "send_text", fake_send_text)
+    asyncio.run(app.handle_alert(cfg, None, None, "ROUTEUSDT", 10.0, "up", "Bybit"))
+    assert sent == [3]
+
+
+def test_alert_volume_comes_from_local_candles_rest_only_while_warming_up(monkeypatch):
+    import asyncio
+
+    def value(v):
+        async def _f(http, symbol):
+            return v
+        return _f
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", value(-0.01))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", value((100.0, 90.0, -10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", value((10.0, 90.0)))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", value((1.0, 3.0, 2.8, 0, 0)))
+    rest = []
+
+    async def fake_volume(http, symbol):
+        rest.append(symbol)
+        return 10.0, 5.0, -50.0, 100.0, 50.0, -50.0
+
+    captions = []
+
+    async def fake_send_text(bot, uid, caption, parse_mode=None):
+        captions.append(caption)
+
+    monkeypatch.setattr(app.bybit_api, "get_volume_1h_change", fake_volume)
+    monkeypatch.setattr(app.notifier, "send_text", fake_send_text)
+    local = (5.0, 15.0, 200.0, 50.0, 150.0, 200.0)
+    asyncio.run(app.handle_alert(make_config(), None, None, "VOLUSDT", 10.0, "up", "Bybit", volume=local))
+    assert not rest and "Volume 1h: <b>+200%</b>" in captions[-1]
+    # pas encore d'historique local: klines REST
+    asyncio.run(app.handle_alert(make_config(), None, None, "VOLUSDT", 10.0, "up", "Bybit"))
+    assert rest == ["VOLUSDT"] and "Volume 1h: <b>-50%</b>" in captions[-1]
+
+
+def test_flat_binance_symbol_keeps_its_anchor_past_the_window(monkeypatch):
+    from exchanges import BinanceAdapter
+    from fastpath import SymbolUniverse
+
+    cfg = make_config()   # fenêtre 60 s, seuil 5%
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex(cfg.detection_timeframes()))
+    adapter = BinanceAdapter(SymbolUniverse(["FLATUSDT"]))
+    triggers = []
+    for ts in range(0, 200, 5):   # prix plat plus longtemps que la fenêtre
+        triggers += app.detect_batch(cfg, adapter.parse([{"s": "FLATUSDT", "c": "100"}], float(ts)))
+    assert triggers == [] and app.price_data.last_seen("FLATUSDT") == 195.0
+    hits = app.detect_batch(cfg, adapter.parse([{"s": "FLATUSDT", "c": "110"}], 200.0))
+    assert [(t.symbol, round(t.variation, 6), t.direction) for t in hits] == [("FLATUSDT", 10.0, "up")]
+
+
+def test_sharded_worker_touches_books_and_forwards_imbalances(monkeypatch):
+    import asyncio
+
+    from market_state import Trigger
+    from orderbook import BookManager
+    from tradeflow import FlowManager
+
+    monkeypatch.setattr(app, "BOOKS", BookManager())
+    monkeypatch.setattr(app, "FLOWS", FlowManager())
+    monkeypatch.setattr(app, "moves", app.MoveMerger())
+    # worker: abonnements demandés sur le shard propriétaire, imbalances jointes
+    trig = Trigger("HOTUSDT", "Bybit", 6.0, "up", 100.0)
+    app.touch_hot(trig)
+    assert "HOTUSDT" in app.BOOKS.wanted and "HOTUSDT" in app.FLOWS.wanted
+    trig.book_imbalance, trig.flow_imbalance = -0.5, -0.2
+
+    # coordinateur: pas de WS Bybit, il ne touche rien et transmet les valeurs du worker
+    monkeypatch.setattr(app, "BOOKS", BookManager())
+    monkeypatch.setattr(app, "local_books", False)
+    seen = []
+
+    async def fake_handle_alert(*args):
+        seen.append(args[-3:])
+
+    trig.volume = (5.0, 15.0, 200.0, 50.0, 150.0, 200.0)
+    monkeypatch.setattr(app, "handle_alert", fake_handle_alert)
+    asyncio.run(app.dispatch_trigger(make_config(), None, None, trig))
+    assert seen == [(-0.5, -0.2, trig.volume)] and not app.BOOKS.wanted
+    d = app.evaluator.local("HOTUSDT", book_imbalance=-0.5, flow_imbalance=-0.2)
+    assert (d.book_imbalance, d.flow_imbalance) == (-0.5, -0.2)
+
+
+def test_downrank_raises_the_score_gate_for_market_moves(monkeypatch):
+    import asyncio
+
+    def value(v):
+        async def _f(http, symbol):
+            return v
+        return _f
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", value(-0.01))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", value((100.0, 90.0, -10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", value((10.0, 90.0)))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", value((1.0, 3.0, 2.8, 0, 0)))
+    monkeypatch.setattr(app.bybit_api, "get_volume_1h_change", value((0.0,) * 6))
+    captions = []
+
+    async def fake_send_text(bot, uid, caption, parse_mode=None):
+        captions.append(caption)
+
+    monkeypatch.setattr(app.notifier, "send_text", fake_send_text)
+    cfg = make_config()
+    cfg.regime_filter = "downrank"
+    # mouvement de 10% entièrement porté par le marché: score minimal relevé à 1
+    asyncio.run(app.handle_alert(cfg, None, None, "MKTUSDT", 10.0, "up", "Bybit", market_pct=10.0, excess_pct=0.0))
+    assert not captions
+    # même score, mouvement propre au symbole: envoyé
+    asyncio.run(app.handle_alert(cfg, None, None, "MKTUSDT", 10.0, "up", "Bybit", market_pct=2.0, excess_pct=8.0))
+    assert captions and "déclassé" not in captions[-1]
+    # part du marché faible: déclassé mais envoyé
+    asyncio.run(app.handle_alert(cfg, None, None, "MKTUSDT", 10.0, "up", "Bybit", market_pct=1.5, excess_pct=3.0))
+    assert len(captions) == 2 and "🌐" in captions[-1] and "déclassé" in captions[-1]
@@ -0,0 +1,57 @@
+from candles import CandleAggregator, CandleSeries
+
+
+def test_series_ohlcv_and_ring() -> None:
+    s = CandleSeries(60, 3)
+    s.update(0.0, 10.0, 1.0)
+    s.update(30.0, 12.0, 2.0)
+    s.update(59.0, 9.0, 1.0)
+    s.update(61.0, 11.0)
+    c = s.get(0.0)
+    assert (c.open, c.high, c.low, c.close, c.volume) == (10.0, 12.0, 9.0, 9.0, 4.0)
+    s.update(125.0, 1.0)
+    s.update(300.0, 2.0)  # trou: n'occupe pas de slot
+    assert [c.ts for c in s.candles()] == [60.0, 120.0, 300.0]
+    assert s.get(0.0) is None
+    assert s.get(180.0) is None
+    assert s.get(120.0).close == 1.0
+    assert [c.ts for c in s.candles(start=100.0, end=200.0)] == [120.0]
+
+
+def _kline(start: int, close: float, volume: float) -> dict:
+    return {
+        "start": start * 1000, "open": "10", "high": str(max(close, 10.0)), "low": "9",
+        "close": str(close), "volume": str(volume), "turnover": str(volume * close),
+    }
+
+
+def test_kline_pushes_replace_the_minute_and_feed_higher_resolutions() -> None:
+    agg = CandleAggregator({60: 10, 300: 4})
+    agg.on_kline("XUSDT", [_kline(0, 11.0, 2.0)])
+    agg.on_kline("XUSDT", [_kline(0, 12.0, 5.0)])      # valeurs cumulées de la minute
+    agg.on_kline("XUSDT", [_kline(60, 10.5, 1.0)])
+    agg.on_kline("XUSDT", [_kline(0, 12.0, 6.0)])      # confirmation en retard de la minute 0
+    assert [(c.ts, c.volume) for c in agg.query("XUSDT", 60)] == [(0.0, 6.0), (60.0, 1.0)]
+    bar = agg.query("XUSDT", 300)[-1]
+    assert (bar.open, bar.high, bar.low, bar.close, bar.volume) == (10.0, 12.0, 9.0, 10.5, 7.0)
+    agg.on_kline("XUSDT", [{"start": "bad"}])           # ligne invalide ignorée
+    assert len(agg.query("XUSDT", 60)) == 2
+
+
+def test_volume_change_needs_an_hour_of_local_history() -> None:
+    agg = CandleAggregator({60: 120, 300: 48})
+    for minute in range(70):
+        agg.on_kline("XUSDT", [_kline(minute * 60, 10.0, 1.0 if minute < 65 else 3.0)])
+    now = 69 * 60 + 30
+    # la première bougie 5 min n'est couverte qu'à partir de 300 s
+    assert agg.volume_change("XUSDT", now) == (5.0, 15.0, 200.0, 50.0, 150.0, 200.0)
+    assert agg.volume_change("XUSDT", now + 3600) is None     # flux arrêté
+    assert agg.volume_change("YUSDT", now) is None
+
+    fresh = CandleAggregator({60: 120, 300: 48})
+    for minute in range(30, 70):
+        fresh.on_kline("XUSDT", [_kline(minute * 60, 10.0, 1.0)])
+    assert fresh.volume_change("XUSDT", now) is None          # warm-up: REST
+
+    agg.resync()                                               # reconnexion
+    assert agg.volume_change("XUSDT", now) is None
@@ -1,4 +1,14 @@
-from detectors import detect_divergence, detect_oi_delta, detect_pump_dump
+import pytest
+
+from detectors import (
+    DetectorPipeline,
+    PumpDumpDetector,
+    detect_divergence,
+    detect_oi_delta,
+    detect_pump_dump,
+)
+from risk import calc_risk_score
+from utils import stddev
 
 
 def test_detect_pump_dump() -> None:
@@ -14,3 +24,32 @@ def test_detect_oi_delta() -> None:
 def test_detect_divergence() -> None:
     assert detect_divergence([100, 110], [100, 90])
     assert not detect_divergence([100, 110], [100, 115])
+
+
+def test_streaming_pump_dump_edge_triggered() -> None:
+    det = PumpDumpDetector(window_sec=60, threshold_pct=8)
+    assert det.update("price", "X", 0.0, 100.0) is None
+    ev = det.update("price", "X", 1.0, 108.0)
+    assert ev is not None and ev.detector == "pump_dump"
+    # déjà actif: pas de nouvel événement
+    assert det.update("price", "X", 2.0, 109.0) is None
+    # la fenêtre glisse: l'ancrage de 100 sort après 60s
+    assert det.update("price", "X", 70.0, 109.0) is None
+    assert det.active["X"] is False
+    assert det.calls == 4 and det.ns_per_tick > 0
+
+
+def test_pipeline_matches_batch_detectors() -> None:
+    pipe = DetectorPipeline.default(window_sec=600, pump_pct=8, oi_pct=3)
+    prices, ois = [100.0, 104.0, 110.0], [100.0, 98.0, 90.0]
+    for t, (p, oi) in enumerate(zip(prices, ois)):
+        pipe.on_oi("X", float(t), oi)
+        pipe.on_price("X", float(t), p)
+    assert pipe.signals("X") == {
+        "pump_dump": detect_pump_dump(prices, 8),
+        "oi_delta": detect_oi_delta(ois, 3),
+        "divergence": detect_divergence(prices, ois),
+    }
+    vol = pipe.volatility["X"].value()
+    assert vol == pytest.approx(stddev([4.0, 600 / 104]), rel=1e-6)
+    assert pipe.risk_score("X") == pytest.approx(calc_risk_score(True, True, True, vol))
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import logging.handlers
+
+from eventlog import EventLog, RateLimit, install_queue_logging, read_events
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+from evaluator import Decision  # noqa: E402
+
+
+def test_rate_limit_refills_over_time() -> None:
+    limit = RateLimit(2.0)
+    assert [limit.allow(10.0) for _ in range(3)] == [True, True, False]
+    assert limit.allow(10.5) and not limit.allow(10.5)
+
+
+def test_sampling_and_limits_never_apply_to_alert_decisions() -> None:
+    log = EventLog("unused.jsonl", sample={"merged": 0.5, "alert": 0.0}, limits={"ws_error": 1.0, "alert": 1.0},
+                   rng=iter([0.1, 0.9] * 10).__next__)
+    assert [log.emit("merged", i=i) for i in range(4)] == [True, False, True, False]
+    assert [log.emit("ws_error") for _ in range(3)] == [True, False, False]
+    assert all(log.emit("alert", i=i) for i in range(5))
+    assert log.sampled_out == 2 and log.limited == 2
+    assert log.counts == {"merged": 2, "ws_error": 1, "alert": 5}
+    # désactivé: rien n'est mis en file
+    assert not EventLog().emit("alert")
+
+
+def test_full_queue_drops_instead_of_blocking() -> None:
+    log = EventLog("unused.jsonl", queue_size=2)
+    assert [log.emit("alert") for _ in range(3)] == [True, True, False]
+    assert log.dropped == 1
+
+
+def test_writer_thread_appends_jsonl(tmp_path) -> None:
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path)
+    log.start()
+    log.emit("alert", symbol="BTCUSDT", score=0.7, inputs={"funding": -0.001, "position": None})
+    log.emit("trigger_merged", symbol="ETHUSDT")
+    log.close()
+    assert log.written == 2
+    with open(path, "ab") as f:
+        f.write(b'{"kind": "alert", "trunc')   # ligne partielle (arrêt brutal)
+    events = list(read_events(path, "alert"))
+    assert len(events) == 1 and events[0]["ts"] > 0
+    assert events[0]["inputs"] == {"funding": -0.001, "position": None}
+
+
+def test_writer_rotates_by_size_and_keeps_backups(tmp_path) -> None:
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path, max_bytes=1, backups=2)
+    for i in range(4):
+        log._write(b'{"kind":"alert","i":%d}\n' % i)
+    assert log.rotations == 3
+    assert [e["i"] for e in read_events(path)] == [3]
+    assert [e["i"] for e in read_events(path + ".1")] == [2]
+    assert [e["i"] for e in read_events(path + ".2")] == [1]
+    assert not (tmp_path / "events.jsonl.3").exists()
+
+
+def test_event_log_is_off_by_default() -> None:
+    assert make_config().event_log_path == ""
+
+
+def test_queue_logging_moves_handlers_behind_a_queue(tmp_path) -> None:
+    root = logging.getLogger()
+    before = list(root.handlers)
+    path = tmp_path / "app.log"
+    handler = logging.FileHandler(path)
+    root.addHandler(handler)
+    listener = install_queue_logging()
+    try:
+        assert all(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers)
+        root.warning("queued line")
+    finally:
+        listener.stop()
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        for h in before:
+            root.addHandler(h)
+        handler.close()
+    assert "queued line" in path.read_text()
+
+
+def test_alert_decisions_are_recorded_and_replayable(monkeypatch):
+    cfg = make_config()
+    log = EventLog("unused.jsonl")
+    monkeypatch.setattr(app, "EVENTS", log)
+    monkeypatch.setattr(app, "evaluator", app.TieredEvaluator())
+
+    def fake(value):
+        async def _f(http, symbol):
+            return value
+        return _f
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", fake(0.01))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", fake((1.0, 3.0, 1.2, 0, 0)))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", fake((100.0, 110.0, 10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", fake((90.0, 10.0)))
+    app.last_alert_time = {}
+    asyncio.run(app.handle_alert(
+        cfg, bot=None, http=None, symbol="AUDITUSDT", variation=7.0, direction="up", exchange="Bybit",
+    ))
+    event = log.queue.get_nowait()
+    assert event["kind"] == "alert" and event["symbol"] == "AUDITUSDT"
+    assert not event["passed"] and event["recipients"] == []
+    assert event["inputs"]["funding"] == 0.01
+    # rejeu: le score se recalcule à partir des seules entrées enregistrées
+    assert Decision("AUDITUSDT", False, "replay", **event["inputs"]).score == event["score"]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from exchanges import SYMBOLS, BinanceAdapter, BybitLinearAdapter, BybitSpotAdapter, ExchangeAdapter, TickBatch
+from fastpath import SymbolUniverse
+from feedhealth import WATCHDOG
+from ticker_state import TICKERS
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+
+
+def test_binance_frames_become_batches() -> None:
+    adapter = BinanceAdapter(SymbolUniverse(["AAAUSDT", "BBBUSDT"]))
+    frame = [
+        {"s": "AAAUSDT", "c": "1.5"},
+        {"s": "BBBUSDT", "c": "2.0"},
+        {"s": "ZZZUSDT", "c": "9.0"},   # hors univers
+    ]
+    batch = adapter.parse(frame, 10.0)
+    assert batch.exchange == "Binance"
+    assert batch.symbols() == ["AAAUSDT", "BBBUSDT"]
+    assert list(batch.prices) == [1.5, 2.0] and list(batch.ts) == [10.0, 10.0]
+    assert batch.seen == 3 and batch.skipped == 1
+    assert list(batch.ids) == [SYMBOLS.intern("AAAUSDT"), SYMBOLS.intern("BBBUSDT")]
+    # prix inchangé: sans détection, mais gardé pour rafraîchir la fenêtre
+    again = adapter.parse([{"s": "AAAUSDT", "c": "1.5"}, {"s": "BBBUSDT", "c": "2.1"}], 11.0)
+    assert again.symbols() == ["BBBUSDT"] and again.skipped == 1
+    assert list(again.held_ids) == [SYMBOLS.intern("AAAUSDT")] and list(again.held_prices) == [1.5]
+
+
+def test_binance_watchlist_widens_while_bybit_is_down() -> None:
+    adapter = BinanceAdapter(SymbolUniverse(["AAAUSDT"]), fallback=SymbolUniverse(["AAAUSDT", "CCCUSDT"]))
+    health = WATCHDOG.feed("bybit")
+    health.on_connect(100.0)
+    health.on_message(100.0)
+    assert adapter.parse([{"s": "CCCUSDT", "c": "1"}], 101.0).symbols() == []
+    health.on_disconnect(102.0)
+    assert adapter.parse([{"s": "CCCUSDT", "c": "1"}], 103.0).symbols() == ["CCCUSDT"]
+    del WATCHDOG.feeds["bybit"]
+
+
+def test_bybit_linear_adapter_routes_ticker_state_and_oi() -> None:
+    oi = []
+    adapter = BybitLinearAdapter(["DDDUSDT"], on_oi=lambda s, ts, v: oi.append((s, v)))
+    batch = adapter.parse({
+        "topic": "tickers.DDDUSDT", "type": "snapshot",
+        "data": {"symbol": "DDDUSDT", "lastPrice": "3.0", "openInterest": "1000", "fundingRate": "0.0001"},
+    }, 5.0)
+    assert batch.symbols() == ["DDDUSDT"] and list(batch.prices) == [3.0]
+    assert oi == [("DDDUSDT", 1000.0)]
+    assert TICKERS.funding("DDDUSDT", 5.0) == 0.0001
+    # delta sans lastPrice: état ticker mis à jour, aucun tick
+    delta = adapter.parse({"topic": "tickers.DDDUSDT", "type": "delta", "data": {"fundingRate": "0.0002"}}, 6.0)
+    assert len(delta) == 0 and delta.skipped == 1
+    assert adapter.parse({"op": "pong"}, 6.0) is None
+
+
+def test_bybit_linear_adapter_builds_candles_from_klines(monkeypatch) -> None:
+    from candles import CandleAggregator
+    import exchanges
+
+    monkeypatch.setattr(exchanges, "CANDLES", CandleAggregator({60: 10}))
+    adapter = BybitLinearAdapter(["DDDUSDT"])
+    row = {"start": 60_000, "open": "1", "high": "2", "low": "1", "close": "2", "volume": "7", "turnover": "12"}
+    assert adapter.parse({"topic": "kline.1.DDDUSDT", "data": [row]}, 999.0) is None
+    bar = exchanges.CANDLES.query("DDDUSDT", 60)[-1]
+    assert (bar.ts, bar.close, bar.volume, bar.turnover) == (60.0, 2.0, 7.0, 12.0)
+
+
+def test_bybit_spot_adapter() -> None:
+    adapter = BybitSpotAdapter(["EEEUSDT"])
+    batch = adapter.parse({"topic": "tickers.EEEUSDT", "data": {"symbol": "EEEUSDT", "lastPrice": "0.5"}}, 1.0)
+    assert batch.exchange == "BybitSpot" and batch.symbols() == ["EEEUSDT"]
+    assert adapter.chunk_size == 10 and adapter.feed == "bybit_spot"
+
+
+def test_adapters_must_implement_parse() -> None:
+    class Incomplete(ExchangeAdapter):
+        name = "Incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_detect_batch_feeds_windows_and_returns_triggers(monkeypatch):
+    cfg = make_config()
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex(cfg.detection_timeframes()))
+    batch = TickBatch("Bybit")
+    batch.append("BATCHUSDT", 0.0, 100.0)
+    batch.append("OTHERUSDT", 0.0, 50.0)
+    batch.append("BATCHUSDT", 30.0, 110.0)
+    triggers = app.detect_batch(cfg, batch)
+    assert [(t.symbol, t.exchange, t.direction) for t in triggers] == [("BATCHUSDT", "Bybit", "up")]
+    assert app.price_data.last_tick("OTHERUSDT", "Bybit") == (0.0, 50.0)
+
+
+def test_bybit_spot_feed_keeps_only_pairs_with_a_linear_perp(monkeypatch):
+    adapters = []
+
+    async def spot(http):
+        return ["BTCUSDT", "SPOTONLYUSDT", "ETHUSDT"]
+
+    async def fake_run_feed(cfg, adapter, emit):
+        adapters.append(adapter)
+
+    monkeypatch.setattr(app.bybit_api, "fetch_usdt_spot_symbols", spot)
+    monkeypatch.setattr(app, "run_feed", fake_run_feed)
+    asyncio.run(app.price_monitor_bybit_spot(
+        make_config(), None, None, perps=["BTCUSDT", "ETHUSDT"], emit=lambda t: None,
+    ))
+    assert adapters[0].symbols == ["BTCUSDT", "ETHUSDT"]
@@ -0,0 +1,47 @@
+import json
+
+from fastpath import ChangeFilter, FrameStats, SymbolUniverse, get_json_decoder, shard_of
+
+
+def test_symbol_universe() -> None:
+    uni = SymbolUniverse.build("bybit", ["pepeusdt"], ["BTCUSDT", "ETHUSDT"])
+    assert uni.allows("BTCUSDT") and uni.allows("PEPEUSDT")
+    assert not uni.allows("SOLUSDT")
+    assert SymbolUniverse.build("all").allows("SOLUSDT")
+    assert not SymbolUniverse.build("all").allows("SOLBTC")
+    # liste Bybit indisponible -> pas de filtre au-delà du suffixe
+    assert SymbolUniverse.build("bybit", [], []).allows("SOLUSDT")
+    assert SymbolUniverse.build("watchlist", ["btcusdt"]).symbols == {"BTCUSDT"}
+
+
+def test_change_filter() -> None:
+    f = ChangeFilter()
+    assert f.changed("BTCUSDT", "100.0")
+    assert not f.changed("BTCUSDT", "100.0")
+    assert f.changed("BTCUSDT", "100.1")
+
+
+def test_frame_stats() -> None:
+    stats = FrameStats()
+    stats.record(10, 7, 2_000_000)
+    stats.record(10, 9, 4_000_000)
+    assert stats.skipped_fraction == 0.8
+    assert stats.avg_frame_ms == 3.0
+    assert "80%" in stats.summary()
+
+
+def test_json_decoder_fallback() -> None:
+    assert get_json_decoder("json") is json.loads
+    assert get_json_decoder("auto")('{"a": 1}') == {"a": 1}
+
+
+def test_sharded_universe() -> None:
+    symbols = [f"S{i}USDT" for i in range(50)]
+    shards = [SymbolUniverse.build("bybit", [], symbols, shard=(i, 3)) for i in range(3)]
+    assert sum(len(u) for u in shards) == 50
+    assert all(sum(u.allows(s) for u in shards) == 1 for s in symbols)
+    assert all(shard_of(s, 3) == 1 for s in shards[1].symbols)
+    # univers "all": le filtre de shard s'applique par symbole
+    everything = [SymbolUniverse.build("all", shard=(i, 3)) for i in range(3)]
+    assert sum(u.allows("XUSDT") for u in everything) == 1
+    assert shard_of("XUSDT", 1) == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+from feedhealth import MIN_STALE, STABLE_SEC, Backoff, FeedHealth, FeedWatchdog
+
+
+def test_backoff_is_jittered_exponential_and_capped() -> None:
+    b = Backoff(base=0.5, cap=8.0, rng=lambda: 1.0)
+    assert [b.next() for _ in range(6)] == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+    b.reset()
+    assert b.next() == 0.5
+    jittered = Backoff(base=0.5, cap=8.0)
+    delays = [jittered.next() for _ in range(50)]
+    assert all(0.0 <= d <= 8.0 for d in delays)
+
+
+def test_stale_after_follows_expected_rate() -> None:
+    h = FeedHealth("binance", now=0.0)
+    h.on_connect(0.0)
+    for i in range(1, 200):
+        h.on_message(float(i))          # 1 msg/s
+    assert abs(h.interval - 1.0) < 1e-9
+    assert h.stale_after() == 20.0
+    assert not h.stalled(210.0) and h.stalled(220.0)
+    fast = FeedHealth("bybit", interval_hint=0.01, now=0.0)
+    fast.on_connect(0.0)
+    assert fast.stale_after() == MIN_STALE
+
+
+def test_watchdog_forces_reconnect_and_resets_backoff() -> None:
+    async def run() -> None:
+        wd = FeedWatchdog()
+        h = wd.feed("bybit", interval_hint=0.1)
+        closed = []
+
+        async def close() -> None:
+            closed.append(True)
+
+        h.on_connect(0.0, close)
+        h.on_message(1.0)
+        assert wd.enforce(5.0) == []
+        assert wd.enforce(20.0) == ["bybit"]
+        await asyncio.sleep(0)
+        assert closed == [True] and h.stalls == 1
+        # fermeture demandée une seule fois
+        assert wd.enforce(30.0) == []
+
+        assert h.on_disconnect(30.0) <= 0.5
+        h.on_disconnect(31.0)
+        assert h.backoff.attempt == 2
+        h.on_connect(40.0)
+        h.on_message(41.0)
+        assert h.backoff.attempt == 2
+        h.on_message(40.0 + STABLE_SEC + 1)
+        assert h.backoff.attempt == 0
+
+    asyncio.run(run())
+
+
+def test_venue_down_and_operator_alerts() -> None:
+    wd = FeedWatchdog()
+    bybit = wd.feed("bybit")
+    binance = wd.feed("binance")
+    for h in (bybit, binance):
+        h.on_connect(0.0)
+        h.on_message(1.0)
+    assert not wd.venue_down("bybit", 2.0)
+    assert not wd.venue_down("okx", 2.0)   # venue non suivie
+    bybit.on_disconnect(2.0)
+    binance.on_message(100.0)
+    assert wd.venue_down("bybit", 100.0) and not wd.venue_down("binance", 100.0)
+
+    assert wd.alerts(60.0, gap_sec=120) == []
+    alerts = wd.alerts(130.0, gap_sec=120)
+    assert len(alerts) == 1 and "bybit" in alerts[0]
+    assert wd.alerts(140.0, gap_sec=120) == []   # une seule alerte par coupure
+    bybit.on_connect(150.0)
+    bybit.on_message(150.0)
+    assert wd.alerts(151.0, gap_sec=120) == ["✅ Flux bybit rétabli"]
+
+
+def test_shard_states_are_merged() -> None:
+    worker = FeedWatchdog()
+    h = worker.feed("bybit")
+    h.on_connect(0.0)
+    h.on_message(1.0)
+    coord = FeedWatchdog()
+    coord.merge("s0", worker.states())
+    remote = coord.feeds["bybit[s0]"]
+    assert remote.venue == "bybit" and remote.connected and remote.last_msg == 1.0
+    # shard muet (mort): son flux finit par être vu coupé
+    assert not remote.down(2.0) and remote.down(100.0)
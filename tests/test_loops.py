@@ -0,0 +1,14 @@
+import time
+
+from loops import LoopHealth
+
+
+def test_loop_health_reports_stall() -> None:
+    h = LoopHealth("loop")
+    assert not h.alive()
+    h.record(0.002)
+    assert h.alive()
+    assert "ok" in h.summary()
+    h.last_beat = time.time() - 60
+    assert not h.alive()
+    assert "STALLED" in h.summary()
@@ -0,0 +1,90 @@
+import pytest
+
+from market_state import MoveMerger, SymbolIndex
+from mtf import Timeframe
+
+
+def make_index() -> SymbolIndex:
+    return SymbolIndex([Timeframe(60, 5.0)])
+
+
+def test_windows_are_per_exchange() -> None:
+    idx = make_index()
+    assert idx.update("Binance", "XUSDT", 0.0, 100.0) == []
+    # un tick Bybit éloigné ne doit pas se mélanger à la fenêtre Binance
+    assert idx.update("Bybit", "XUSDT", 1.0, 110.0) == []
+    [trig] = idx.update("Binance", "XUSDT", 2.0, 106.0)
+    assert trig.exchange == "Binance" and trig.direction == "up"
+    assert trig.window_sec == 60
+    # réarmée: pas de nouveau déclenchement sur le même mouvement
+    assert idx.update("Binance", "XUSDT", 2.5, 107.0) == []
+    assert len(idx.window("XUSDT", "Bybit")) == 1
+
+
+def test_spread_pct() -> None:
+    idx = make_index()
+    idx.update("Binance", "XUSDT", 0.0, 101.0)
+    assert idx.spread_pct("XUSDT") is None
+    idx.update("Bybit", "XUSDT", 1.0, 99.0)
+    assert idx.spread_pct("XUSDT") == pytest.approx(2.0)
+    assert idx.spread_pct("XUSDT", max_age=10, now=100.0) is None
+
+
+def test_move_merger_fires_once_per_move() -> None:
+    idx = make_index()
+    merger = MoveMerger()
+    idx.update("Binance", "XUSDT", 0.0, 100.0)
+    idx.update("Bybit", "XUSDT", 0.0, 100.0)
+    [first] = idx.update("Binance", "XUSDT", 1.0, 110.0)
+    [second] = idx.update("Bybit", "XUSDT", 2.0, 110.0)
+    assert merger.submit(first, 60) is not None
+    assert merger.submit(second, 60) is None
+    assert merger.moves["XUSDT"].label == "Binance+Bybit"
+    # nouveau mouvement une fois la fenêtre de fusion écoulée
+    second.ts = 100.0
+    assert merger.submit(second, 60) is not None
+
+
+def test_finished_moves_expire_through_the_timer_wheel() -> None:
+    from timerwheel import TimerWheel
+
+    idx = make_index()
+    wheel = TimerWheel(now=0)
+    merger = MoveMerger(wheel)
+    idx.update("Bybit", "XUSDT", 0.0, 100.0)
+    idx.update("Bybit", "YUSDT", 0.0, 100.0)
+    [x] = idx.update("Bybit", "XUSDT", 1.0, 110.0)
+    [y] = idx.update("Bybit", "YUSDT", 1.0, 110.0)
+    merger.submit(x, 60, ttl_sec=300)
+    merger.submit(y, 60)
+    wheel.advance(100.0)
+    # Y: fenêtre de fusion écoulée; X: encore en cooldown
+    assert list(merger.moves) == ["XUSDT"]
+    # un nouveau mouvement remplace l'échéance de l'ancien
+    x.ts = 200.0
+    merger.submit(x, 60, ttl_sec=300)
+    wheel.advance(400.0)
+    assert list(merger.moves) == ["XUSDT"]
+    wheel.advance(600.0)
+    assert merger.moves == {}
+
+
+def test_configure_replays_windows() -> None:
+    idx = make_index()
+    idx.seed("Bybit", "XUSDT", 0.0, 100.0)
+    idx.configure([Timeframe(60, 5.0), Timeframe(600, 3.0)])
+    [trig] = idx.update("Bybit", "XUSDT", 30.0, 104.0)
+    assert trig.window_sec == 600
+
+
+def test_new_symbol_hook_and_evict() -> None:
+    idx = make_index()
+    seen = []
+    idx.on_new_symbol = seen.append
+    idx.update("Binance", "XUSDT", 0.0, 100.0)
+    idx.update("Bybit", "XUSDT", 5.0, 100.0)
+    assert seen == ["XUSDT"]
+    assert idx.last_seen("XUSDT") == 5.0
+    idx.evict("XUSDT")
+    assert idx.tracked_count() == 0
+    assert idx.last_seen("XUSDT") is None
@@ -0,0 +1,71 @@
+from exchanges import BinanceAdapter
+from fastpath import SymbolUniverse
+from memory import MemoryAccount, Structure, evict_by_rank, fmt_bytes
+from tests.helpers import stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+
+
+def make_account(items: dict) -> MemoryAccount:
+    acct = MemoryAccount()
+
+    def evict(nbytes: int) -> int:
+        ranked = sorted(items, key=items.get)  # plus ancien d'abord
+        return evict_by_rank(ranked, lambda _: 100, items.pop, nbytes)
+
+    acct.register(Structure("items", lambda: len(items), lambda: len(items) * 100, evict, "oldest", 10))
+    acct.register(Structure("fixed", lambda: 1, lambda: 500))
+    return acct
+
+
+def test_report_and_metrics() -> None:
+    acct = make_account({f"S{i}": i for i in range(10)})
+    assert acct.report() == [("items", 10, 1000), ("fixed", 1, 500)]
+    assert acct.total() == 1500
+    assert acct.metrics()["structures"]["items"] == {"entries": 10, "bytes": 1000}
+    # sans budget: rien n'est évincé
+    assert acct.enforce() == 0
+
+
+def test_enforce_budget_evicts_oldest_down_to_watermark() -> None:
+    items = {f"S{i}": i for i in range(10)}
+    acct = make_account(items)
+    acct.budget = 1200
+    freed = acct.enforce()
+    # 1500 -> sous 0.9 × 1200 = 1080: 5 entrées de 100 octets
+    assert freed == 500
+    assert sorted(items) == ["S5", "S6", "S7", "S8", "S9"]
+    assert acct.evicted == {"items": 500}
+    assert acct.enforce() == 0
+
+
+def test_fmt_bytes() -> None:
+    assert fmt_bytes(512) == "512B"
+    assert fmt_bytes(2048) == "2.0KB"
+    assert fmt_bytes(3 * 1024 * 1024) == "3.0MB"
+
+
+def test_memory_budget_evicts_least_active_windows(monkeypatch):
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex())
+    for i in range(5):
+        app.price_data.update("Bybit", f"M{i}USDT", float(i), 1.0)
+    per_symbol = app.price_data.nbytes("M0USDT")
+    freed = app._evict_windows(per_symbol * 2)
+    assert freed == per_symbol * 2
+    assert sorted(app.price_data.symbols) == ["M2USDT", "M3USDT", "M4USDT"]
+    names = {name for name, _, _ in app.MEMORY.report()}
+    assert {"windows", "liquidations", "cooldowns", "candles"} <= names
+    # cooldowns comptés seulement: les évincer renverrait des alertes en double
+    assert app.MEMORY.structures["cooldowns"].evict is None
+
+
+def test_dropped_symbol_is_reseeded_by_binance(monkeypatch):
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex())
+    adapter = BinanceAdapter(SymbolUniverse(["GONEUSDT"]))
+    monkeypatch.setattr(app, "adapters", {"Binance": adapter})
+    adapter.parse([{"s": "GONEUSDT", "c": "5"}], 0.0)
+    app._drop_symbol("GONEUSDT")
+    assert "GONEUSDT" not in adapter.changes.last
+    assert adapter.parse([{"s": "GONEUSDT", "c": "5"}], 1.0).symbols() == ["GONEUSDT"]
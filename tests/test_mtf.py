@@ -0,0 +1,38 @@
+import pytest
+
+from mtf import MultiWindow, Timeframe, WindowPlan, parse_timeframes
+
+
+def test_parse_timeframes() -> None:
+    assert parse_timeframes("180:5, 3600:12") == [Timeframe(180, 5.0), Timeframe(3600, 12.0)]
+    assert parse_timeframes("") == []
+
+
+def test_plan_picks_level_per_timeframe() -> None:
+    plan = WindowPlan([Timeframe(60, 3.0), Timeframe(1200, 8.0), Timeframe(3600, 12.0)])
+    assert [plan.levels[i] for i in plan.tf_level] == [1, 10, 60]
+    assert plan.max_window == 3600
+
+
+def test_fast_and_slow_timeframes() -> None:
+    win = MultiWindow(WindowPlan([Timeframe(60, 5.0), Timeframe(1200, 8.0)]))
+    # lente dérive: +6% en 10 min (trop lent pour 1 min, sous le seuil 20 min)
+    hits = []
+    for t in range(0, 600, 5):
+        hits += win.add(float(t), 100.0 + t / 100.0)
+    assert hits == []
+    # mèche rapide: +5% en quelques secondes, franchit aussi le seuil 20 min
+    hits = win.add(601.0, 111.0)
+    assert sorted(tf.window_sec for tf, _, _ in hits) == [60, 1200]
+    for tf, variation, direction in hits:
+        assert direction == "up"
+    slow = next(v for tf, v, _ in hits if tf.window_sec == 1200)
+    assert slow == pytest.approx(11.0)
+    # réarmement: pas de re-déclenchement dans le même bucket
+    assert win.add(601.5, 112.0) == []
+
+
+def test_window_expires_old_buckets() -> None:
+    win = MultiWindow(WindowPlan([Timeframe(60, 5.0)]))
+    win.add(0.0, 100.0)
+    assert win.add(200.0, 106.0) == []
@@ -0,0 +1,43 @@
+import pytest
+
+from orderbook import BookManager, OrderBook
+
+
+def test_order_book_snapshot_and_deltas() -> None:
+    book = OrderBook("BTCUSDT")
+    book.apply("snapshot", {"b": [["99", "2"], ["98", "3"]], "a": [["101", "1"], ["102", "4"]], "u": 10}, 0.0)
+    assert book.best_bid() == 99.0 and book.best_ask() == 101.0
+    assert book.imbalance() == pytest.approx((5 - 5) / 10)
+    assert book.spread_pct() == pytest.approx(2 / 100 * 100)
+
+    # delta: suppression du meilleur ask, modification d'un bid, nouveau niveau
+    book.apply("delta", {"b": [["99", "6"], ["100", "1"]], "a": [["101", "0"]], "u": 11}, 1.0)
+    assert book.best_bid() == 100.0 and book.best_ask() == 102.0
+    assert book.bids.depth == pytest.approx(10.0)
+    assert book.asks.depth == pytest.approx(4.0)
+    assert book.imbalance() == pytest.approx(6 / 14)
+
+    # u == 1: redémarrage du carnet
+    book.apply("delta", {"b": [["50", "1"]], "a": [["51", "1"]], "u": 1}, 2.0)
+    assert book.bids.prices == [50.0] and book.asks.prices == [51.0]
+
+
+def test_book_manager_lazy_subscribe_and_expiry() -> None:
+    books = BookManager(idle_sec=60)
+    books.set_watchlist({"ETHUSDT"})
+    books.touch("BTCUSDT", now=0.0)
+    sub, unsub = books.sync(now=1.0)
+    assert sub == ["BTCUSDT", "ETHUSDT"] and unsub == []
+
+    topic = books.topic("BTCUSDT")
+    # delta avant snapshot: ignoré
+    books.on_message(topic, "delta", {"b": [["1", "1"]], "a": []}, 1.0)
+    assert books.imbalance("BTCUSDT", now=1.0) is None
+    books.on_message(topic, "snapshot", {"b": [["1", "3"]], "a": [["2", "1"]]}, 2.0)
+    assert books.imbalance("BTCUSDT", now=2.0) == pytest.approx(0.5)
+    assert books.imbalance("BTCUSDT", now=100.0) is None  # carnet trop vieux
+
+    # inactivité: désabonnement et libération, la watchlist reste
+    sub, unsub = books.sync(now=120.0)
+    assert sub == [] and unsub == ["BTCUSDT"]
+    assert "BTCUSDT" not in books.books
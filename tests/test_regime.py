@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from regime import RegimeEngine, market_move  # noqa: E402
+
+
+def _engine(n: int = 30) -> RegimeEngine:
+    engine = RegimeEngine(horizon_sec=60, slots=7, min_symbols=10)
+    for i in range(n):
+        engine.update(f"S{i}USDT", 100.0)
+    engine.step(0.0)
+    return engine
+
+
+def test_regime_market_component_and_excess() -> None:
+    engine = _engine()
+    assert engine.regime is not None and engine.regime.label == "calme"
+    # tout le marché +5%, un symbole +12%
+    for i in range(30):
+        engine.update(f"S{i}USDT", 105.0)
+    engine.update("S0USDT", 112.0)
+    regime = engine.step(10.0)
+    assert regime.market_pct == pytest.approx(5.0)
+    assert regime.label == "risk-on"
+    assert regime.breadth == pytest.approx(1.0)
+    assert engine.excess_pct("S0USDT") == pytest.approx(7.0)
+    assert engine.excess_pct("S1USDT") == pytest.approx(0.0)
+    assert market_move("up", regime.market_pct, engine.excess_pct("S1USDT"), 4.0)
+    assert not market_move("up", regime.market_pct, engine.excess_pct("S0USDT"), 4.0)
+    # sens opposé au marché: jamais « marché »
+    assert not market_move("down", regime.market_pct, engine.excess_pct("S1USDT"), 4.0)
+
+
+def test_regime_grows_and_needs_enough_symbols() -> None:
+    engine = RegimeEngine(horizon_sec=60, min_symbols=10)
+    for i in range(5):
+        engine.update(f"S{i}USDT", 1.0)
+    assert engine.step(0.0) is None
+    assert "warming up" in engine.summary()
+    for i in range(300):  # au-delà de la capacité initiale
+        engine.update(f"X{i}USDT", 1.0)
+    # absents de la ligne de référence: pas encore de rendement
+    assert engine.step(1.0) is None
+    assert engine.excess_pct("X299USDT") is None
+    assert engine.step(62.0) is not None
+    assert engine.excess_pct("X299USDT") == pytest.approx(0.0)
+
+
+def test_market_move_rules() -> None:
+    assert market_move("up", 3.0, 1.0, 4.0)
+    assert not market_move("up", 0.5, 1.0, 4.0)
+    assert market_move("down", -3.0, -1.0, 4.0)
+    assert not market_move("down", -3.0, -6.0, 4.0)
+    assert not market_move("up", None, 1.0, 4.0)
+
+
+def test_market_share_of_the_move() -> None:
+    from regime import market_share
+
+    assert market_share("up", 5.0, 4.0) == pytest.approx(0.8)
+    assert market_share("up", 2.0, 4.0) == 1.0
+    assert market_share("down", 5.0, -1.0) == pytest.approx(0.2)
+    assert market_share("down", 5.0, 3.0) == 0.0
+    assert market_share("up", 5.0, None) == 0.0
+
+
+def test_regime_set_compares_each_timeframe_on_its_own_horizon() -> None:
+    from regime import RegimeSet
+
+    engines = RegimeSet([60, 300])
+    for engine in engines.engines.values():
+        engine.min_symbols = 10
+    for i in range(20):
+        engines.update(f"S{i}USDT", 100.0)
+    engines.step(0.0)
+    # +5% il y a 3 min, stable depuis: hors de l'horizon 60 s, dans celui de 300 s
+    for i in range(20):
+        engines.update(f"S{i}USDT", 105.0)
+    engines.step(180.0)
+    engines.step(240.0)
+    assert engines.engine(300).regime.market_pct == pytest.approx(5.0)
+    assert engines.engine(60).regime.market_pct == pytest.approx(0.0)
+    assert engines.engine(290) is engines.engines[300]
+    assert len(engines) == 20 and "5 min" in engines.summary()
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from resilience import MIN_SAMPLES, CircuitBreaker, CircuitOpen, Source, SourceSet
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+
+
+def test_breaker_opens_then_probes_once_after_reset() -> None:
+    b = CircuitBreaker(failures=3, reset_sec=10.0)
+    for _ in range(3):
+        assert b.allow(0.0)
+        b.failure(0.0)
+    assert b.state == "open" and b.trips == 1
+    assert not b.allow(5.0)
+    assert b.allow(10.0) and not b.allow(10.5)   # une seule requête de test
+    b.failure(11.0)
+    assert not b.allow(20.0) and b.allow(21.0)
+    b.success()
+    assert b.state == "closed" and b.allow(21.0)
+
+
+def test_failures_serve_last_good_value_with_age() -> None:
+    async def run() -> None:
+        source = Source("funding", breaker=CircuitBreaker(failures=2, reset_sec=60.0))
+        calls = []
+
+        async def ok(client, symbol):
+            calls.append(symbol)
+            return 0.01
+
+        async def broken(client, symbol):
+            calls.append(symbol)
+            raise RuntimeError("502")
+
+        assert await source.call(ok, None, "BTCUSDT", now=100.0) == (0.01, 0.0)
+        stored = source.cache["BTCUSDT"][0]
+        value, age = await source.call(broken, None, "BTCUSDT", now=stored + 30.0)
+        assert value == 0.01 and age == pytest.approx(30.0)
+        with pytest.raises(RuntimeError):
+            await source.call(broken, None, "ETHUSDT")
+        # disjoncteur ouvert: plus d'appel, secours si possible
+        calls.clear()
+        assert (await source.call(broken, None, "BTCUSDT"))[0] == 0.01
+        with pytest.raises(CircuitOpen):
+            await source.call(broken, None, "ETHUSDT")
+        assert calls == [] and source.stale_served == 2
+        # valeur trop vieille: plus servie
+        source.breaker.success()
+        with pytest.raises(RuntimeError):
+            await source.call(broken, None, "BTCUSDT", now=stored + source.max_stale + 1)
+
+    asyncio.run(run())
+
+
+def test_slow_call_returns_stale_and_revalidates_in_background() -> None:
+    async def run() -> None:
+        source = Source("oi", stale_after=0.01)
+        source.cache["BTCUSDT"] = (0.0, (1.0, 2.0, 100.0))
+
+        async def slow(client, symbol):
+            await asyncio.sleep(0.05)
+            return (2.0, 3.0, 50.0)
+
+        value, age = await source.call(slow, None, "BTCUSDT", now=60.0)
+        assert value == (1.0, 2.0, 100.0) and age == 60.0
+        assert "BTCUSDT" in source.inflight
+        await asyncio.sleep(0.1)
+        assert source.cache["BTCUSDT"][1] == (2.0, 3.0, 50.0) and not source.inflight
+
+    asyncio.run(run())
+
+
+def test_hedged_request_after_latency_percentile() -> None:
+    async def run() -> None:
+        source = Source("price", hedge_pct=0.95)
+        source.latencies.extend([0.005] * MIN_SAMPLES)
+        source.calls = 9
+        started = []
+        cancelled = []
+
+        async def fetch(client, symbol):
+            attempt = len(started)
+            started.append(attempt)
+            try:
+                await asyncio.sleep(1.0 if attempt == 0 else 0.0)
+            except asyncio.CancelledError:
+                cancelled.append(attempt)
+                raise
+            return attempt
+
+        assert await source.call(fetch, None, "BTCUSDT") == (1, 0.0)
+        await asyncio.sleep(0)
+        assert started == [0, 1] and cancelled == [0]
+        assert source.hedges == 1 and source.hedge_wins == 1
+        # budget de couverture épuisé (10% des appels)
+        assert source.hedge_delay() is None
+
+    asyncio.run(run())
+
+
+def test_source_set_applies_settings() -> None:
+    sources = SourceSet()
+    funding = sources.source("funding")
+    sources.configure(0.9, 1.0, 3, 10.0)
+    assert funding.hedge_pct == 0.9 and funding.breaker.threshold == 3
+    assert sources.source("oi").stale_after == 1.0
+    assert "funding closed" in sources.summary()
+
+
+def test_caption_flags_scores_using_cached_inputs(monkeypatch):
+    cfg = make_config()
+    ev = app.TieredEvaluator()
+    monkeypatch.setattr(app, "evaluator", ev)
+    # dernière valeur bonne connue depuis 5 min; la source est maintenant en échec
+    ev.sources.source("funding").cache["STALEUSDT"] = (app.time.time() - 300, -0.01)
+
+    async def broken(http, symbol):
+        raise RuntimeError("bybit 502")
+
+    def fake(value):
+        async def _f(http, symbol):
+            return value
+        return _f
+
+    messages = []
+
+    async def fake_send_text(bot, uid, caption, parse_mode=None):
+        messages.append(caption)
+
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", broken)
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", fake((1.0, 3.0, 2.8, 0, 0)))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", fake((100.0, 90.0, -10.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", fake((10.0, 90.0)))
+    monkeypatch.setattr(app.notifier, "send_text", fake_send_text)
+    app.last_alert_time = {}
+    asyncio.run(app.handle_alert(
+        cfg, bot=None, http=None, symbol="STALEUSDT", variation=10.0, direction="up", exchange="Bybit",
+    ))
+    assert messages and "Entrées en cache: funding 5 min" in messages[0]
+
+
+def test_bybit_error_responses_raise_and_are_not_cached():
+    class Resp:
+        def __init__(self, data):
+            self.data = data
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.data
+
+    class Client:
+        def __init__(self, data):
+            self.data = data
+
+        async def get(self, url, params=None):
+            return Resp(self.data)
+
+    # Bybit signale ses erreurs en HTTP 200 avec retCode != 0
+    rate_limited = Client({"retCode": 10006, "retMsg": "Too many visits", "result": {}})
+    empty = Client({"retCode": 0, "result": {"list": []}})
+    fetchers = (app.bybit_api.get_oi_1h_change, app.bybit_api.get_current_funding_rate, app.bybit_api.get_alltime_range)
+    for client in (rate_limited, empty):
+        for fetch in fetchers:
+            with pytest.raises(app.bybit_api.BybitError):
+                asyncio.run(fetch(client, "ERRUSDT"))
+
+    sources = SourceSet()
+    with pytest.raises(app.bybit_api.BybitError):
+        asyncio.run(sources.call("oi", app.bybit_api.get_oi_1h_change, rate_limited, "ERRUSDT"))
+    oi = sources.source("oi")
+    assert oi.cache == {} and oi.errors == 1 and oi.breaker.failures == 1
+
+
+def test_liquidations_bypass_the_resilience_layer(monkeypatch):
+    ev = app.TieredEvaluator()
+
+    async def liq(http, symbol):
+        return 10.0, 90.0
+
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", liq)
+    d = app.Decision("LIQUSDT", False, "")
+    asyncio.run(ev._fetch("liq", None, d, None))
+    assert d.liq == (10.0, 90.0)
+    assert "liq" not in ev.sources.sources and not d.stale
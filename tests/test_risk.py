@@ -1,6 +1,6 @@
 import pytest
 
-from risk import calc_risk_score, compute_volatility, calc_short_score
+from risk import calc_risk_score, compute_volatility, calc_short_score, short_score_bounds
 
 
 def test_compute_volatility() -> None:
@@ -21,3 +21,39 @@ def test_calc_short_score() -> None:
     assert base == pytest.approx(0.94, rel=1e-3)
     assert high_liq == pytest.approx(1.0, rel=1e-3)
     assert low == pytest.approx(0.08, rel=1e-3)
+
+
+def test_short_score_bounds() -> None:
+    lo, hi = short_score_bounds()
+    assert lo == 0.0
+    assert hi == pytest.approx(1.0)
+    # funding favorable connu: le score ne peut pas descendre sous 0.4
+    lo, hi = short_score_bounds(funding_rate=-0.01)
+    assert lo == pytest.approx(0.4)
+    assert hi == pytest.approx(1.0)
+    # toutes les entrées connues: bornes = score exact
+    lo, hi = short_score_bounds(0.01, 0.2, 5, 0.1)
+    assert lo == pytest.approx(hi)
+    assert lo == pytest.approx(calc_short_score(0.01, 0.2, 5, 0.1))
+
+
+def test_calc_short_score_book_imbalance() -> None:
+    base = calc_short_score(0.01, 0.2, 5, 0.1)
+    # sans carnet: score inchangé
+    assert calc_short_score(0.01, 0.2, 5, 0.1, None) == base
+    ask_heavy = calc_short_score(0.01, 0.2, 5, 0.1, -1.0)
+    bid_heavy = calc_short_score(0.01, 0.2, 5, 0.1, 1.0)
+    assert ask_heavy == pytest.approx(base + 0.1)
+    # carnet équilibré (ou acheteur): même score que sans carnet
+    assert calc_short_score(0.01, 0.2, 5, 0.1, 0.0) == pytest.approx(base)
+    assert bid_heavy == pytest.approx(base)
+
+
+def test_calc_short_score_flow_imbalance() -> None:
+    base = calc_short_score(0.01, 0.2, 5, 0.1)
+    both = calc_short_score(0.01, 0.2, 5, 0.1, -1.0, -1.0)
+    assert both == pytest.approx(base + 0.2)
+    assert calc_short_score(0.01, 0.2, 5, 0.1, 0.0, 0.0) == pytest.approx(base)
+    lo, hi = short_score_bounds(flow_imbalance=-1.0)
+    assert lo == pytest.approx(0.1)
+    assert hi == pytest.approx(1.0)
@@ -0,0 +1,81 @@
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import sharded  # noqa: E402
+
+
+class FakeProcess:
+    def __init__(self, target=None, args=(), name="", daemon=False):
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def crash(self):
+        self.alive = False
+        self.exitcode = 1
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeContext:
+    Process = FakeProcess
+
+    def Queue(self, maxsize=0):
+        return None
+
+
+def make_supervisor(monkeypatch, total=1):
+    monkeypatch.setattr(sharded.mp, "get_context", lambda method: FakeContext())
+    sup = sharded.Supervisor(make_config(), total, ["AAAUSDT"])
+    sup.start()
+    return sup
+
+
+def test_dead_worker_restarts_with_exponential_backoff(monkeypatch):
+    sup = make_supervisor(monkeypatch, total=2)
+    first = sup.procs[0]
+    sup.started[0] = 100.0
+    first.crash()
+    sup.check(now=101.0)
+    # relance différée de 2 s, l'autre shard n'est pas touché
+    assert 0 not in sup.procs and sup.next_start[0] == 103.0
+    assert sup.procs[1].is_alive()
+    sup.check(now=102.0)
+    assert 0 not in sup.procs
+    sup.check(now=103.0)
+    assert sup.procs[0] is not first and sup.procs[0].is_alive()
+    assert sup.started[0] == 103.0
+    # second plantage rapproché: délai doublé
+    sup.procs[0].crash()
+    sup.check(now=104.0)
+    assert sup.next_start[0] == 108.0
+    assert sup.status() == "1/2 workers alive, restarts=2"
+
+
+def test_backoff_is_capped_and_resets_after_a_stable_run(monkeypatch):
+    sup = make_supervisor(monkeypatch)
+    now, delays = 0.0, []
+    for _ in range(8):
+        sup.procs[0].crash()
+        sup.check(now=now)
+        delays.append(sup.next_start[0] - now)
+        now = sup.next_start[0]
+        sup.check(now=now)
+    assert delays == [2.0, 4.0, 8.0, 16.0, 30.0, 30.0, 30.0, 30.0]
+    # le worker tient plus de RESTART_STABLE_SEC: le prochain plantage repart de 2 s
+    sup.procs[0].crash()
+    sup.check(now=now + sharded.RESTART_STABLE_SEC)
+    assert sup.streak[0] == 1
+    assert sup.next_start[0] == now + sharded.RESTART_STABLE_SEC + 2.0
+    assert sup.restarts[0] == 9
@@ -0,0 +1,44 @@
+import asyncio
+
+from tests.helpers import stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+import short_agent  # noqa: E402
+from evaluator import TieredEvaluator  # noqa: E402
+
+
+def test_batch_short_is_concurrent_bounded_and_sorted(monkeypatch):
+    running = peak = 0
+
+    def fake(value_for):
+        async def _f(http, symbol):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(1.0 if symbol == "SLOWUSDT" else 0.01)
+            running -= 1
+            return value_for(symbol)
+        return _f
+
+    funding = {"AUSDT": -0.01, "BUSDT": 0.01}
+    monkeypatch.setattr(app.bybit_api, "get_current_funding_rate", fake(lambda s: funding.get(s, 0.0)))
+    monkeypatch.setattr(app.bybit_api, "get_alltime_range", fake(lambda s: (1.0, 3.0, 2.5, 0, 0)))
+    monkeypatch.setattr(app.bybit_api, "get_oi_1h_change", fake(lambda s: (100.0, 95.0, -5.0)))
+    monkeypatch.setattr(app.bybit_api, "get_liquidation_stats", fake(lambda s: (10.0, 90.0)))
+
+    symbols = short_agent.parse_symbols(["majors", "aUSDT,SLOWUSDT"], {"majors": ["BUSDT", "AUSDT"]})
+    assert symbols == ["BUSDT", "AUSDT", "SLOWUSDT"]
+
+    ev = TieredEvaluator()
+    results = asyncio.run(short_agent.evaluate_many(None, symbols, ev, concurrency=2, timeout=0.2))
+    assert [r.symbol for r in results][:2] == ["AUSDT", "BUSDT"]
+    slow = results[-1]
+    assert slow.symbol == "SLOWUSDT" and slow.decision.reason == "timeout" and not slow.decision.complete
+    # au plus 2 symboles à la fois, 4 requêtes chacun
+    assert peak <= 8
+    # plage historique mise en cache: réutilisée au lot suivant
+    assert "AUSDT" in ev.ranges
+    table = short_agent.format_table(results, 0.5)
+    assert "3 symbols in 0.50s (1 partial: timeout)" in table
@@ -0,0 +1,47 @@
+import threading
+from collections import defaultdict, deque
+
+import snapshot
+from market_state import SymbolIndex
+from mtf import Timeframe
+
+
+class FakeLiqCache:
+    def __init__(self, window_sec: int = 3600) -> None:
+        self.window_sec = window_sec
+        self.lock = threading.Lock()
+        self.by_symbol = defaultdict(deque)
+
+
+def test_snapshot_roundtrip_discards_stale(tmp_path) -> None:
+    now = 10_000.0
+    idx = SymbolIndex([Timeframe(600, 5.0)])
+    idx.seed("Bybit", "AUSDT", now - 5000, 1.0)  # hors fenêtre
+    idx.seed("Bybit", "AUSDT", now - 10, 2.0)
+    idx.seed("Binance", "AUSDT", now - 5, 3.0)
+    cooldowns = {"AUSDT": now - 30, "BUSDT": now - 5000}
+    liq = FakeLiqCache()
+    liq.by_symbol["AUSDT"].extend([
+        (int((now - 7200) * 1000), "Sell", 1.0),
+        (int((now - 60) * 1000), "Buy", 2.5),
+    ])
+
+    path = str(tmp_path / "state.snap")
+    assert snapshot.save(path, idx, cooldowns, liq) > 0
+
+    idx2, cooldowns2, liq2 = SymbolIndex([Timeframe(600, 5.0)]), {}, FakeLiqCache()
+    with open(path, "rb") as f:
+        counts = snapshot.loads_into(f.read(), idx2, cooldowns2, liq2, 600, 600, now=now)
+    assert counts == {"ticks": 2, "cooldowns": 1, "liquidations": 1}
+    assert idx2.window("AUSDT", "Bybit").points() == [(now - 10, 2.0)]
+    assert idx2.last_tick("AUSDT", "Binance") == (now - 5, 3.0)
+    assert cooldowns2 == {"AUSDT": now - 30}
+    assert list(liq2.by_symbol["AUSDT"]) == [(int((now - 60) * 1000), "Buy", 2.5)]
+
+
+def test_snapshot_load_missing_or_corrupt(tmp_path) -> None:
+    args = (SymbolIndex(), {}, FakeLiqCache(), 600, 600)
+    assert snapshot.load(str(tmp_path / "none.snap"), *args) is None
+    bad = tmp_path / "bad.snap"
+    bad.write_bytes(b"garbage-garbage-garbage")
+    assert snapshot.load(str(bad), *args) is None
@@ -0,0 +1,17 @@
+from startup import StartupTimer
+
+
+def test_startup_timer_phases_and_feeds() -> None:
+    timer = StartupTimer()
+    with timer.phase("config"):
+        pass
+    timer.record("snapshot", 0.25)
+    timer.expect_feeds(["binance", "bybit"])
+    timer.mark_live("binance")
+    assert timer.all_live_at is None
+    timer.mark_live("bybit")
+    timer.mark_live("bybit")
+    assert timer.all_live_at is not None
+    report = timer.report()
+    assert "config=" in report and "snapshot=250ms" in report
+    assert "bybit live@" in report
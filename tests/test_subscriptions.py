@@ -0,0 +1,87 @@
+from market_state import SymbolIndex
+from mtf import Timeframe
+from subscriptions import SubscriptionIndex
+
+
+def make_index(tmp_path=None) -> SubscriptionIndex:
+    subs = SubscriptionIndex()
+    subs.configure(8.0, {1, 2, 3}, str(tmp_path / "subs.json") if tmp_path else "")
+    return subs
+
+
+def uids(subs, *args) -> set:
+    return {s.user_id for s in subs.candidates(*args)}
+
+
+def test_inverted_index_resolves_recipients() -> None:
+    subs = make_index()
+    # par défaut: tout le monde reçoit tout, au seuil global
+    assert uids(subs, "BTCUSDT", "up", 9.0, 8.0, 0.0, 600) == {1, 2, 3}
+    subs.watch(1, ["BTCUSDT"])
+    subs.set_direction(2, "down")
+    assert subs.by_symbol == {"BTCUSDT": {1}} and subs.wildcard == {2, 3}
+    assert uids(subs, "BTCUSDT", "up", 9.0, 8.0, 0.0, 600) == {1, 3}
+    assert uids(subs, "ETHUSDT", "down", 9.0, 8.0, 0.0, 600) == {2, 3}
+    subs.unwatch(1)
+    assert "BTCUSDT" not in subs.by_symbol and 1 in subs.wildcard
+
+
+def test_watchers_yield_each_user_once_without_a_merged_set() -> None:
+    subs = make_index()
+    subs.watch(1, ["BTCUSDT"])
+    subs.by_symbol["BTCUSDT"].add(2)   # présent dans les deux index
+    assert sorted(subs.watchers("BTCUSDT")) == [1, 2, 3]
+    assert sorted(subs.watchers("ETHUSDT")) == [2, 3]
+
+
+def test_thresholds_cooldowns_and_detection_scale() -> None:
+    subs = make_index()
+    scales = {}
+    subs.on_scale = scales.__setitem__
+    subs.watch(1, ["BTCUSDT"])
+    subs.set_threshold(1, 4.0)
+    # un abonné « tous symboles » ne resserre pas la détection
+    subs.set_threshold(2, 2.0)
+    assert scales == {"BTCUSDT": 0.5}
+    assert subs.detection_scale("ETHUSDT") == 1.0
+    # 5% sur 1h (seuil global 10% pour cette timeframe): seul l'abonné à 4% (x0.5) est concerné
+    assert uids(subs, "BTCUSDT", "up", 5.0, 10.0, 0.0, 600) == {1}
+    subs.mark_sent(1, "BTCUSDT", 100.0, 600)
+    assert uids(subs, "BTCUSDT", "up", 12.0, 10.0, 200.0, 600) == {2, 3}
+    assert uids(subs, "BTCUSDT", "up", 12.0, 10.0, 800.0, 600) == {1, 2, 3}
+    subs.unwatch(1, ["BTCUSDT"])
+    assert scales["BTCUSDT"] == 1.0
+
+
+def test_symbol_index_applies_tighter_scale() -> None:
+    idx = SymbolIndex([Timeframe(60, 8.0)])
+    idx.update("Bybit", "BTCUSDT", 0.0, 100.0)
+    assert not idx.update("Bybit", "BTCUSDT", 30.0, 105.0)
+    idx.set_scale("BTCUSDT", 0.5)
+    hits = idx.update("Bybit", "BTCUSDT", 31.0, 105.0)
+    assert [t.window_sec for t in hits] == [60]
+    idx.set_scale("BTCUSDT", 1.0)
+    assert idx.scales == {}
+
+
+def test_subscriptions_persist_and_reload(tmp_path) -> None:
+    subs = make_index(tmp_path)
+    subs.watch(1, ["BTCUSDT", "ETHUSDT"])
+    subs.set_min_score(1, 0.6)
+
+    other = SubscriptionIndex()
+    scales = {}
+    other.on_scale = scales.__setitem__
+    other.configure(8.0, {1, 2}, subs.path)
+    assert other.users[1].symbols == {"BTCUSDT", "ETHUSDT"} and other.users[1].min_score == 0.6
+    assert other.wildcard == {2}
+
+    subs.set_threshold(1, 4.0)
+    subs.mtime = other.mtime = 0.0   # résolution de mtime grossière selon le système de fichiers
+    subs.save()
+    assert other.reload_if_changed()
+    assert scales == {"BTCUSDT": 0.5, "ETHUSDT": 0.5}
+    # utilisateur retiré des autorisés: abonnement abandonné
+    third = SubscriptionIndex()
+    third.configure(8.0, {2}, subs.path)
+    assert set(third.users) == {2} and not third.by_symbol
@@ -0,0 +1,28 @@
+import pytest
+
+import state
+from ticker_state import TickerState
+
+
+def test_delta_merges_into_snapshot() -> None:
+    ts = TickerState()
+    ts.apply("snapshot", "XUSDT", {"lastPrice": "1.0", "fundingRate": "0.0001", "openInterest": "100"}, 0.0)
+    merged = ts.apply("delta", "XUSDT", {"fundingRate": "-0.0002"}, 1.0)
+    assert merged["lastPrice"] == "1.0"
+    assert ts.funding("XUSDT", now=2.0) == pytest.approx(-0.0002)
+    # flux mort -> pas de réponse locale
+    assert ts.funding("XUSDT", now=10_000.0) is None
+
+
+def test_oi_change_needs_full_lookback() -> None:
+    state.OI_HISTORY.pop("YUSDT", None)
+    ts = TickerState(sample_sec=60)
+    ts.apply("snapshot", "YUSDT", {"openInterest": "100"}, 0.0)
+    for t in range(60, 3600, 60):
+        ts.apply("delta", "YUSDT", {"openInterest": str(100 + t / 60)}, float(t))
+    assert ts.oi_change("YUSDT", now=1800.0) is None
+    ts.apply("delta", "YUSDT", {"openInterest": "90"}, 3600.0)
+    oi_then, oi_last, pct = ts.oi_change("YUSDT", now=3600.0)
+    assert oi_then == 100.0 and oi_last == 90.0
+    assert pct == pytest.approx(-10.0)
+    assert list(state.get_ois("YUSDT"))[-1] == 90.0
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from exchanges import TickBatch
+from tickstore import DAY, TickStore, aggregate, format_history, parse_range
+from tests.helpers import make_config, stub_missing_dependencies
+
+stub_missing_dependencies()
+
+import app  # noqa: E402
+
+# 2023-11-15 00:00 UTC
+MIDNIGHT = 1_700_006_400.0
+
+
+def fill(store: TickStore, start: float, count: int, step: float = 1.0) -> None:
+    for i in range(count):
+        store.append("Bybit", "BTCUSDT", start + i * step, 100.0 + i)
+
+
+def test_range_reads_cross_days_and_use_minute_index(tmp_path) -> None:
+    store = TickStore(str(tmp_path))
+    fill(store, MIDNIGHT - 120, 300)
+    ts, px = store.ticks("Bybit", "BTCUSDT", MIDNIGHT - 70, MIDNIGHT + 130.5)
+    assert len(ts) == len(px) == 201
+    assert ts[0] == MIDNIGHT - 70 and ts[-1] == MIDNIGHT + 130 and px[0] == 150.0
+    assert os.path.exists(tmp_path / "Bybit" / "BTCUSDT" / "20231114.ts")
+    assert os.path.exists(tmp_path / "Bybit" / "BTCUSDT" / "20231115.ts")
+
+    # nouvel écrivain (redémarrage): positions de l'index reprises du fichier
+    again = TickStore(str(tmp_path))
+    again.append("Bybit", "BTCUSDT", MIDNIGHT + 600, 1.0)
+    ts, px = again.ticks("Bybit", "BTCUSDT", MIDNIGHT + 590, MIDNIGHT + 700)
+    assert list(px) == [1.0]
+    assert again.ticks("Bybit", "ETHUSDT", MIDNIGHT, MIDNIGHT + 60) == (ts[:0], px[:0])
+
+
+def test_day_is_only_recomputed_when_a_tick_crosses_midnight(tmp_path, monkeypatch) -> None:
+    import tickstore
+
+    calls = []
+    day_of = tickstore.day_of
+    monkeypatch.setattr(tickstore, "day_of", lambda ts: calls.append(ts) or day_of(ts))
+    store = TickStore(str(tmp_path))
+    fill(store, MIDNIGHT - 120, 300)
+    assert calls == [MIDNIGHT - 120, MIDNIGHT]
+
+
+def test_candles_are_derived_per_minute(tmp_path) -> None:
+    store = TickStore(str(tmp_path))
+    fill(store, MIDNIGHT, 150)
+    candles = store.candles("Bybit", "BTCUSDT", MIDNIGHT, MIDNIGHT + 3600)
+    # deux minutes fermées + la minute en cours
+    assert [c[0] - MIDNIGHT for c in candles] == [0, 60, 120]
+    assert candles[0][1:] == (100.0, 159.0, 100.0, 159.0)
+    assert candles[-1][1:] == (220.0, 249.0, 220.0, 249.0)
+    assert len(store.candles("Bybit", "BTCUSDT", MIDNIGHT + 61, MIDNIGHT + 100)) == 1
+
+
+def test_open_minute_survives_a_restart(tmp_path) -> None:
+    store = TickStore(str(tmp_path))
+    store.append("Bybit", "BTCUSDT", MIDNIGHT + 1, 1.0)
+    store.append("Bybit", "BTCUSDT", MIDNIGHT + 2, 2.0)
+    store.close()
+    # redémarrage dans la même minute
+    again = TickStore(str(tmp_path))
+    again.append("Bybit", "BTCUSDT", MIDNIGHT + 30, 3.0)
+    assert again.candles("Bybit", "BTCUSDT", MIDNIGHT, MIDNIGHT + 60) == [(MIDNIGHT, 1.0, 3.0, 1.0, 3.0)]
+    ts, px = again.ticks("Bybit", "BTCUSDT", MIDNIGHT + 1, MIDNIGHT + 59)
+    assert list(px) == [1.0, 2.0, 3.0]
+
+
+def test_compaction_keeps_candles_and_retention_purges(tmp_path) -> None:
+    store = TickStore(str(tmp_path), tick_days=2, retention_days=5)
+    fill(store, MIDNIGHT - 10 * DAY, 120)
+    fill(store, MIDNIGHT - 3 * DAY, 120)
+    fill(store, MIDNIGHT, 120)
+    store.flush()
+    assert store.maintain(MIDNIGHT + 60) == (3, 4)
+    folder = tmp_path / "Bybit" / "BTCUSDT"
+    assert sorted(os.listdir(folder)) == [
+        "20231112.c1m", "20231115.c1m", "20231115.idx", "20231115.px", "20231115.ts",
+    ]
+    old = store.candles("Bybit", "BTCUSDT", MIDNIGHT - 3 * DAY, MIDNIGHT - 3 * DAY + 120)
+    assert len(old) == 2
+    assert store.ticks("Bybit", "BTCUSDT", MIDNIGHT - 3 * DAY, MIDNIGHT - 2 * DAY)[0].tolist() == []
+    assert store.exchanges_for("BTCUSDT") == ["Bybit"]
+
+
+def test_history_formatting() -> None:
+    assert parse_range("30m") == 1800 and parse_range("2H") == 7200 and parse_range("1d") == DAY
+    for bad in ("", "10", "-1h", "xh"):
+        with pytest.raises(ValueError):
+            parse_range(bad)
+    candles = [(MIDNIGHT + 60 * i, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i) for i in range(30)]
+    rows = aggregate(candles, 12)
+    assert len(rows) == 10 and rows[0] == (MIDNIGHT, 100.0, 103.0, 99.0, 102.5)
+    text = format_history("Bybit", "BTCUSDT", "30m", candles)
+    assert "(30 x 1m)" in text and "+29.50%" in text
+    assert "aucune donnée" in format_history("Bybit", "BTCUSDT", "1h", [])
+
+
+def test_detect_batch_records_ticks_when_store_enabled(monkeypatch, tmp_path):
+    cfg = make_config()
+    monkeypatch.setattr(app, "price_data", app.SymbolIndex(cfg.detection_timeframes()))
+    store = TickStore(str(tmp_path))
+    monkeypatch.setattr(app, "TICKS", store)
+    batch = TickBatch("Bybit")
+    batch.append("HISTUSDT", 60.0, 100.0)
+    batch.append("HISTUSDT", 90.0, 101.0)
+    app.detect_batch(cfg, batch)
+    assert store.candles("Bybit", "HISTUSDT", 0.0, 120.0) == [(60.0, 100.0, 101.0, 100.0, 101.0)]
@@ -0,0 +1,52 @@
+from timerwheel import TimerWheel
+
+
+def test_timer_wheel_fires_on_time_across_levels() -> None:
+    wheel = TimerWheel(now=0)
+    fired = {}
+    for delay in (1, 5, 63, 64, 65, 200, 4095, 4096, 5000, 300_000):
+        wheel.schedule_at(delay, lambda d=delay: fired.setdefault(d, wheel.current))
+    for t in range(0, 300_010, 7):
+        wheel.advance(t)
+    assert fired == {d: d for d in fired}
+    assert len(fired) == 10
+    assert len(wheel) == 0 and wheel.fired == 10
+
+
+def test_timer_wheel_cancel_and_keyed_reschedule() -> None:
+    wheel = TimerWheel(now=0)
+    calls = []
+    t = wheel.schedule_at(10, lambda: calls.append("a"))
+    assert wheel.cancel(t)
+    assert not wheel.cancel(t)
+    wheel.schedule_at(10, lambda: calls.append("b"), key="k")
+    # même clé: l'échéance précédente est remplacée
+    wheel.schedule_at(20, lambda: calls.append("c"), key="k")
+    wheel.advance(15)
+    assert calls == []
+    wheel.advance(20)
+    assert calls == ["c"]
+    assert "k" not in wheel.keys
+
+
+def test_timer_wheel_past_deadline_fires_next_tick() -> None:
+    wheel = TimerWheel(now=100)
+    calls = []
+    wheel.schedule_at(50, lambda: calls.append(1))
+    wheel.advance(100)
+    assert calls == []
+    wheel.advance(101)
+    assert calls == [1]
+
+
+def test_timer_wheel_callback_errors_are_contained() -> None:
+    wheel = TimerWheel(now=0)
+    calls = []
+
+    def boom():
+        raise RuntimeError("x")
+
+    wheel.schedule_at(1, boom)
+    wheel.schedule_at(1, lambda: calls.append(1))
+    assert wheel.advance(1) == 2
+    assert calls == [1]
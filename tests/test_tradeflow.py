@@ -0,0 +1,38 @@
+import pytest
+
+from tradeflow import FlowManager, TradeFlow
+
+
+def test_trade_flow_batches_and_rolls() -> None:
+    tf = TradeFlow(res_sec=5, slots=4)
+    tf.ingest([(0.0, True, 2.0, 10.0), (1.0, False, 1.0, 10.0), (6.0, True, 1.0, 10.0)])
+    assert tf.count == 2 and tf.trades == 3
+    f = tf.flow(20, now=6.0)
+    assert f.buy_notional == pytest.approx(30.0)
+    assert f.sell_notional == pytest.approx(10.0)
+    assert f.cvd_qty == pytest.approx(2.0)
+    assert f.imbalance == pytest.approx(0.5)
+    # fenêtre courte: seul le bucket courant
+    assert tf.flow(5, now=6.0).sell_notional == 0.0
+
+    # mémoire bornée: les vieux buckets sont écrasés
+    tf.ingest([(t, False, 1.0, 10.0) for t in (10.0, 15.0, 20.0, 25.0)])
+    assert tf.count == 4
+    assert tf.flow(100, now=25.0).buy_notional == 0.0
+
+
+def test_flow_manager_subscriptions() -> None:
+    flows = FlowManager(idle_sec=60)
+    flows.touch("BTCUSDT", now=0.0)
+    assert flows.sync(now=0.0) == (["BTCUSDT"], [])
+    rows = [
+        {"T": 1000, "S": "Buy", "v": "1", "p": "100"},
+        {"T": 1500, "S": "Sell", "v": "3", "p": "100"},
+        {"T": 1600, "S": "Sell", "v": "bad", "p": "100"},
+    ]
+    flows.on_message(flows.topic("BTCUSDT"), rows)
+    flows.on_message(flows.topic("ETHUSDT"), rows)  # non abonné
+    assert flows.imbalance("BTCUSDT", now=2.0) == pytest.approx(-0.5)
+    assert flows.flow("ETHUSDT") is None
+    assert flows.sync(now=100.0) == ([], ["BTCUSDT"])
+    assert flows.flow("BTCUSDT") is None
@@ -0,0 +1,234 @@
+import asyncio
+import importlib.util
+import json
+
+import pytest
+
+from webhook import WebhookServer
+
+SECRET = "s3cret"
+
+
+async def _post(port: int, body: bytes, secret: str = SECRET, path: str = "/telegram",
+                conn: tuple | None = None) -> tuple[int, tuple]:
+    reader, writer = conn or await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+        f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return status, (reader, writer)
+
+
+def _update(i: int) -> bytes:
+    return json.dumps({"update_id": i}).encode()
+
+
+def test_webhook_validates_secret_and_path() -> None:
+    async def run() -> None:
+        seen = []
+
+        async def handler(update):
+            seen.append(update["update_id"])
+
+        server = WebhookServer(handler, SECRET)
+        await server.start("127.0.0.1", 0)
+        try:
+            assert (await _post(server.port, _update(1)))[0] == 200
+            assert (await _post(server.port, _update(2), secret="wrong"))[0] == 401
+            assert (await _post(server.port, _update(3), path="/other"))[0] == 404
+            assert (await _post(server.port, b"{not json"))[0] == 400
+        finally:
+            await server.close()
+        assert seen == [1]
+        assert server.rejected == 1 and server.handled == 1
+
+    asyncio.run(run())
+
+
+def test_webhook_bounds_concurrency_and_sheds_load() -> None:
+    async def run() -> None:
+        running = peak = 0
+        release = asyncio.Event()
+
+        async def handler(update):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+
+        server = WebhookServer(handler, SECRET, workers=2, queue_size=3)
+        await server.start("127.0.0.1", 0)
+        try:
+            # une seule connexion keep-alive pour toutes les requêtes
+            status, conn = await _post(server.port, _update(0))
+            statuses = [status]
+            for i in range(1, 8):
+                await asyncio.sleep(0.01)
+                status, conn = await _post(server.port, _update(i), conn=conn)
+                statuses.append(status)
+            # 2 en cours + 3 en file acceptés, le reste refusé (Telegram réessaiera)
+            assert statuses.count(200) == 5
+            assert statuses.count(503) == 3
+            assert peak == 2
+            conn[1].close()
+            release.set()
+        finally:
+            await server.close()
+        assert server.handled == 5 and server.dropped == 3
+
+    asyncio.run(run())
+
+
+def test_webhook_bounds_request_headers(monkeypatch) -> None:
+    import webhook
+
+    async def raw(port: int, head: bytes) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(head)
+        await writer.drain()
+        line = await reader.readline()
+        writer.close()
+        return line
+
+    async def run() -> None:
+        async def handler(update):
+            pass
+
+        server = WebhookServer(handler, SECRET)
+        await server.start("127.0.0.1", 0)
+        try:
+            many = b"".join(b"X-H%d: v\r\n" % i for i in range(webhook.MAX_HEADERS + 1))
+            assert (await raw(server.port, b"POST /telegram HTTP/1.1\r\n" + many + b"\r\n")).split()[1] == b"431"
+            long = b"X-Big: " + b"a" * webhook.MAX_HEADER_BYTES + b"\r\n"
+            assert (await raw(server.port, b"POST /telegram HTTP/1.1\r\n" + long + b"\r\n")).split()[1] == b"431"
+
+            # en-têtes au compte-gouttes: chaque ligne arrive à temps, l'en-tête entier non
+            monkeypatch.setattr(webhook, "READ_TIMEOUT", 0.3)
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"POST /telegram HTTP/1.1\r\n")
+            try:
+                for i in range(6):
+                    await asyncio.sleep(0.1)
+                    writer.write(b"X-Slow-%d: v\r\n" % i)
+                closed = await asyncio.wait_for(reader.read(), 2.0) == b""
+            except ConnectionError:
+                closed = True
+            writer.close()
+            assert closed   # connexion fermée par le serveur
+        finally:
+            await server.close()
+        assert server.received == 0
+
+    asyncio.run(run())
+
+
+def _installed(*names: str) -> bool:
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except ValueError:  # module remplacé par un stub (sans __spec__)
+            return False
+    return True
+
+
+class FakeBotAPI:
+    """Serveur Bot API factice: enregistre les méthodes appelées, répond ``ok``."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.server = None
+        self.port = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._client, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _client(self, reader, writer) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                path = line.split()[1].decode()
+                length = 0
+                while (header := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                self.calls.append(path.rsplit("/", 1)[1])
+                body = b'{"ok":true,"result":true}'
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+@pytest.mark.skipif(
+    not _installed("aiogram", "aiohttp", "httpx", "websockets"), reason="aiogram / aiohttp not installed",
+)
+def test_serve_bot_webhook_against_fake_bot_api() -> None:
+    from aiogram import Dispatcher
+
+    import app
+    from config import Config
+
+    async def run() -> None:
+        api = FakeBotAPI()
+        await api.start()
+        probe = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = probe.sockets[0].getsockname()[1]
+        probe.close()
+        await probe.wait_closed()
+        cfg = Config(
+            telegram_bot_token="42:TEST", authorized_users={1}, threshold_percent=5.0, time_window_sec=60,
+            cooldown_sec=0, require_oi_confirm=False, confirm_oi_pct=1.0, use_binance_ws=False,
+            use_bybit_ws=False, enable_coinglass_capture=False, chromedriver_path=None, chrome_user_data=None,
+            telegram_mode="webhook",
+            webhook_url="https://bot.example.com/telegram", webhook_host="127.0.0.1",
+            webhook_port=port, webhook_secret=SECRET, telegram_api_url=f"http://127.0.0.1:{api.port}",
+        )
+        seen = asyncio.Event()
+        dp = Dispatcher()
+
+        @dp.message()
+        async def on_message(message) -> None:
+            assert message.text == "/status"
+            seen.set()
+
+        bot = app.make_bot(cfg)
+        task = asyncio.create_task(app.serve_bot(cfg, bot, dp))
+        try:
+            for _ in range(100):
+                if "setWebhook" in api.calls:
+                    break
+                await asyncio.sleep(0.02)
+            update = json.dumps({"update_id": 1, "message": {
+                "message_id": 1, "date": 0, "text": "/status",
+                "chat": {"id": 1, "type": "private"}, "from": {"id": 1, "is_bot": False, "first_name": "u"},
+            }}).encode()
+            status, (_, writer) = await _post(port, update)
+            writer.close()
+            assert status == 200
+            await asyncio.wait_for(seen.wait(), 5.0)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await api.close()
+        assert api.calls == ["setWebhook", "deleteWebhook"]
+
+    asyncio.run(run())
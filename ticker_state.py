@@ -0,0 +1,105 @@
+"""Per-symbol Bybit ticker state built from the `tickers.*` stream.
+
+Bybit envoie un ``snapshot`` puis des ``delta`` ne contenant que les champs
+modifiés. On fusionne chaque delta dans le dernier état connu, et on
+échantillonne l'open interest et le funding dans les historiques de
+``state`` afin de répondre localement (zéro appel REST) à:
+
+- la variation d'OI sur ~1h (cf. ``bybit_api.get_oi_1h_change``)
+- le funding rate courant (cf. ``bybit_api.get_current_funding_rate``)
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import state
+
+OI_LOOKBACK_SEC = 3600
+HISTORY_SEC = OI_LOOKBACK_SEC + 300
+SAMPLE_SEC = 60.0
+STALE_SEC = 300.0
+
+
+def _f(x: Any) -> Optional[float]:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return None
+
+
+class TickerState:
+    """Fusion snapshot + deltas et historiques OI / funding échantillonnés."""
+
+    def __init__(self, sample_sec: float = SAMPLE_SEC, history_sec: float = HISTORY_SEC) -> None:
+        self.sample_sec = sample_sec
+        self.history_sec = history_sec
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.updated: Dict[str, float] = {}      # dernier message reçu
+        self.since: Dict[str, float] = {}        # premier message reçu (début de l'historique)
+        self._last_sample: Dict[str, float] = {}
+
+    def apply(self, msg_type: str, symbol: str, data: Dict[str, Any], ts: float) -> Dict[str, Any]:
+        """Fusionne un message ``snapshot``/``delta`` et retourne l'état complet."""
+        if msg_type == "snapshot" or symbol not in self.tickers:
+            cur = dict(data)
+            self.tickers[symbol] = cur
+        else:
+            cur = self.tickers[symbol]
+            cur.update(data)
+        self.updated[symbol] = ts
+        self.since.setdefault(symbol, ts)
+        if ts - self._last_sample.get(symbol, float("-inf")) >= self.sample_sec:
+            self._sample(symbol, cur, ts)
+        return cur
+
+    def _sample(self, symbol: str, cur: Dict[str, Any], ts: float) -> None:
+        oi = _f(cur.get("openInterest"))
+        if oi is not None:
+            state.update_oi(symbol, oi, ts, self.history_sec)
+        funding = _f(cur.get("fundingRate"))
+        if funding is not None:
+            state.update_funding(symbol, funding, ts, self.history_sec)
+        self._last_sample[symbol] = ts
+
+    def is_live(self, symbol: str, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.updated.get(symbol, float("-inf")) < STALE_SEC
+
+    def funding(self, symbol: str, now: float | None = None) -> Optional[float]:
+        """Funding courant si le flux du symbole est vivant, sinon None."""
+        if not self.is_live(symbol, now):
+            return None
+        return _f(self.tickers.get(symbol, {}).get("fundingRate"))
+
+    def mark_price(self, symbol: str, now: float | None = None) -> Optional[float]:
+        if not self.is_live(symbol, now):
+            return None
+        return _f(self.tickers.get(symbol, {}).get("markPrice"))
+
+    def oi_change(
+        self,
+        symbol: str,
+        lookback: float = OI_LOOKBACK_SEC,
+        now: float | None = None,
+    ) -> Optional[Tuple[float, float, float]]:
+        """(oi_il_y_a_lookback, oi_last, delta_pct), ou None si l'historique est trop court."""
+        now = time.time() if now is None else now
+        if not self.is_live(symbol, now):
+            return None
+        since = self.since.get(symbol)
+        if since is None or now - since < lookback - self.sample_sec:
+            return None
+        hist = state.OI_HISTORY.get(symbol)
+        if not hist:
+            return None
+        cutoff = now - lookback
+        oi_then = next((v for t, v in hist if t >= cutoff - self.sample_sec), None)
+        oi_last = _f(self.tickers[symbol].get("openInterest"))
+        if oi_then is None or oi_last is None:
+            return None
+        delta_pct = (oi_last - oi_then) / oi_then * 100.0 if oi_then else 0.0
+        return oi_then, oi_last, delta_pct
+
+
+TICKERS = TickerState()
@@ -0,0 +1,373 @@
+"""Append-only columnar store of normalized ticks and derived 1m candles.
+
+Arborescence: ``<root>/<exchange>/<SYMBOL>/<YYYYMMDD>.<col>``, un jeu de
+fichiers par symbole et par jour (UTC), tous en float64 natifs:
+
+- ``.ts`` / ``.px``: colonnes des ticks (timestamp, prix)
+- ``.idx``: petit index (début de minute, position du premier tick de la
+  minute), une entrée par minute ayant reçu des ticks
+- ``.c1m``: bougies 1 minute dérivées (début, open, high, low, close)
+
+Les écritures sont bufferisées et ajoutées en fin de fichier par ``flush``
+(thread à part); ``close`` ferme d'abord les bougies en cours (arrêt). Une
+minute reprise après un redémarrage a deux lignes ``.c1m`` (et deux entrées
+d'index), fusionnées à la lecture. Les lectures ``mmap``-ent les fichiers: l'index réduit la
+recherche à une minute, puis bisection sur la colonne des timestamps; seule
+la tranche demandée est copiée.
+
+Rétention: au-delà de ``tick_days`` les ticks bruts sont compactés (seules
+les bougies 1m restent), au-delà de ``retention_days`` tout est supprimé.
+"""
+from __future__ import annotations
+
+import calendar
+import logging
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DAY = 86400
+MINUTE = 60
+CANDLE_FIELDS = 5
+TICK_COLUMNS = (".ts", ".px", ".idx")
+RANGE_UNITS = {"m": MINUTE, "h": 3600, "d": DAY}
+HISTORY_ROWS = 12
+
+
+def day_of(ts: float) -> str:
+    return time.strftime("%Y%m%d", time.gmtime(ts))
+
+
+def day_start(day: str) -> float:
+    return float(calendar.timegm(time.strptime(day, "%Y%m%d")))
+
+
+class _Series:
+    """État d'écriture d'un (exchange, symbole): jour courant, minute courante."""
+
+    __slots__ = ("day", "day_start", "day_end", "count", "minute", "candle")
+
+    def __init__(self) -> None:
+        self.day = ""
+        self.day_start = 0.0            # bornes UTC du jour courant: day_of() seulement au changement
+        self.day_end = 0.0
+        self.count = 0                  # ticks déjà dans le fichier du jour (+ en attente)
+        self.minute = -1.0
+        self.candle: Optional[List[float]] = None   # [start, open, high, low, close]
+
+
+class _Mapped:
+    """Fichier float64 en lecture via mmap (vide si absent)."""
+
+    def __init__(self, path: str) -> None:
+        self.mm: Optional[mmap.mmap] = None
+        self.view: memoryview = memoryview(array("d"))
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            size -= size % 8            # écriture concurrente: dernier double partiel ignoré
+            if size:
+                self.mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                self.view = memoryview(self.mm).cast("d")
+
+    def close(self) -> None:
+        self.view.release()
+        if self.mm is not None:
+            self.mm.close()
+
+    def __enter__(self) -> memoryview:
+        return self.view
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class TickStore:
+    def __init__(self, root: str = "", tick_days: int = 2, retention_days: int = 30) -> None:
+        self.root = root
+        self.tick_days = tick_days
+        self.retention_days = retention_days
+        self.series: Dict[Tuple[str, str], _Series] = {}
+        self.pending: Dict[str, array] = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.written = 0            # octets écrits
+        self.appended = 0           # ticks reçus
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def configure(self, root: str, tick_days: int, retention_days: int) -> None:
+        self.root = root
+        self.tick_days = tick_days
+        self.retention_days = retention_days
+
+    def _path(self, exchange: str, symbol: str, day: str, col: str) -> str:
+        return os.path.join(self.root, exchange, symbol, day + col)
+
+    def _buf(self, path: str) -> array:
+        buf = self.pending.get(path)
+        if buf is None:
+            buf = self.pending[path] = array("d")
+        return buf
+
+    # ---- écriture ----
+    def append(self, exchange: str, symbol: str, ts: float, price: float) -> None:
+        with self.lock:
+            self._append(exchange, symbol, ts, price)
+
+    def append_many(self, exchange: str, symbols: Iterable[str], ts: Iterable[float], prices: Iterable[float]) -> None:
+        with self.lock:
+            for symbol, t, p in zip(symbols, ts, prices):
+                self._append(exchange, symbol, t, p)
+
+    def _append(self, exchange: str, symbol: str, ts: float, price: float) -> None:
+        key = (exchange, symbol)
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = _Series()
+        if not s.day_start <= ts < s.day_end:
+            self._close_candle(exchange, symbol, s)
+            s.day = day_of(ts)
+            s.day_start = ts - ts % DAY
+            s.day_end = s.day_start + DAY
+            s.count = self._file_count(self._path(exchange, symbol, s.day, ".ts"))
+        day = s.day
+        minute = ts - ts % MINUTE
+        if minute != s.minute:
+            self._close_candle(exchange, symbol, s)
+            s.minute = minute
+            s.candle = [minute, price, price, price, price]
+            self._buf(self._path(exchange, symbol, day, ".idx")).extend((minute, float(s.count)))
+        else:
+            c = s.candle
+            if price > c[2]:
+                c[2] = price
+            if price < c[3]:
+                c[3] = price
+            c[4] = price
+        self._buf(self._path(exchange, symbol, day, ".ts")).append(ts)
+        self._buf(self._path(exchange, symbol, day, ".px")).append(price)
+        s.count += 1
+        self.appended += 1
+
+    def _file_count(self, path: str) -> int:
+        try:
+            on_disk = os.path.getsize(path) // 8
+        except OSError:
+            on_disk = 0
+        pending = self.pending.get(path)
+        return on_disk + (len(pending) if pending is not None else 0)
+
+    def _close_candle(self, exchange: str, symbol: str, s: _Series) -> None:
+        if s.candle is not None:
+            self._buf(self._path(exchange, symbol, s.day, ".c1m")).extend(s.candle)
+            s.candle = None
+
+    def flush(self) -> int:
+        """Ajoute les buffers en fin de fichier; retourne les octets écrits."""
+        with self.write_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+            written = 0
+            for path, buf in pending.items():
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "ab") as f:
+                        buf.tofile(f)
+                    written += len(buf) * 8
+                except OSError as e:
+                    logging.warning("tick store write failed (%s): %s", path, e)
+            self.written += written
+            return written
+
+    def close(self) -> int:
+        """Arrêt: bougies en cours fermées puis dernier ``flush``."""
+        with self.lock:
+            for (exchange, symbol), s in self.series.items():
+                self._close_candle(exchange, symbol, s)
+            self.series.clear()
+        return self.flush()
+
+    # ---- lecture ----
+    def _days(self, start: float, end: float) -> List[str]:
+        days, t = [], start - start % DAY
+        while t <= end:
+            days.append(day_of(t))
+            t += DAY
+        return days
+
+    def ticks(self, exchange: str, symbol: str, start: float, end: float) -> Tuple[array, array]:
+        """Ticks de [start, end] (timestamps, prix), jours consécutifs concaténés."""
+        self.flush()
+        out_ts, out_px = array("d"), array("d")
+        for day in self._days(start, end):
+            base = lambda col: self._path(exchange, symbol, day, col)  # noqa: E731
+            with _Mapped(base(".ts")) as ts, _Mapped(base(".idx")) as idx:
+                n = len(ts)
+                if not n:
+                    continue
+                lo, hi = self._narrow(idx, start, end, n)
+                i = bisect_left(ts, start, lo, hi)
+                j = bisect_right(ts, end, i, hi)
+                if i >= j:
+                    continue
+                out_ts.frombytes(ts[i:j].cast("B"))
+                with _Mapped(base(".px")) as px:
+                    out_px.frombytes(px[i:j].cast("B"))
+        return out_ts, out_px
+
+    @staticmethod
+    def _narrow(idx: memoryview, start: float, end: float, n: int) -> Tuple[int, int]:
+        """Bornes de recherche dans la colonne des ticks d'après l'index par minute."""
+        with idx[0::2] as minutes:
+            if not len(minutes):
+                return 0, n
+            # première entrée de la minute de *start* (une minute reprise en a deux)
+            k = bisect_left(minutes, start - start % MINUTE)
+            lo = int(idx[2 * k + 1]) if k < len(minutes) else n
+            k = bisect_right(minutes, end)
+            hi = int(idx[2 * k + 1]) if k < len(minutes) else n
+        return lo, min(hi, n)
+
+    def candles(self, exchange: str, symbol: str, start: float, end: float) -> List[Tuple[float, ...]]:
+        """Bougies 1m dont le début est dans [start, end] (plus la minute en cours)."""
+        self.flush()
+        out: List[Tuple[float, ...]] = []
+        for day in self._days(start, end):
+            with _Mapped(self._path(exchange, symbol, day, ".c1m")) as c, c[0::CANDLE_FIELDS] as starts:
+                i = bisect_left(starts, start - start % MINUTE)
+                j = bisect_right(starts, end)
+                out.extend(tuple(c[k * CANDLE_FIELDS:(k + 1) * CANDLE_FIELDS]) for k in range(i, j))
+        with self.lock:
+            s = self.series.get((exchange, symbol))
+            if s is not None and s.candle is not None and start - start % MINUTE <= s.candle[0] <= end:
+                out.append(tuple(s.candle))
+        return _merge_minutes(out)
+
+    def exchanges_for(self, symbol: str) -> List[str]:
+        if not self.root or not os.path.isdir(self.root):
+            return []
+        return sorted(ex for ex in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, ex, symbol)))
+
+    # ---- rétention / compaction ----
+    def maintain(self, now: float | None = None) -> Tuple[int, int]:
+        """Compacte (ticks bruts supprimés, bougies gardées) et purge; retourne (compactés, purgés)."""
+        if not self.root or not os.path.isdir(self.root):
+            return 0, 0
+        now = time.time() if now is None else now
+        today = day_start(day_of(now))
+        compact_before = today - self.tick_days * DAY
+        purge_before = today - self.retention_days * DAY
+        compacted = purged = 0
+        for exchange in os.listdir(self.root):
+            ex_dir = os.path.join(self.root, exchange)
+            if not os.path.isdir(ex_dir):
+                continue
+            for symbol in os.listdir(ex_dir):
+                sym_dir = os.path.join(ex_dir, symbol)
+                for name in os.listdir(sym_dir):
+                    day, col = os.path.splitext(name)
+                    try:
+                        start = day_start(day)
+                    except ValueError:
+                        continue
+                    path = os.path.join(sym_dir, name)
+                    try:
+                        if self.retention_days > 0 and start < purge_before:
+                            os.remove(path)
+                            purged += 1
+                        elif self.tick_days > 0 and start < compact_before and col in TICK_COLUMNS:
+                            os.remove(path)
+                            compacted += 1
+                    except FileNotFoundError:   # autre shard passé avant
+                        pass
+                try:
+                    if not os.listdir(sym_dir):
+                        os.rmdir(sym_dir)
+                except OSError:
+                    pass
+        if compacted or purged:
+            logging.info("tick store: %d files compacted, %d purged", compacted, purged)
+        return compacted, purged
+
+    # ---- rapports ----
+    def nbytes(self) -> int:
+        with self.lock:
+            return len(self.series) * 300 + sum(len(b) * 8 + 100 for b in self.pending.values())
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "disabled"
+        return f"{len(self.series)} series, {self.appended} ticks, {self.written / 1e6:.1f}MB written"
+
+
+def _merge_minutes(candles: List[Tuple[float, ...]]) -> List[Tuple[float, ...]]:
+    """Fusionne les lignes consécutives d'une même minute (bougie reprise après redémarrage)."""
+    out: List[Tuple[float, ...]] = []
+    for c in candles:
+        if out and out[-1][0] == c[0]:
+            prev = out[-1]
+            out[-1] = (prev[0], prev[1], max(prev[2], c[2]), min(prev[3], c[3]), c[4])
+        else:
+            out.append(c)
+    return out
+
+
+def parse_range(text: str) -> float:
+    """``30m`` / ``2h`` / ``1d`` -> secondes (ValueError sinon)."""
+    text = text.strip().lower()
+    unit = RANGE_UNITS.get(text[-1:])
+    if unit is None:
+        raise ValueError(f"bad range: {text!r}")
+    value = float(text[:-1])
+    if value <= 0:
+        raise ValueError(f"bad range: {text!r}")
+    return value * unit
+
+
+def aggregate(candles: List[Tuple[float, ...]], rows: int) -> List[Tuple[float, ...]]:
+    """Regroupe des bougies 1m consécutives en au plus *rows* bougies."""
+    if not candles:
+        return []
+    size = -(-len(candles) // max(rows, 1))
+    out = []
+    for i in range(0, len(candles), size):
+        chunk = candles[i:i + size]
+        out.append((
+            chunk[0][0], chunk[0][1],
+            max(c[2] for c in chunk), min(c[3] for c in chunk), chunk[-1][4],
+        ))
+    return out
+
+
+def format_history(
+    exchange: str, symbol: str, label: str, candles: List[Tuple[float, ...]], rows: int = HISTORY_ROWS,
+) -> str:
+    """Résumé texte d'une plage de bougies 1m (à placer dans un bloc <pre>)."""
+    if not candles:
+        return f"{symbol} {exchange} {label}: aucune donnée"
+    first, last = candles[0], candles[-1]
+    high = max(c[2] for c in candles)
+    low = min(c[3] for c in candles)
+    change = (last[4] / first[1] - 1.0) * 100 if first[1] else 0.0
+    lines = [
+        f"{symbol} {exchange} {label} ({len(candles)} x 1m)",
+        f"O {first[1]:.6g}  H {high:.6g}  L {low:.6g}  C {last[4]:.6g}  ({change:+.2f}%)",
+        f"{'time':<11} {'open':>10} {'high':>10} {'low':>10} {'close':>10}",
+    ]
+    for start, o, h, l, c in aggregate(candles, rows):
+        when = time.strftime("%m-%d %H:%M", time.gmtime(start))
+        lines.append(f"{when:<11} {o:>10.6g} {h:>10.6g} {l:>10.6g} {c:>10.6g}")
+    return "\n".join(lines)
+
+
+TICKS = TickStore()
@@ -0,0 +1,153 @@
+"""Hierarchical timer wheel shared by all housekeeping.
+
+Cooldowns d'alerte, éviction des fenêtres inactives et TTL des caches sont
+des échéances: plutôt que de balayer tout l'univers, chaque échéance est
+posée dans la roue.
+
+- ``schedule`` / ``cancel``: O(1) (slot = dict indexé par timer)
+- ``advance``: O(ticks écoulés + timers échus); une échéance lointaine
+  descend d'un niveau quand son slot parent est atteint (cascade)
+
+Niveaux par défaut: 64 slots de 1s, 64 de 64s, 64 de ~68 min; au-delà
+(> ~3 jours) un slot de débordement re-cascadé à chaque tour du dernier
+niveau. Les callbacks s'exécutent hors verrou, dans le thread qui appelle
+``advance`` (la boucle asyncio); ``schedule``/``cancel`` sont thread-safe
+(le handler liquidations tourne dans le thread pybit).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 3
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "key", "slot")
+
+    def __init__(self, deadline: int, callback: Callable[[], Any], key: Hashable | None) -> None:
+        self.deadline = deadline            # en ticks absolus
+        self.callback = callback
+        self.key = key
+        self.slot: Optional[Dict[Timer, None]] = None
+
+    @property
+    def active(self) -> bool:
+        return self.slot is not None
+
+
+class TimerWheel:
+    """Roue hiérarchique à résolution ``tick_sec``."""
+
+    def __init__(self, tick_sec: float = 1.0, levels: int = LEVELS, now: float | None = None) -> None:
+        self.tick_sec = tick_sec
+        self.levels = levels
+        self.wheels: List[List[Dict[Timer, None]]] = [[{} for _ in range(SLOTS)] for _ in range(levels)]
+        self.overflow: Dict[Timer, None] = {}
+        self.current = self._tick(time.time() if now is None else now)
+        self.keys: Dict[Hashable, Timer] = {}
+        self.lock = threading.RLock()
+        self.fired = 0
+
+    def _tick(self, ts: float) -> int:
+        return int(ts // self.tick_sec)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return sum(len(s) for w in self.wheels for s in w) + len(self.overflow)
+
+    def _place(self, timer: Timer, cascading: bool = False) -> None:
+        # en cascade, le slot du tick courant est traité juste après
+        earliest = 0 if cascading else 1
+        delta = timer.deadline - self.current
+        if delta < earliest:
+            delta, timer.deadline = earliest, self.current + earliest   # échéance passée
+        for level in range(self.levels):
+            if delta < SLOTS << (SLOT_BITS * level):
+                slot = self.wheels[level][(timer.deadline >> (SLOT_BITS * level)) & (SLOTS - 1)]
+                break
+        else:
+            slot = self.overflow
+        slot[timer] = None
+        timer.slot = slot
+
+    def schedule_at(self, when: float, callback: Callable[[], Any], key: Hashable | None = None) -> Timer:
+        """Pose une échéance absolue; une clé déjà posée est remplacée."""
+        timer = Timer(self._tick(when), callback, key)
+        with self.lock:
+            if key is not None:
+                old = self.keys.pop(key, None)
+                if old is not None:
+                    self._remove(old)
+                self.keys[key] = timer
+            self._place(timer)
+        return timer
+
+    def schedule(self, delay: float, callback: Callable[[], Any], key: Hashable | None = None) -> Timer:
+        return self.schedule_at(time.time() + delay, callback, key)
+
+    def _remove(self, timer: Timer) -> None:
+        if timer.slot is not None:
+            timer.slot.pop(timer, None)
+            timer.slot = None
+
+    def cancel(self, timer_or_key: Timer | Hashable) -> bool:
+        with self.lock:
+            timer = timer_or_key if isinstance(timer_or_key, Timer) else self.keys.get(timer_or_key)
+            if timer is None or not timer.active:
+                return False
+            self._remove(timer)
+            if timer.key is not None and self.keys.get(timer.key) is timer:
+                del self.keys[timer.key]
+            return True
+
+    def _cascade(self, level: int) -> None:
+        """Redescend les timers du slot courant de *level* vers les niveaux inférieurs."""
+        if level >= self.levels:
+            slot = self.overflow
+        else:
+            slot = self.wheels[level][(self.current >> (SLOT_BITS * level)) & (SLOTS - 1)]
+        timers = list(slot)
+        slot.clear()
+        for t in timers:
+            t.slot = None
+            self._place(t, cascading=True)
+
+    def advance(self, now: float | None = None) -> int:
+        """Avance jusqu'à *now* et exécute les échéances; retourne le nombre exécuté."""
+        target = self._tick(time.time() if now is None else now)
+        fired = 0
+        while True:
+            with self.lock:
+                if self.current >= target:
+                    break
+                self.current += 1
+                # cascade quand un niveau inférieur a fait un tour complet
+                for level in range(1, self.levels + 1):
+                    if self.current & ((1 << (SLOT_BITS * level)) - 1):
+                        break
+                    self._cascade(level)
+                slot = self.wheels[0][self.current & (SLOTS - 1)]
+                due = [t for t in slot if t.deadline <= self.current]
+                for t in due:
+                    self._remove(t)
+                    if t.key is not None and self.keys.get(t.key) is t:
+                        del self.keys[t.key]
+            for t in due:
+                try:
+                    t.callback()
+                except Exception:
+                    logging.exception("timer callback failed")
+            fired += len(due)
+        self.fired += fired
+        return fired
+
+    def summary(self) -> str:
+        return f"{len(self)} pending, {self.fired} fired"
+
+
+WHEEL = TimerWheel()
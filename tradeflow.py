@@ -0,0 +1,182 @@
+"""Rolling aggressor flow (CVD) from the Bybit ``publicTrade`` stream.
+
+Même abonnement paresseux que les carnets (``orderbook.BookManager``):
+un symbole chaud (``touch``) est suivi pendant ``idle_sec``.
+
+Par symbole, un ring de ``slots`` buckets de ``res_sec`` secondes garde le
+notionnel et le volume acheteur / vendeur: écriture O(1), mémoire bornée,
+lecture en au plus ``window / res_sec`` buckets. Un message
+``publicTrade`` contient souvent des dizaines de trades pendant un pump: ils
+sont d'abord sommés par bucket puis appliqués en une fois.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+RES_SEC = 5
+SLOTS = 120          # 10 min d'historique
+WINDOW_SEC = 300.0   # fenêtre par défaut pour le score
+IDLE_SEC = 900.0
+
+_START, _BUY, _SELL, _BUY_QTY, _SELL_QTY = range(5)
+_FIELDS = 5
+
+
+class Flow(NamedTuple):
+    buy_notional: float
+    sell_notional: float
+    cvd_qty: float        # volume acheteur - vendeur (en base)
+
+    @property
+    def cvd_notional(self) -> float:
+        return self.buy_notional - self.sell_notional
+
+    @property
+    def imbalance(self) -> Optional[float]:
+        """(achats - ventes) / total ∈ [-1, 1] en notionnel."""
+        total = self.buy_notional + self.sell_notional
+        return self.cvd_notional / total if total else None
+
+
+class TradeFlow:
+    """Buckets glissants du flux agresseur d'un symbole."""
+
+    __slots__ = ("res", "slots", "data", "head", "count", "trades")
+
+    def __init__(self, res_sec: int = RES_SEC, slots: int = SLOTS) -> None:
+        self.res = res_sec
+        self.slots = slots
+        self.data = array("d", [0.0]) * (slots * _FIELDS)
+        self.head = -1
+        self.count = 0
+        self.trades = 0
+
+    def _bucket(self, ts: float) -> float:
+        return float(int(ts // self.res) * self.res)
+
+    def add_bucket(self, start: float, buy: float, sell: float, buy_qty: float, sell_qty: float) -> None:
+        d = self.data
+        if self.head >= 0:
+            base = self.head * _FIELDS
+            cur = d[base + _START]
+            if start < cur:
+                # trade en retard: rangé dans le bucket courant
+                start = cur
+            if start == cur:
+                d[base + _BUY] += buy
+                d[base + _SELL] += sell
+                d[base + _BUY_QTY] += buy_qty
+                d[base + _SELL_QTY] += sell_qty
+                return
+        self.head = (self.head + 1) % self.slots
+        self.count = min(self.count + 1, self.slots)
+        base = self.head * _FIELDS
+        d[base:base + _FIELDS] = array("d", (start, buy, sell, buy_qty, sell_qty))
+
+    def ingest(self, trades: Iterable[Tuple[float, bool, float, float]]) -> None:
+        """Lot de trades (ts, is_buy, qty, price), sommés par bucket avant écriture."""
+        pending: Dict[float, List[float]] = {}
+        n = 0
+        for ts, is_buy, qty, price in trades:
+            acc = pending.get(b := self._bucket(ts))
+            if acc is None:
+                acc = pending[b] = [0.0, 0.0, 0.0, 0.0]
+            if is_buy:
+                acc[0] += qty * price
+                acc[2] += qty
+            else:
+                acc[1] += qty * price
+                acc[3] += qty
+            n += 1
+        for start in sorted(pending):
+            self.add_bucket(start, *pending[start])
+        self.trades += n
+
+    def flow(self, window_sec: float, now: float) -> Flow:
+        """Flux des buckets commencés dans les *window_sec* dernières secondes."""
+        floor = self._bucket(now) - window_sec + self.res
+        d = self.data
+        buy = sell = cvd = 0.0
+        for back in range(self.count):
+            base = ((self.head - back) % self.slots) * _FIELDS
+            if d[base + _START] < floor:
+                break
+            buy += d[base + _BUY]
+            sell += d[base + _SELL]
+            cvd += d[base + _BUY_QTY] - d[base + _SELL_QTY]
+        return Flow(buy, sell, cvd)
+
+
+class FlowManager:
+    """Abonnements ``publicTrade`` paresseux pour les symboles chauds."""
+
+    def __init__(self, idle_sec: float = IDLE_SEC, window_sec: float = WINDOW_SEC) -> None:
+        self.idle_sec = idle_sec
+        self.window_sec = window_sec
+        self.flows: Dict[str, TradeFlow] = {}
+        self.wanted: Dict[str, float] = {}
+        self.subscribed: Set[str] = set()
+        self.batches = 0
+
+    @staticmethod
+    def topic(symbol: str) -> str:
+        return f"publicTrade.{symbol}"
+
+    def touch(self, symbol: str, now: float | None = None) -> None:
+        self.wanted[symbol] = time.time() if now is None else now
+
+    def reset(self) -> None:
+        self.subscribed.clear()
+
+    def sync(self, now: float | None = None) -> Tuple[List[str], List[str]]:
+        """(à abonner, à désabonner); les flux expirés sont libérés."""
+        now = time.time() if now is None else now
+        for symbol, last in list(self.wanted.items()):
+            if now - last > self.idle_sec:
+                del self.wanted[symbol]
+        target = set(self.wanted)
+        subscribe = sorted(target - self.subscribed)
+        unsubscribe = sorted(self.subscribed - target)
+        self.subscribed = target
+        for symbol in unsubscribe:
+            self.flows.pop(symbol, None)
+        return subscribe, unsubscribe
+
+    def on_message(self, topic: str, rows: List[Dict[str, Any]]) -> None:
+        symbol = topic.rsplit(".", 1)[1]
+        if symbol not in self.subscribed or not rows:
+            return
+        flow = self.flows.get(symbol)
+        if flow is None:
+            flow = self.flows[symbol] = TradeFlow()
+        batch = []
+        for r in rows:
+            try:
+                batch.append((int(r["T"]) / 1000.0, r["S"] == "Buy", float(r["v"]), float(r["p"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+        flow.ingest(batch)
+        self.batches += 1
+
+    def flow(self, symbol: str, now: float | None = None, window_sec: float | None = None) -> Optional[Flow]:
+        tf = self.flows.get(symbol)
+        if tf is None or not tf.count:
+            return None
+        now = time.time() if now is None else now
+        return tf.flow(window_sec or self.window_sec, now)
+
+    def imbalance(self, symbol: str, now: float | None = None) -> Optional[float]:
+        f = self.flow(symbol, now)
+        return f.imbalance if f is not None else None
+
+    def nbytes(self) -> int:
+        return sum(f.data.buffer_info()[1] * f.data.itemsize + 300 for f in self.flows.values())
+
+    def summary(self) -> str:
+        trades = sum(f.trades for f in self.flows.values())
+        return f"{len(self.subscribed)} subscribed, {trades} trades in {self.batches} batches"
+
+
+FLOWS = FlowManager()
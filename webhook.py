@@ -0,0 +1,193 @@
+"""Embedded asyncio HTTP server for Telegram webhook updates.
+
+Serveur HTTP/1.1 minimal (``asyncio.start_server``, sans dépendance):
+
+- seule la route ``POST <path>`` est servie; l'en-tête
+  ``X-Telegram-Bot-Api-Secret-Token`` doit correspondre au secret passé à
+  ``setWebhook`` (comparaison à temps constant), sinon 401
+- la mise à jour est mise en file et acquittée (200) immédiatement; une
+  file pleine répond 503 pour que Telegram la renvoie plus tard
+- ``workers`` tâches traitent la file en parallèle: le nombre de handlers
+  concurrents est borné
+- l'en-tête d'une requête est borné en nombre de lignes (``MAX_HEADERS``) et
+  en taille (``MAX_HEADER_BYTES``, 431 au-delà), et doit arriver en entier
+  en ``READ_TIMEOUT``: un client qui envoie ses en-têtes au compte-gouttes
+  ne garde pas la connexion
+
+Les connexions keep-alive de Telegram sont réutilisées.
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY = 1 << 20
+MAX_HEADERS = 64
+MAX_HEADER_BYTES = 16 * 1024
+READ_TIMEOUT = 30.0
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    503: "Service Unavailable",
+}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+class WebhookServer:
+    """Réception des mises à jour Telegram et traitement par un pool borné."""
+
+    def __init__(
+        self,
+        handler: Handler,
+        secret: str,
+        path: str = "/telegram",
+        workers: int = 4,
+        queue_size: int = 100,
+    ) -> None:
+        self.handler = handler
+        self.secret = secret.encode()
+        self.path = path
+        self.n_workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.workers: List[asyncio.Task] = []
+        self.port = 0
+        self.received = self.rejected = self.dropped = self.handled = self.errors = 0
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8080) -> None:
+        # limite du StreamReader: une ligne plus longue que l'en-tête entier est refusée
+        self.server = await asyncio.start_server(self._client, host, port, limit=MAX_HEADER_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.n_workers)]
+        logging.info("webhook server listening on %s:%d%s", host, self.port, self.path)
+
+    async def close(self, drain_timeout: float = 5.0) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        try:
+            # mises à jour déjà acquittées: on les traite avant de s'arrêter
+            await asyncio.wait_for(self.queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logging.warning("webhook: %d updates not handled at shutdown", self.queue.qsize())
+        for w in self.workers:
+            w.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+    async def _worker(self) -> None:
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.handler(update)
+                self.handled += 1
+            except Exception:
+                self.errors += 1
+                logging.exception("webhook update handler failed")
+            finally:
+                self.queue.task_done()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise _HttpError(400) from None
+        # délai global pour tout l'en-tête (pas un délai par ligne)
+        headers = await asyncio.wait_for(self._read_headers(reader, len(line)), READ_TIMEOUT)
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise _HttpError(400) from None
+        if length > MAX_BODY:
+            raise _HttpError(413)
+        body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT) if length else b""
+        return method, target.split("?", 1)[0], headers, body
+
+    async def _read_headers(self, reader: asyncio.StreamReader, size: int) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        count = 0
+        while True:
+            try:
+                h = await reader.readline()
+            except ValueError:  # ligne au-delà de la limite du StreamReader
+                raise _HttpError(431) from None
+            if h in (b"\r\n", b"\n", b""):
+                return headers
+            count += 1
+            size += len(h)
+            if count > MAX_HEADERS or size > MAX_HEADER_BYTES:
+                raise _HttpError(431)
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> int:
+        if path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        token = headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(token, self.secret):
+            self.rejected += 1
+            return 401
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return 400
+        self.received += 1
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return 503
+        return 200
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    req = await self._read_request(reader)
+                except _HttpError as e:
+                    await self._respond(writer, e.status, close=True)
+                    return
+                if req is None:
+                    return
+                method, path, headers, body = req
+                status = self._route(method, path, headers, body)
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, close)
+                if close:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, close: bool = False) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+    def summary(self) -> str:
+        return (
+            f"{self.received} received, {self.handled} handled, {self.queue.qsize()} queued, "
+            f"{self.dropped} dropped, {self.rejected} rejected, {self.errors} errors"
+        )